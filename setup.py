@@ -47,6 +47,7 @@ setuptools.setup(
         "postgres": ["psycopg2-binary"],
         "bigquery": ["sqlalchemy-bigquery"],
         "snowflake": ["snowflake-sqlalchemy"],
+        "arrow": ["pyarrow"],
     },
     entry_points={
         "console_scripts": ["trilogy=preql.scripts.trilogy:cli"],
@@ -318,3 +318,68 @@ def test_online_sales_queries(
     for statement in sql:
         generator.compile_statement(statement)
         adventureworks_engine.execute_query(statement).fetchall()
+
+
+@pytest.mark.adventureworks
+def test_minimal_projection(environment: Environment):
+    from trilogy.core.models import Datasource
+    from trilogy.core.query_processor import process_query
+
+    with open(
+        join(dirname(__file__), "online_sales_queries.preql"), "r", encoding="utf-8"
+    ) as f:
+        file = f.read()
+    environment, statements = parse(file, environment=environment)
+    selects = [x for x in statements if isinstance(x, SelectStatement)]
+    expected = [
+        {
+            "order_dates": {
+                "internet_sales.dates.order_date",
+                "internet_sales.dates.order_key",
+            },
+            "fact_internet_sales": {
+                "internet_sales.dates.order_key",
+                "internet_sales.order_line_number",
+                "internet_sales.order_number",
+                "internet_sales.sales_amount",
+            },
+        },
+        {
+            "customers": {
+                "internet_sales.customer.customer_id",
+                "internet_sales.customer.first_name",
+                "internet_sales.customer.last_name",
+            },
+            "fact_internet_sales": {
+                "internet_sales.customer.customer_id",
+                "internet_sales.order_line_number",
+                "internet_sales.order_number",
+                "internet_sales.order_quantity",
+                "internet_sales.sales_amount",
+            },
+        },
+        {
+            "customers": {
+                "internet_sales.customer.customer_id",
+                "internet_sales.customer.first_name",
+            },
+            "fact_internet_sales": {
+                "internet_sales.customer.customer_id",
+                "internet_sales.order_line_number",
+                "internet_sales.order_number",
+                "internet_sales.sales_amount",
+            },
+        },
+    ]
+    for select, columns in zip(selects, expected):
+        query = process_query(statement=select, environment=environment)
+        # table scans only read the columns the query needs
+        leaves = {
+            cte.source.datasources[0].identifier: {
+                c.address for c in cte.output_columns
+            }
+            for cte in query.ctes
+            if len(cte.source.datasources) == 1
+            and isinstance(cte.source.datasources[0], Datasource)
+        }
+        assert leaves == columns
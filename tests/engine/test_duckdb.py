@@ -1,5 +1,6 @@
 from datetime import datetime
 import networkx as nx
+from pytest import raises
 from trilogy.core.env_processor import generate_graph
 from trilogy.executor import Executor
 from trilogy.core.models import ShowStatement, Concept, Grain
@@ -466,3 +467,463 @@ order by
     results = default_duckdb_engine.execute_text(test)[0].fetchall()
     assert results[0] == (4,)
     assert len(results) == 2
+
+
+def test_query_cache():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        "CREATE TABLE orders AS SELECT * FROM (VALUES (1, 2.0), (2, 3.5)) t(order_id, revenue)"
+    )
+    executor.parse_text(
+        """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+"""
+    )
+    query = "select sum(revenue)->total_revenue;"
+    first = executor.execute_text(query)[0].fetchall()
+    assert executor.cache_stats.misses == 1
+    assert executor.execute_text(query)[0].fetchall() == first == [(5.5,)]
+    assert executor.cache_stats.hits == 1
+
+    # any change to the environment invalidates the cached plan
+    executor.execute_raw_sql("CREATE TABLE order_totals AS SELECT 7.0 as total_revenue")
+    executor.parse_text(
+        """
+datasource order_totals (
+    total_revenue: total_revenue
+)
+address order_totals;
+"""
+    )
+    assert executor.execute_text(query)[0].fetchall() == [(7.0,)]
+    assert executor.cache_stats.misses == 2
+
+
+def test_execute_many_pooled(tmp_path):
+    from trilogy.dialect.config import DuckDBConfig
+    from trilogy.executor import execution_stages
+
+    executor = Dialects.DUCK_DB.default_executor(
+        conf=DuckDBConfig(path=str(tmp_path / "pool.db")), max_workers=4
+    )
+    assert executor.pooled
+    executor.execute_raw_sql(
+        "CREATE TABLE orders AS SELECT * FROM (VALUES (1, 2.0), (2, 3.5)) t(order_id, revenue)"
+    )
+    statements = executor.parse_text(
+        """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+
+persist order_copy into order_copy from select order_id, revenue;
+select sum(revenue)->total_revenue;
+select count(order_id)->order_count;
+persist order_copy into order_copy from select order_id, revenue;
+"""
+    )
+    # the reads are independent, the repeated persist waits on the first
+    assert execution_stages(statements) == [0, 0, 0, 1]
+    results = executor.execute_many(statements)
+    assert results[1].fetchall() == [(5.5,)]
+    assert results[2].fetchall() == [(2,)]
+    assert "order_copy" in executor.environment.datasources
+    assert executor.execute_raw_sql("select count(*) from order_copy").fetchall() == [
+        (2,)
+    ]
+
+
+def test_execute_many_unshared_pool():
+    executor = Dialects.DUCK_DB.default_executor(max_workers=4)
+    # in memory databases are per connection, so run serially
+    assert not executor.pooled
+    results = executor.execute_text_concurrent(
+        """
+const x <- 1;
+select x;
+select x + 1 -> y;
+"""
+    )
+    assert [r.fetchall() for r in results] == [[(1,)], [(2,)]]
+
+
+def test_execute_stream():
+    import pyarrow as pa
+
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        "CREATE TABLE orders AS SELECT range as order_id, range * 1.5 as revenue FROM range(25)"
+    )
+    executor.parse_text(
+        """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+"""
+    )
+    query = "select order_id, revenue order by order_id asc;"
+    result = executor.execute_stream(query, batch_size=10)
+    assert result.keys() == ["order_id", "revenue"]
+    batches = list(result.iter_batches())
+    assert [batch.num_rows for batch in batches] == [10, 10, 5]
+    assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+
+    table = executor.execute_stream(query).to_arrow()
+    assert table.num_rows == 25
+    assert table.column("revenue").to_pylist()[2] == 3.0
+
+    frame = executor.execute_stream(query).to_pandas()
+    assert list(frame.columns) == ["order_id", "revenue"]
+    assert executor.execute_stream(query).fetchall()[:2] == [(0, 0.0), (1, 1.5)]
+
+
+def test_execute_stream_interleaved():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        "CREATE TABLE orders AS SELECT range as order_id, range * 1.5 as revenue FROM range(5000)"
+    )
+    executor.parse_text(
+        """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+"""
+    )
+    query = "select order_id, revenue order by order_id asc;"
+    first = executor.execute_stream(query, batch_size=100)
+    second = executor.execute_stream(query, batch_size=100)
+    # statements run while streams are open don't end them
+    assert executor.execute_text("select order_id where order_id = 3;")[
+        -1
+    ].fetchall() == [(3,)]
+    first_batches = first.iter_batches()
+    rows = next(first_batches).num_rows
+    assert second.to_arrow().num_rows == 5000
+    rows += sum(batch.num_rows for batch in first_batches)
+    assert rows == 5000
+
+
+def test_stream_cursor_schema():
+    import pyarrow as pa
+    from trilogy.results import stream_cursor
+
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.parse_text(
+        """
+key order_id int;
+property order_id.label string;
+"""
+    )
+    columns = [
+        executor.environment.concepts["order_id"],
+        executor.environment.concepts["label"],
+    ]
+    cursor = executor.execute_raw_sql(
+        "SELECT range as order_id, 'x' || range as label FROM range(3)"
+    )
+    result = stream_cursor(cursor, columns, batch_size=2)
+    # types come from the concepts, rather than being inferred
+    assert result.schema == pa.schema(
+        [pa.field("order_id", pa.int64()), pa.field("label", pa.string())]
+    )
+    table = result.to_arrow()
+    assert table.column("label").to_pylist() == ["x0", "x1", "x2"]
+    assert table.num_rows == 3
+
+
+def test_predicate_pushdown(monkeypatch):
+    from trilogy.constants import CONFIG
+
+    setup = """
+key order_id int;
+key customer_id int;
+property order_id.revenue float;
+property customer_id.name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue
+)
+grain (order_id)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name
+)
+grain (customer_id)
+address customers;
+"""
+    queries = [
+        "select order_id, revenue where revenue > 2 order by order_id asc;",
+        "select order_id, name where name = 'a' order by order_id asc;",
+        """select order_id, name, revenue where name = 'a' and revenue > 1
+        order by order_id asc;""",
+        "select name, sum(revenue)->total where name = 'a' order by name asc;",
+    ]
+
+    def run(queries: list[str]) -> list:
+        executor = Dialects.DUCK_DB.default_executor()
+        executor.execute_raw_sql(
+            """create table orders as select * from (values (1, 10, 1.0),
+            (2, 10, 3.0), (3, 20, 5.0), (4, 30, 7.0))
+            t(order_id, customer_id, revenue)"""
+        )
+        executor.execute_raw_sql(
+            """create table customers as select * from (values (10, 'a'),
+            (20, 'b')) t(customer_id, name)"""
+        )
+        executor.parse_text(setup)
+        return [executor.execute_text(q)[-1].fetchall() for q in queries]
+
+    pushed = run(queries)
+    with monkeypatch.context() as m:
+        m.setattr(CONFIG.optimizations, "predicate_pushdown", False)
+        assert run(queries) == pushed
+    assert pushed[2] == [(2, "a", 3.0)]
+    # filters on properties that are not selected are sourced alongside
+    # the output when they are at or above its grain
+    assert run(["select order_id where revenue > 2 order by order_id asc;"]) == [
+        [(2,), (3,), (4,)]
+    ]
+    # including with an aggregate, as they don't change its grain
+    assert run(["select customer_id, sum(revenue)->total where name = 'a';"]) == [
+        [(10, 4.0)]
+    ]
+    # a key that isn't selected would split the groups, so it is rejected
+    # rather than returning a row per customer and order
+    for query in [
+        "select customer_id, sum(revenue)->total where order_id > 1;",
+        "select customer_id where order_id > 1;",
+    ]:
+        with raises(NotImplementedError):
+            run([query])
+
+
+def test_sharded_datasource(monkeypatch):
+    from trilogy.constants import CONFIG
+
+    executor = Dialects.DUCK_DB.default_executor()
+    for day in range(1, 4):
+        executor.execute_raw_sql(
+            f"""create table events_2024010{day} as
+            select {day} * 10 + range as event_id,
+            DATE '2024-01-0{day}' as event_date,
+            range * 1.5 as amount
+            from range(3)"""
+        )
+    executor.parse_text(
+        """
+key event_id int;
+property event_id.event_date date;
+property event_id.amount float;
+
+datasource events (
+    event_id: event_id,
+    event_date: event_date,
+    amount: amount
+)
+grain (event_id)
+partition (event_date)
+shards (
+    '2024-01-01': events_20240101,
+    '2024-01-02': events_20240102,
+    '2024-01-03': events_20240103,
+);
+"""
+    )
+    query = """select event_id, amount
+where event_date >= cast('2024-01-02' as date) and amount > 1
+order by event_id asc;"""
+    sql = executor.generate_sql(query)[-1]
+    assert "events_20240101" not in sql
+    assert "events_20240102 UNION ALL SELECT * FROM events_20240103" in sql
+    results = executor.execute_text(query)[-1].fetchall()
+    assert [row[0] for row in results] == [21, 22, 31, 32]
+
+    sql = executor.generate_sql(
+        "select event_id where event_date = cast('2024-01-03' as date);"
+    )[-1]
+    assert "FROM\n    events_20240103 as" in sql
+
+    # unfiltered, every shard is read
+    results = executor.execute_text("select count(event_id) -> events;")[-1]
+    assert results.fetchall() == [(9,)]
+
+    monkeypatch.setattr(CONFIG.optimizations, "partition_pruning", False)
+    sql = executor.generate_sql(query)[-1]
+    assert "events_20240101" in sql
+    results = executor.execute_text(query)[-1].fetchall()
+    assert [row[0] for row in results] == [21, 22, 31, 32]
+
+
+def test_projection_coalescing(monkeypatch):
+    from trilogy.constants import CONFIG
+
+    setup = """
+key order_id int;
+property order_id.revenue float;
+property order_id.price float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue,
+    price: price
+)
+grain (order_id)
+address orders;
+
+auto big_revenue <- filter revenue where revenue > 10;
+auto big_price <- filter price where revenue > 10;
+auto revenue_rank <- rank order_id by revenue desc;
+auto price_rank <- rank order_id by price desc;
+"""
+    query = """select order_id, big_revenue, big_price, revenue_rank, price_rank
+order by order_id asc;"""
+
+    def run() -> tuple[int, list]:
+        executor = Dialects.DUCK_DB.default_executor()
+        executor.execute_raw_sql(
+            """create table orders as select * from (values (1, 1.0, 4.0),
+            (2, 30.0, 2.0), (3, 50.0, 1.0), (4, 7.0, 3.0))
+            t(order_id, revenue, price)"""
+        )
+        executor.parse_text(setup)
+        sql = executor.generate_sql(query)[-1]
+        return sql.count(" as (\n"), executor.execute_text(query)[-1].fetchall()
+
+    ctes, results = run()
+    monkeypatch.setattr(CONFIG.optimizations, "projection_coalescing", False)
+    uncoalesced, expected = run()
+    assert results == expected
+    # both filters, and both windows, read the same rows
+    assert ctes < uncoalesced
+    assert results[1] == (2, 30.0, 2.0, 2, 3)
+
+
+def test_aggregate_navigation():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        """create table sales as select * from (values
+        (1, 1, DATE '2024-01-01', 10.0), (2, 1, DATE '2024-01-02', 5.0),
+        (3, 2, DATE '2024-01-02', 7.0), (4, 2, DATE '2024-02-01', 3.0))
+        t(sale_id, store_id, sale_date, amount)"""
+    )
+    executor.parse_text(
+        """
+key sale_id int;
+key store_id int;
+property sale_id.sale_date date;
+property sale_id.amount float;
+property sale_id.sale_month <- month(sale_date);
+metric revenue <- sum(amount);
+metric sale_count <- count(sale_id);
+metric largest_sale <- max(amount);
+
+datasource sales (
+    sale_id: sale_id,
+    store_id: store_id,
+    sale_date: sale_date,
+    amount: amount,
+)
+grain (sale_id)
+address sales;
+"""
+    )
+    executor.execute_text(
+        """persist daily into daily from
+        select store_id, sale_date, revenue, sale_count, largest_sale;"""
+    )
+    query = """select sale_month, revenue, sale_count, largest_sale
+    order by sale_month asc;"""
+    sql = executor.generate_sql(query)[-1]
+    # coarser grains re-aggregate the rollup instead of the raw rows
+    assert "FROM\n    daily" in sql
+    assert "FROM\n    sales" not in sql
+    assert executor.execute_text(query)[-1].fetchall() == [
+        (1, 22.0, 3, 10.0),
+        (2, 3.0, 1, 3.0),
+    ]
+    assert executor.execute_text("select store_id, revenue order by store_id asc;")[
+        -1
+    ].fetchall() == [(1, 15.0), (2, 10.0)]
+    assert executor.execute_text("select revenue;")[-1].fetchall() == [(25.0,)]
+
+    # a filtered rollup is missing rows, so is never rolled up
+    executor.execute_raw_sql("drop table daily")
+    executor.environment.datasources.pop("daily")
+    executor.execute_text(
+        """persist store_one into store_one from
+        select store_id, revenue where store_id = 1;"""
+    )
+    assert "store_one" not in executor.generate_sql("select revenue;")[-1]
+    assert executor.execute_text("select revenue;")[-1].fetchall() == [(25.0,)]
+
+
+def test_aggregate_navigation_non_additive():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        """create table sales as select * from (values
+        (1, 1, DATE '2024-01-01', 10.0), (2, 1, DATE '2024-01-02', 5.0),
+        (3, 2, DATE '2024-01-02', 7.0), (4, 2, DATE '2024-02-01', 3.0))
+        t(sale_id, store_id, sale_date, amount)"""
+    )
+    executor.parse_text(
+        """
+key sale_id int;
+key store_id int;
+property sale_id.sale_date date;
+property sale_id.amount float;
+metric average_sale <- avg(amount);
+
+datasource sales (
+    sale_id: sale_id,
+    store_id: store_id,
+    sale_date: sale_date,
+    amount: amount,
+)
+grain (sale_id)
+address sales;
+"""
+    )
+    executor.execute_text(
+        """persist daily into daily from
+        select store_id, sale_date, average_sale;"""
+    )
+    # averages are recomputed from the raw rows, never from the rollup
+    query = "select store_id, average_sale order by store_id asc;"
+    assert "daily" not in executor.generate_sql(query)[-1]
+    assert executor.execute_text(query)[-1].fetchall() == [(1, 7.5), (2, 5.0)]
+
+    # with only the rollup left, a coarser grain can't be answered
+    executor.environment.datasources.pop("sales")
+    with raises(ValueError):
+        executor.generate_sql(query)
+    with raises(ValueError):
+        executor.generate_sql("select average_sale;")
+    assert executor.execute_text(
+        "select store_id, sale_date, average_sale order by store_id asc, sale_date asc;"
+    )[-1].fetchall()[0] == (1, datetime(2024, 1, 1).date(), 10.0)
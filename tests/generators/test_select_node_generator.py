@@ -41,3 +41,39 @@ select unnest;
     )
 
     assert isinstance(gnode, SelectNode)
+
+
+def test_select_node_prefers_cheapest_source():
+    env = Environment()
+    env.parse(
+        """
+key order_id int;
+key customer_id int;
+property customer_id.customer_name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    customer_name: customer_name,
+)
+grain (order_id)
+statistics (rows: 1000000)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    customer_name: customer_name,
+)
+grain (customer_id)
+statistics (rows: 1000)
+address customers;
+"""
+    )
+    gnode = gen_select_node(
+        concept=env.concepts["customer_id"],
+        local_optional=[env.concepts["customer_name"]],
+        environment=env,
+        g=generate_graph(env),
+        depth=0,
+    )
+    assert gnode.resolve().datasources[0].name == "customers"
@@ -2,10 +2,12 @@ from trilogy import parse
 from pathlib import Path
 
 from trilogy import Environment, Dialects
+from trilogy.constants import CONFIG
 from trilogy.core.env_processor import generate_graph
 from trilogy.core.processing.nodes import GroupNode, SelectNode, MergeNode, StrategyNode
 from trilogy.core.processing.concept_strategies_v3 import source_query_concepts
-from trilogy.core.models import Concept
+from trilogy.core.models import Concept, Datasource
+from trilogy.core.query_processor import process_query
 from trilogy.hooks.query_debugger import DebuggingHook
 
 
@@ -144,8 +146,37 @@ def test_three():
     assert "SELECT" in sql[-1]
     # assert sql[0] == '123'
 
-
-def test_three_alt():
+    # each side of the merge scans only the columns it reads
+    query = process_query(statement=select, environment=env)
+    leaves = [
+        {c.address for c in cte.output_columns}
+        for cte in query.ctes
+        if len(cte.source.datasources) == 1
+        and isinstance(cte.source.datasources[0], Datasource)
+    ]
+    assert sorted(leaves, key=sorted) == [
+        {
+            "store_sales.date.day_of_week",
+            "store_sales.date.id",
+            "store_sales.date.year",
+        },
+        {
+            "store_sales.date.id",
+            "store_sales.item.id",
+            "store_sales.sales_price",
+            "store_sales.ticket_number",
+        },
+        {"web_sales.date.day_of_week", "web_sales.date.id", "web_sales.date.year"},
+        {
+            "web_sales.date.id",
+            "web_sales.item.id",
+            "web_sales.order_number",
+            "web_sales.sales_price",
+        },
+    ]
+
+
+def test_three_alt(monkeypatch):
     env = Environment(working_path=working_path)
     with open(working_path / "query3_alt.preql") as f:
         text = f.read()
@@ -159,4 +190,11 @@ def test_three_alt():
     )
     sql = exec.generate_sql(select)
     assert "SELECT" in sql[-1]
+
+    # the web sales aggregates at order line grain are computed in one CTE
+    monkeypatch.setattr(CONFIG.optimizations, "aggregate_fusion", False)
+    monkeypatch.setattr(CONFIG.optimizations, "deduplication", False)
+    unfused = exec.generate_sql(select)[-1]
+    assert "GROUP BY" in unfused
+    assert unfused.count("GROUP BY") == sql[-1].count("GROUP BY") + 1
     # assert sql[0] == '123'
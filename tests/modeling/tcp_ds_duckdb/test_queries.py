@@ -1,6 +1,8 @@
 from pathlib import Path
 
-from trilogy import Executor
+from trilogy import Environment, Executor, parse
+from trilogy.core.models import Datasource, SelectStatement
+from trilogy.core.query_processor import process_query
 import pytest
 
 
@@ -57,3 +59,50 @@ def test_six(engine):
 
 def test_seven(engine):
     run_query(engine, 7)
+
+
+def leaf_columns(idx: int) -> dict[str, set[str]]:
+    with open(working_path / f"query{idx:02d}.preql") as f:
+        text = f.read()
+    env, statements = parse(text, Environment(working_path=working_path))
+    select = [x for x in statements if isinstance(x, SelectStatement)][-1]
+    query = process_query(statement=select, environment=env)
+    return {
+        cte.source.datasources[0].identifier: {c.address for c in cte.output_columns}
+        for cte in query.ctes
+        if len(cte.source.datasources) == 1
+        and isinstance(cte.source.datasources[0], Datasource)
+    }
+
+
+def test_minimal_projection():
+    # table scans only carry the columns the query reads
+    assert leaf_columns(1) == {
+        "store": {"returns.store.id", "returns.store.state"},
+        "date": {"returns.return_date.id", "returns.return_date.year"},
+        "customers": {"returns.customer.id", "returns.customer.text_id"},
+        "store_returns": {
+            "returns.customer.id",
+            "returns.return_amount",
+            "returns.return_date.id",
+            "returns.store.id",
+        },
+    }
+    assert leaf_columns(3) == {
+        "items": {
+            "store_sales.item.brand_id",
+            "store_sales.item.brand_name",
+            "store_sales.item.id",
+            "store_sales.item.manufacturer_id",
+        },
+        "date": {
+            "store_sales.date.id",
+            "store_sales.date.month_of_year",
+            "store_sales.date.year",
+        },
+        "store_sales": {
+            "store_sales.date.id",
+            "store_sales.ext_sales_price",
+            "store_sales.item.id",
+        },
+    }
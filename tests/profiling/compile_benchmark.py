@@ -0,0 +1,45 @@
+"""Time and peak memory to parse and compile the TPC-DS model queries.
+
+PYTHONPATH=. python tests/profiling/compile_benchmark.py
+"""
+
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+from trilogy import Dialects, Environment
+from trilogy.constants import CONFIG
+
+ROOT = Path(__file__).parent.parent / "modeling" / "tcp_ds_duckdb"
+QUERIES = [ROOT / f"query{idx:02d}.preql" for idx in (1, 2, 3, 6, 7)]
+
+
+def compile_all() -> int:
+    compiled = 0
+    for query in QUERIES:
+        executor = Dialects.DUCK_DB.default_executor(
+            environment=Environment(working_path=ROOT)
+        )
+        compiled += len(executor.generate_sql(query.read_text()))
+    return compiled
+
+
+if __name__ == "__main__":
+    # plan every statement from scratch
+    CONFIG.query_cache.enabled = False
+    CONFIG.plan_cache.enabled = False
+    compile_all()
+    best = None
+    for _ in range(3):
+        start = perf_counter()
+        compiled = compile_all()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    compile_all()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{len(QUERIES)} files, {compiled} statements: "
+        f"compile {best:.3f}s, peak memory {peak / 2**20:.1f} MiB"
+    )
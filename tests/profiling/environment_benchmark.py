@@ -0,0 +1,84 @@
+"""Time to load a synthetic model of 10k concepts into an environment.
+
+PYTHONPATH=. python tests/profiling/environment_benchmark.py
+"""
+
+from time import perf_counter
+
+from trilogy.core.enums import Purpose
+from trilogy.core.models import (
+    ColumnAssignment,
+    Concept,
+    DataType,
+    Datasource,
+    Environment,
+    Grain,
+)
+
+CONCEPTS = 10_000
+# concepts bound per datasource
+WIDTH = 20
+
+
+def build_model(
+    concepts: int = CONCEPTS,
+) -> tuple[list[Concept], list[Datasource]]:
+    keys: list[Concept] = []
+    outputs: list[Concept] = []
+    datasources: list[Datasource] = []
+    for idx in range(0, concepts, WIDTH):
+        key = Concept(name=f"key_{idx}", datatype=DataType.INTEGER, purpose=Purpose.KEY)
+        keys.append(key)
+        columns = [ColumnAssignment(alias=key.name, concept=key)]
+        for offset in range(1, WIDTH):
+            datatype = DataType.DATE if offset % 5 == 0 else DataType.STRING
+            prop = Concept(
+                name=f"property_{idx + offset}",
+                datatype=datatype,
+                purpose=Purpose.PROPERTY,
+                keys=(key,),
+            )
+            outputs.append(prop)
+            columns.append(ColumnAssignment(alias=prop.name, concept=prop))
+        datasources.append(
+            Datasource(
+                identifier=f"table_{idx}",
+                columns=columns,
+                address=f"table_{idx}",
+                grain=Grain(components=[key]),
+            )
+        )
+    return keys + outputs, datasources
+
+
+def load(concepts: list[Concept], datasources: list[Datasource], bulk: bool):
+    env = Environment()
+    start = perf_counter()
+    if bulk:
+        with env.bulk_load():
+            for concept in concepts:
+                env.add_concept(concept)
+            for datasource in datasources:
+                env.add_datasource(datasource)
+    else:
+        for concept in concepts:
+            env.add_concept(concept)
+            # reading the materialized concepts keeps the index live
+            _ = env.materialized_concepts
+        for datasource in datasources:
+            env.add_datasource(datasource)
+            _ = env.materialized_concepts
+    elapsed = perf_counter() - start
+    return env, elapsed
+
+
+if __name__ == "__main__":
+    concepts, datasources = build_model()
+    for bulk in (False, True):
+        env, elapsed = load(concepts, datasources, bulk)
+        label = "bulk" if bulk else "incremental"
+        print(
+            f"{label:>12}: {elapsed:.3f}s for {len(env.concepts)} concepts "
+            f"({len(env.materialized_concepts)} materialized), "
+            f"{len(env.datasources)} datasources"
+        )
@@ -0,0 +1,104 @@
+"""Build time, memory and join path search over the reference graph of a
+synthetic model of about 20k nodes, on each graph backend.
+
+PYTHONPATH=. python tests/profiling/graph_benchmark.py
+"""
+
+import tracemalloc
+from time import perf_counter
+
+from trilogy.constants import CONFIG, GraphBackend
+from trilogy.core.enums import Purpose
+from trilogy.core.env_processor import generate_graph
+from trilogy.core.graph_models import (
+    JoinPathIndex,
+    concept_to_node,
+    datasource_to_node,
+)
+from trilogy.core.models import (
+    ColumnAssignment,
+    Concept,
+    DataType,
+    Datasource,
+    Environment,
+    Grain,
+)
+
+DATASOURCES = 500
+# properties bound per datasource
+WIDTH = 18
+# datasources to search paths from
+SOURCES = 20
+
+
+def build_environment() -> Environment:
+    """A chain of tables, each keyed by its own key with a foreign key to
+    the previous table, so paths cross many datasources."""
+    env = Environment()
+    previous = None
+    with env.bulk_load():
+        for idx in range(DATASOURCES):
+            key = Concept(
+                name=f"key_{idx}", datatype=DataType.INTEGER, purpose=Purpose.KEY
+            )
+            env.add_concept(key)
+            columns = [ColumnAssignment(alias=key.name, concept=key)]
+            if previous is not None:
+                columns.append(ColumnAssignment(alias=previous.name, concept=previous))
+            for offset in range(WIDTH):
+                prop = Concept(
+                    name=f"property_{idx}_{offset}",
+                    datatype=DataType.STRING,
+                    purpose=Purpose.PROPERTY,
+                    keys=(key,),
+                )
+                env.add_concept(prop)
+                columns.append(ColumnAssignment(alias=prop.name, concept=prop))
+            env.add_datasource(
+                Datasource(
+                    identifier=f"table_{idx}",
+                    columns=columns,
+                    address=f"table_{idx}",
+                    grain=Grain(components=[key]),
+                )
+            )
+            previous = key
+    return env
+
+
+def run(env: Environment, backend: GraphBackend):
+    CONFIG.graph_backend = backend
+    tracemalloc.start()
+    start = perf_counter()
+    graph = generate_graph(env)
+    built = perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    datasources = list(env.datasources.values())
+    step = len(datasources) // SOURCES
+    targets = [
+        concept_to_node(c.with_default_grain())
+        for c in list(env.concepts.values())[::50]
+        if c.namespace == env.namespace
+    ]
+    index = JoinPathIndex(graph)
+    start = perf_counter()
+    hops = 0
+    for datasource in datasources[::step]:
+        source = datasource_to_node(datasource)
+        for target in targets:
+            hops += len(index.shortest_path(source, target))
+    searched = perf_counter() - start
+    print(
+        f"{backend.value:>9}: {len(graph.nodes)} nodes, built in {built:.3f}s "
+        f"using {memory / 2**20:.1f} MiB; {SOURCES * len(targets)} paths "
+        f"({hops} hops) in {searched:.3f}s, of which {index.build_time:.3f}s "
+        f"building trees of {index.memory_size / 2**20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    env = build_environment()
+    for backend in (GraphBackend.NETWORKX, GraphBackend.COMPACT):
+        run(env, backend)
@@ -0,0 +1,54 @@
+"""Parse throughput of the LALR and earley parsers over the test model corpus.
+
+PYTHONPATH=. python tests/profiling/parse_benchmark.py
+"""
+
+from pathlib import Path
+from time import perf_counter
+
+from lark.exceptions import UnexpectedInput
+
+from trilogy.parsing.parse_engine import EARLEY_PARSER, PARSER
+
+ROOT = Path(__file__).parent.parent
+
+CORPORA = [ROOT / "modeling", ROOT / "adventureworks"]
+
+
+def load_corpus() -> list[str]:
+    texts = []
+    for corpus in CORPORA:
+        for path in sorted(corpus.glob("**/*.preql")):
+            text = path.read_text()
+            try:
+                EARLEY_PARSER.parse(text)
+            except UnexpectedInput:
+                continue
+            texts.append(text)
+    return texts
+
+
+def benchmark(name: str, parse, texts: list[str], rounds: int = 3):
+    best = None
+    for _ in range(rounds):
+        start = perf_counter()
+        for text in texts:
+            parse(text)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    size = sum(len(text) for text in texts)
+    print(
+        f"{name:>8}: {best:.3f}s for {len(texts)} files, "
+        f"{size / best / 1024:.1f} KiB/s"
+    )
+    return best
+
+
+if __name__ == "__main__":
+    texts = load_corpus()
+    # build the LALR tables outside of the timed section
+    _ = PARSER.lalr
+    lalr = benchmark("lalr", PARSER.parse, texts)
+    earley = benchmark("earley", EARLEY_PARSER.parse, texts)
+    print(f"speedup: {earley / lalr:.1f}x")
@@ -0,0 +1,91 @@
+"""Time to find sources for wide selects spread across many datasources.
+
+PYTHONPATH=. python tests/profiling/select_width_benchmark.py
+"""
+
+from time import perf_counter
+
+from trilogy.core.enums import Purpose
+from trilogy.core.models import (
+    ColumnAssignment,
+    Concept,
+    DataType,
+    Datasource,
+    Environment,
+    Grain,
+    SelectStatement,
+)
+from trilogy.core.processing.node_generators.select_node import (
+    gen_select_nodes_from_tables,
+)
+from trilogy.core.query_processor import process_query
+
+WIDTHS = [4, 8, 12, 16, 24, 32, 48]
+# properties bound per datasource
+PER_DATASOURCE = 3
+
+
+def build_environment(width: int) -> tuple[Environment, Concept, list[Concept]]:
+    env = Environment()
+    key = Concept(name="id", datatype=DataType.INTEGER, purpose=Purpose.KEY)
+    env.add_concept(key)
+    properties = []
+    for idx in range(width):
+        prop = Concept(
+            name=f"property_{idx}",
+            datatype=DataType.STRING,
+            purpose=Purpose.PROPERTY,
+            keys=(key,),
+        )
+        env.add_concept(prop)
+        properties.append(prop)
+    # overlapping windows, so no single datasource covers the select
+    for idx in range(0, width, PER_DATASOURCE - 1):
+        bound = properties[idx : idx + PER_DATASOURCE]
+        env.add_datasource(
+            Datasource(
+                identifier=f"table_{idx}",
+                columns=[ColumnAssignment(alias="id", concept=key)]
+                + [ColumnAssignment(alias=c.name, concept=c) for c in bound],
+                address=f"table_{idx}",
+                grain=Grain(components=[key]),
+            )
+        )
+    return env, key, properties
+
+
+def time_call(func, rounds: int = 3) -> float:
+    best = None
+    for _ in range(rounds):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    return best
+
+
+if __name__ == "__main__":
+    for width in WIDTHS:
+        env, key, properties = build_environment(width)
+        graph = env.graph
+
+        def cover():
+            all_found, _, parents = gen_select_nodes_from_tables(
+                properties,
+                depth=0,
+                concept=key,
+                environment=env,
+                g=graph,
+                accept_partial=False,
+                all_concepts=[key, *properties],
+            )
+            assert all_found
+
+        def plan():
+            process_query(env, SelectStatement(selection=[key, *properties]))
+
+        print(
+            f"width {width:>3}: {len(env.datasources):>3} datasources, "
+            f"cover {time_call(cover):.4f}s, full query {time_call(plan):.4f}s"
+        )
@@ -10,3 +10,37 @@ def test_generate_cte_name():
         generate_cte_name(name, mapped)
 
     assert len(mapped) == 1000
+
+
+def test_hashed_cte_name():
+    from trilogy.core.query_processor import hashed_cte_name
+
+    mapped = {}
+    names = [hashed_cte_name(f"test_{x}", mapped) for x in range(0, 1000)]
+    assert len(set(names)) == 1000
+    # names depend only on the input, not on what was named before
+    assert hashed_cte_name("test_999", {}) == names[-1]
+    assert hashed_cte_name("test_999", mapped) == names[-1]
+
+
+def test_hashed_identifiers_stable(monkeypatch):
+    from trilogy import Dialects
+    from trilogy.constants import CONFIG
+
+    query = """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+
+select order_id, sum(revenue)->total_revenue where order_id > 1;
+"""
+    monkeypatch.setattr(CONFIG, "hashed_identifiers", True)
+    first = Dialects.DUCK_DB.default_executor().generate_sql(query)
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.generate_sql("const x <- 1; select x;")
+    assert executor.generate_sql(query) == first
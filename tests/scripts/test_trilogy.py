@@ -54,3 +54,33 @@ def test_db_args_string():
         raise result.exception
     assert result.exit_code == 0
     assert "(42,)" in result.output.strip()
+
+
+def test_cli_analyze(tmp_path):
+    import duckdb
+
+    db = tmp_path / "analyze.db"
+    connection = duckdb.connect(str(db))
+    connection.execute(
+        "create table orders as select range as id, range % 3 as status from range(10)"
+    )
+    connection.close()
+    model = tmp_path / "model.preql"
+    model.write_text(
+        """# orders table
+key id int;
+property id.status int;
+
+datasource orders (id: id, status: status)
+grain (id)
+address orders;
+"""
+    )
+    runner = CliRunner()
+    result = runner.invoke(cli, ["analyze", str(model), "duckdb", "--path", str(db)])
+    if result.exception:
+        raise result.exception
+    assert result.exit_code == 0
+    text = model.read_text()
+    assert text.startswith("# orders table")
+    assert "statistics (rows: 10, distinct (id: 10, status: 3))" in text
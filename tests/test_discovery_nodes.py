@@ -65,3 +65,115 @@ def test_group_node_property_all(test_environment: Environment, test_environment
     final = group_node.resolve()
     assert len(final.datasources) == 1
     assert final.datasources[0].group_required is False
+
+
+def test_select_nodes_from_tables_cover():
+    from trilogy import parse
+    from trilogy.core.processing.node_generators.select_node import (
+        gen_select_nodes_from_tables,
+    )
+
+    env, _ = parse(
+        """
+key id int;
+property id.a string;
+property id.b string;
+property id.c string;
+property id.d string;
+
+datasource ab (id: id, a: a, b: b) address ab;
+datasource bc (id: id, b: b, c: c) address bc;
+datasource cd (id: id, c: c, d: d) address cd;
+"""
+    )
+    key = env.concepts["id"]
+    optional = [env.concepts[x] for x in ["a", "b", "c", "d"]]
+    all_found, found, parents = gen_select_nodes_from_tables(
+        optional,
+        depth=0,
+        concept=key,
+        environment=env,
+        g=env.graph,
+        accept_partial=False,
+        all_concepts=[key, *optional],
+    )
+    assert all_found
+    assert {c.address for c in found} == {c.address for c in optional}
+    # ab and cd cover everything; bc adds nothing new
+    assert len(parents) == 2
+
+
+def test_select_nodes_from_tables_partial_cover():
+    from trilogy import parse
+    from trilogy.core.processing.node_generators.select_node import (
+        gen_select_nodes_from_tables,
+    )
+
+    env, _ = parse(
+        """
+key id int;
+property id.a string;
+property id.b string;
+property id.c string;
+
+datasource abc (id: id, a: ~a, b: b, c: c) address abc;
+datasource a_full (id: id, a: a) address a_full;
+"""
+    )
+    key = env.concepts["id"]
+    optional = [env.concepts[x] for x in ["a", "b", "c"]]
+    all_found, found, parents = gen_select_nodes_from_tables(
+        optional,
+        depth=0,
+        concept=key,
+        environment=env,
+        g=env.graph,
+        accept_partial=False,
+        all_concepts=[key, *optional],
+    )
+    assert all_found
+    assert {c.address for c in found} == {c.address for c in optional}
+    # abc scores best, but can only provide b and c in full
+    assert len(parents) == 2
+    assert not any(p.partial_concepts for p in parents)
+
+
+def test_priority_concept():
+    from trilogy import parse
+    from trilogy.core.processing.concept_strategies_v3 import (
+        get_priority_concept,
+        get_upstream_concepts,
+    )
+
+    env, _ = parse(
+        """
+key order_id int;
+property order_id.revenue float;
+property order_id.taxed_revenue <- revenue * 1.1;
+metric total_revenue <- sum(taxed_revenue);
+const rate <- 1.1;
+"""
+    )
+    concepts = [
+        env.concepts[x] for x in ["revenue", "taxed_revenue", "total_revenue", "rate"]
+    ]
+    assert get_upstream_concepts(env.concepts["total_revenue"]) == {
+        "local.taxed_revenue",
+        "local.revenue",
+    }
+    kwargs = dict(depth=0, environment=env)
+    # single row constants first
+    assert get_priority_concept(concepts, set(), set(), **kwargs).name == "rate"
+    # derived concepts before the concepts they are derived from
+    assert (
+        get_priority_concept(concepts, {"local.rate"}, set(), **kwargs).name
+        == "total_revenue"
+    )
+    # concepts that are upstream of others are delayed
+    assert (
+        get_priority_concept(
+            concepts, {"local.rate", "local.total_revenue"}, set(), **kwargs
+        ).name
+        == "taxed_revenue"
+    )
+    assert env.revision_cache("lineage_closure")
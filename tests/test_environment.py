@@ -1,5 +1,9 @@
-from trilogy.core.models import Environment
+from trilogy.core.models import Environment, Concept, DataType
+from trilogy.core.enums import Purpose
+from trilogy.core.env_processor import generate_graph
+from trilogy import parse
 from pathlib import Path
+from pytest import raises
 
 
 def test_environment_serialization(test_environment: Environment):
@@ -20,3 +24,156 @@ def test_environment_from_path():
     env = Environment.from_file(Path(__file__).parent / "test_env.preql")
 
     assert "id" in env.concepts
+
+
+def graph_signature(graph):
+    return set(graph.nodes), set(graph.edges)
+
+
+def test_environment_graph_reuse():
+    env, _ = parse(
+        """
+key order_id int;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    revenue: revenue
+)
+address orders;
+"""
+    )
+    graph = env.graph
+    assert env.graph is graph
+    assert graph_signature(graph) == graph_signature(generate_graph(env))
+
+    # additions update the cached graph in place
+    env, _ = parse(
+        """
+metric total_revenue <- sum(revenue);
+property order_id.tax float;
+
+datasource order_tax (
+    order_id: order_id,
+    tax: tax
+)
+address order_tax;
+""",
+        environment=env,
+    )
+    assert env.graph is graph
+    assert "c~local.total_revenue@Grain<Abstract>" in graph.nodes
+    assert "ds~local.order_tax" in graph.nodes
+    assert graph_signature(graph) == graph_signature(generate_graph(env))
+
+
+def test_environment_graph_invalidation():
+    env, _ = parse(
+        """
+key order_id int;
+
+datasource orders (
+    order_id: order_id,
+)
+address orders;
+"""
+    )
+    graph = env.graph
+    assert "ds~local.orders" in graph.nodes
+    del env.datasources["orders"]
+    rebuilt = env.graph
+    assert rebuilt is not graph
+    assert "ds~local.orders" not in rebuilt.nodes
+
+
+def test_materialized_concepts_incremental():
+    env, _ = parse(
+        """
+key order_id int;
+property order_id.order_date date;
+
+datasource orders (
+    order_id: order_id,
+)
+address orders;
+"""
+    )
+    assert [c.address for c in env.materialized_concepts] == ["local.order_id"]
+    env.parse(
+        """
+datasource order_dates (
+    order_id: order_id,
+    order_date: order_date
+)
+address order_dates;
+"""
+    )
+    assert {c.address for c in env.materialized_concepts} == {
+        "local.order_id",
+        "local.order_date",
+    }
+    del env.datasources["order_dates"]
+    assert [c.address for c in env.materialized_concepts] == ["local.order_id"]
+
+
+def test_bulk_load():
+    env = Environment()
+    order_date = Concept(
+        name="order_date", datatype=DataType.DATE, purpose=Purpose.PROPERTY
+    )
+    with env.bulk_load():
+        env.add_concept(order_date)
+        assert "order_date.month" not in env.concepts
+    assert "order_date.month" in env.concepts
+
+    # a batch that fails leaves nothing queued for the next one
+    ship_date = Concept(
+        name="ship_date", datatype=DataType.DATE, purpose=Purpose.PROPERTY
+    )
+    with raises(ValueError):
+        with env.bulk_load():
+            env.add_concept(ship_date)
+            raise ValueError("failed batch")
+    with env.bulk_load():
+        pass
+    assert "ship_date.month" not in env.concepts
+
+
+def test_join_path_index():
+    import networkx as nx
+
+    env, _ = parse(
+        """
+key order_id int;
+key customer_id int;
+property customer_id.name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id
+)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name
+)
+address customers;
+"""
+    )
+    index = env.join_path_index()
+    assert env.join_path_index() is index
+    graph = env.graph
+    name = "c~local.name@Grain<local.customer_id>"
+    path = index.shortest_path("ds~local.orders", name)
+    assert path[0] == "ds~local.orders" and path[-1] == name
+    assert len(path) == len(nx.shortest_path(graph, "ds~local.orders", name))
+    index.build()
+    assert len(index) == 2
+    assert index.memory_size > 0
+    assert index.build_time > 0
+    with raises(nx.NodeNotFound):
+        index.shortest_path("ds~local.orders", "c~local.missing@Grain<>")
+
+    env.parse("property order_id.revenue float;")
+    assert env.join_path_index() is not index
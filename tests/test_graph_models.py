@@ -0,0 +1,81 @@
+from pytest import raises
+import networkx as nx
+
+from trilogy import parse
+from trilogy.constants import CONFIG, GraphBackend
+from trilogy.core.env_processor import generate_graph
+from trilogy.core.graph_models import (
+    CompactGraph,
+    CompactReferenceGraph,
+    JoinPathIndex,
+    ReferenceGraph,
+)
+
+MODEL = """
+key order_id int;
+key customer_id int;
+property customer_id.name string;
+property order_id.revenue float;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue,
+)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name
+)
+address customers;
+"""
+
+
+def test_graph_backends(monkeypatch):
+    env, _ = parse(MODEL)
+    reference = generate_graph(env)
+    assert isinstance(reference, ReferenceGraph)
+    monkeypatch.setattr(CONFIG, "graph_backend", GraphBackend.COMPACT)
+    compact = generate_graph(env)
+    assert isinstance(compact, CompactReferenceGraph)
+    assert list(compact.nodes) == list(reference.nodes)
+    assert set(compact.edges) == set(reference.edges)
+    for node in reference.nodes:
+        assert compact.successors(node) == list(reference.successors(node))
+        assert compact.nodes[node] == reference.nodes[node]
+    exported = compact.to_networkx()
+    assert isinstance(exported, ReferenceGraph)
+    assert set(exported.edges) == set(reference.edges)
+
+    # same paths, with ties broken the same way
+    compact_index = JoinPathIndex(compact).build()
+    reference_index = JoinPathIndex(reference).build()
+    for node in reference_index._tree("ds~local.orders"):
+        assert compact_index.shortest_path(
+            "ds~local.orders", node
+        ) == reference_index.shortest_path("ds~local.orders", node)
+    with raises(nx.NetworkXNoPath):
+        compact_index.shortest_path(
+            "ds~local.orders", "c~__preql_internal.all_rows@Grain<Abstract>"
+        )
+    with raises(nx.NodeNotFound):
+        compact_index.shortest_path("ds~local.orders", "c~local.missing@Grain<>")
+
+
+def test_compact_graph_components():
+    graph = CompactGraph(directed=False)
+    for u, v in [("a", "b"), ("c", "d"), ("b", "a"), ("e", "b")]:
+        graph.add_edge(u, v)
+    graph.add_node("f", type="isolated")
+    assert graph.neighbors("b") == ["a", "e"]
+    assert graph.connected_components() == [{"a", "b", "e"}, {"c", "d"}, {"f"}]
+    # edges added after a read are merged into the rows on the next one
+    graph.add_edge("d", "f")
+    assert graph.connected_components() == [{"a", "b", "e"}, {"c", "d", "f"}]
+    assert graph.nodes["f"] == {"type": "isolated"}
+
+    path = JoinPathIndex(graph).shortest_path("a", "e")
+    assert path == nx.shortest_path(graph.to_networkx(), "a", "e")
+    with raises(nx.NetworkXNoPath):
+        JoinPathIndex(graph).shortest_path("a", "c")
@@ -1,4 +1,7 @@
 from trilogy import Environment
+from trilogy.constants import CONFIG
+from trilogy.parser import parse
+from trilogy.parsing.cache import ImportCache
 
 
 def test_multi_environment():
@@ -21,3 +24,102 @@ const pi <- 3.14;
     )
 
     assert basic.concepts["math.pi"].name == "pi"
+
+
+def test_import_cache(tmp_path, monkeypatch):
+    cache_path = tmp_path / "cache"
+    monkeypatch.setattr(CONFIG, "import_cache_path", str(cache_path))
+    (tmp_path / "base.preql").write_text("key order_id int;")
+    (tmp_path / "orders.preql").write_text(
+        """import base as base;
+metric order_count <- count(base.order_id);"""
+    )
+    query = """import orders as orders;
+select orders.base.order_id, orders.order_count;"""
+
+    env, _ = parse(query, environment=Environment(working_path=tmp_path))
+    assert len(list(cache_path.iterdir())) == 2
+
+    cache = ImportCache(cache_path)
+    orders_text = (tmp_path / "orders.preql").read_text()
+    entry = cache.get(tmp_path / "orders.preql", orders_text)
+    assert entry
+    assert str(tmp_path / "base.preql") in entry.dependencies
+
+    cached_env, _ = parse(query, environment=Environment(working_path=tmp_path))
+    assert (
+        cached_env.concepts["orders.order_count"] == env.concepts["orders.order_count"]
+    )
+
+    # changing an import invalidates every file that depends on it
+    (tmp_path / "base.preql").write_text("key order_id string;")
+    assert not cache.get(tmp_path / "orders.preql", orders_text)
+    env, _ = parse(query, environment=Environment(working_path=tmp_path))
+    assert env.concepts["orders.base.order_id"].datatype.value == "string"
+
+
+def test_import_cache_concurrent_writes(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = ImportCache(tmp_path)
+    env, _ = parse("key order_id int;")
+    target = tmp_path / "base.preql"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(
+            pool.map(lambda _: cache.put(target, "key order_id int;", env), range(32))
+        )
+    # every writer staged to its own file, and none were left behind
+    assert len(set(paths)) == 1
+    assert list(tmp_path.iterdir()) == [paths[0]]
+    assert cache.get(target, "key order_id int;")
+
+
+def test_import_cache_write_failure(tmp_path, monkeypatch):
+    import pickle
+
+    from trilogy.parsing import cache as cache_module
+
+    cache_path = tmp_path / "cache"
+    monkeypatch.setattr(CONFIG, "import_cache_path", str(cache_path))
+    (tmp_path / "base.preql").write_text("key order_id int;")
+
+    def fail(*args, **kwargs):
+        raise pickle.PicklingError("unpicklable")
+
+    monkeypatch.setattr(cache_module.pickle, "dump", fail)
+    # the cache is best effort; a failed write doesn't fail the import
+    env, _ = parse(
+        "import base as base; select base.order_id;",
+        environment=Environment(working_path=tmp_path),
+    )
+    assert "base.order_id" in env.concepts
+    assert list(cache_path.iterdir()) == []
+
+    # nor does a cache path that can't be created
+    blocked = tmp_path / "blocked"
+    blocked.write_text("")
+    monkeypatch.undo()
+    assert ImportCache(blocked / "cache").put(tmp_path / "base.preql", "", env) is None
+
+
+def test_import_cache_skips_planner_state(tmp_path):
+    cache = ImportCache(tmp_path)
+    env, _ = parse(
+        "key order_id int; datasource orders (order_id: order_id) grain (order_id) address orders;"
+    )
+    assert env.graph is not None
+    assert env.plan_cache is not None
+    assert env.materialized_concepts
+    target = tmp_path / "base.preql"
+    cache.put(target, "text", env)
+
+    entry = cache.get(target, "text")
+    assert entry
+    cached = entry.environment
+    assert cached._graph is None
+    assert cached._plan_cache is None
+    assert cached._caches is None
+    assert cached._materialized is None
+    # and rebuilt on demand
+    assert set(cached.graph.nodes) == set(env.graph.nodes)
+    assert [c.address for c in cached.materialized_concepts] == ["local.order_id"]
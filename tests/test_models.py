@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from trilogy.core.enums import BooleanOperator, Purpose, JoinType, ComparisonOperator
 from trilogy.core.models import (
     CTE,
@@ -109,6 +112,26 @@ def test_grain(test_environment):
     assert z2 == z, f"Property should be removed from grain ({z.set}) vs {z2.set}"
 
 
+def test_concept_variants(test_environment):
+    oid = test_environment.concepts["order_id"]
+    cname = test_environment.concepts["category_name"]
+    grain = Grain(components=[oid])
+    # variants are built once per concept and shared
+    assert oid.with_grain(grain) is oid.with_grain(Grain(components=[oid]))
+    assert cname.with_default_grain() is cname.with_default_grain()
+    assert cname.with_namespace("a") is cname.with_namespace("a")
+    assert cname.with_namespace("a").address == "a.category_name"
+    with pytest.raises(ValidationError):
+        cname.name = "renamed"
+    # unvalidated copies match what the validators would have built
+    namespaced = cname.with_namespace("b")
+    assert namespaced.grain == cname.grain.with_namespace("b")
+    assert namespaced.grain == Grain(
+        components=[c.with_namespace("b") for c in cname.grain.components]
+    )
+    assert (grain + Grain(components=[cname])) == Grain(components=[oid, cname])
+
+
 def test_select(test_environment: Environment):
     oid = test_environment.concepts["order_id"]
     pid = test_environment.concepts["product_id"]
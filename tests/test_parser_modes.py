@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from lark import Tree
+import pytest
+from lark.exceptions import UnexpectedInput
+
+from trilogy import parse
+from trilogy.constants import ParserMode
+from trilogy.parsing.parse_engine import EARLEY_PARSER, PARSER, TrilogyParser
+
+ROOT = Path(__file__).parent
+
+# every trilogy file in the test suite
+CORPUS = sorted(ROOT.glob("**/*.preql"))
+
+
+def normalize(tree):
+    # the earley grammar wraps every operand in an expr node
+    # which the LALR grammar inlines
+    if isinstance(tree, Tree):
+        if tree.data == "expr" and len(tree.children) == 1:
+            return normalize(tree.children[0])
+        return (str(tree.data), [normalize(x) for x in tree.children])
+    return str(tree)
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda x: str(x.relative_to(ROOT)))
+def test_lalr_matches_earley(path: Path):
+    text = path.read_text()
+    try:
+        earley = EARLEY_PARSER.parse(text)
+    except UnexpectedInput:
+        pytest.skip("not valid trilogy")
+    lalr = PARSER.lalr.parse(text)
+    assert normalize(lalr) == normalize(earley)
+
+
+def test_lalr_operator_precedence():
+    tree = PARSER.lalr.parse("key x int; property x.y <- x + 2 * 3 - 1;")
+    derivation = next(tree.find_data("concept_derivation"))
+    assert normalize(derivation.children[-1]) == (
+        "fsub",
+        [
+            (
+                "fadd",
+                [
+                    ("expr_reference", ["x"]),
+                    (
+                        "fmul",
+                        [
+                            ("literal", [("int_lit", ["2"])]),
+                            ("literal", [("int_lit", ["3"])]),
+                        ],
+                    ),
+                ],
+            ),
+            ("literal", [("int_lit", ["1"])]),
+        ],
+    )
+
+
+def test_earley_fallback():
+    # a concept shadowing a function keyword is ambiguous for LALR
+    text = """const count <- 1;
+select count;"""
+    with pytest.raises(UnexpectedInput):
+        PARSER.lalr.parse(text)
+    env, statements = parse(text)
+    assert statements[-1].output_components[0].address == "local.count"
+
+
+def test_earley_mode():
+    parser = TrilogyParser(mode=ParserMode.EARLEY)
+    text = "key x int; select x;"
+    assert normalize(parser.parse(text)) == normalize(PARSER.parse(text))
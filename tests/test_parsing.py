@@ -138,6 +138,74 @@ address `preqldata.analytics_411641820.events_*`
     assert query.address.location == "`preqldata.analytics_411641820.events_*`"
 
 
+def test_sharded_datasource():
+    from trilogy.parsing.render import Renderer
+
+    text = """key event_id int;
+property event_id.event_date date;
+
+datasource events (
+    event_id: event_id,
+    event_date: event_date,
+)
+grain (event_id)
+partition (event_date)
+shards (
+    '2024-01-01': events_20240101,
+    '2024-01-02': `project.dataset.events_20240102`,
+);"""
+    env, parsed = parse_text(text)
+    datasource = parsed[-1]
+    assert [c.address for c in datasource.partition_fields] == ["local.event_date"]
+    assert [s.address.location for s in datasource.metadata.shards] == [
+        "events_20240101",
+        "`project.dataset.events_20240102`",
+    ]
+    # unpruned scans read every shard
+    assert "UNION ALL" in datasource.safe_location
+
+    env, parsed = parse_text(Renderer().to_string(datasource), env)
+    assert parsed[-1].metadata.shards == datasource.metadata.shards
+
+
+def test_sharded_datasource_requires_partition():
+    from pytest import raises
+
+    with raises(Exception, match="single partition field"):
+        parse_text(
+            """key event_id int;
+datasource events (event_id: event_id)
+shards (1: events_1, 2: events_2);"""
+        )
+
+
+def test_datasource_statistics():
+    from trilogy.parsing.render import Renderer
+
+    text = """key order_id int;
+property order_id.status string;
+
+datasource orders (
+    order_id: order_id,
+    status: status,
+)
+grain (order_id)
+statistics (rows: 1000, bytes: 64000, distinct (order_id: 1000, status: 4))
+address orders;"""
+    env, parsed = parse_text(text)
+    statistics = parsed[-1].statistics
+    assert statistics.row_count == 1000
+    assert statistics.bytes == 64000
+    assert statistics.distinct_counts == {"local.order_id": 1000, "local.status": 4}
+    assert parsed[-1].with_namespace("sales").statistics.distinct_counts == {
+        "sales.order_id": 1000,
+        "sales.status": 4,
+    }
+
+    env, parsed = parse_text(Renderer().to_string(parsed[-1]), env)
+    assert parsed[-1].statistics == statistics
+
+
 def test_purpose_and_keys():
     env, parsed = parse_text(
         """key id int;
@@ -182,3 +250,29 @@ select
     for name in ["test_name_count"]:
         assert name in env.concepts
         assert env.concepts[name].purpose == Purpose.METRIC
+
+
+def test_single_pass_without_forward_references():
+    env, parsed = parse_text(
+        """key order_id int;
+property order_id.revenue float;
+select order_id, revenue;"""
+    )
+    # nothing was undefined, so the second pass is skipped
+    assert env._parse_count == 1
+    assert not env.concepts.undefined
+    assert isinstance(parsed[-1], SelectStatement)
+
+
+def test_forward_reference_resolution():
+    env, parsed = parse_text(
+        """key order_id int;
+property order_id.double_revenue <- revenue * 2;
+property order_id.revenue float;
+select order_id, double_revenue;"""
+    )
+    assert env._parse_count == 2
+    assert not env.concepts.undefined
+    lineage = env.concepts["double_revenue"].lineage
+    assert lineage.concept_arguments[0] == env.concepts["revenue"]
+    assert lineage.concept_arguments[0].datatype == DataType.FLOAT
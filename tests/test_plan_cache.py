@@ -0,0 +1,92 @@
+from trilogy import Dialects, Environment
+from trilogy.core.processing.nodes import History
+from trilogy.parser import parse_text
+
+MODEL = """
+key order_id int;
+key customer_id int;
+property order_id.revenue float;
+property customer_id.customer_name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue,
+)
+grain (order_id)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    customer_name: customer_name,
+)
+grain (customer_id)
+address customers;
+"""
+
+
+def test_plan_cache_reuse():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        """create table orders as select * from (values (1, 1, 5.0), (2, 1, 15.0),
+        (3, 2, 25.0)) t(order_id, customer_id, revenue);
+        create table customers as select * from (values (1, 'ann'), (2, 'bob'))
+        t(customer_id, customer_name);"""
+    )
+    executor.parse_text(MODEL)
+    stats = executor.plan_cache_stats
+    assert executor.execute_text(
+        "select order_id, customer_name, revenue where revenue > 10 order by order_id asc;"
+    )[-1].fetchall() == [(2, "ann", 15.0), (3, "bob", 25.0)]
+    assert (stats.hits, stats.misses) == (0, 1)
+    # the same concepts in another order, with another filter, reuse the plan
+    assert executor.execute_text(
+        "select revenue, customer_name, order_id where revenue > 20;"
+    )[-1].fetchall() == [(25.0, "bob", 3)]
+    assert stats.hits == 1
+    # a different set of concepts is planned from scratch
+    executor.generate_sql("select order_id, revenue;")
+    assert stats.misses == 2
+
+
+def test_plan_cache_invalidation():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.parse_text(MODEL)
+    executor.generate_sql("select customer_id, customer_name;")
+    assert len(executor.environment.plan_cache) == 1
+    executor.parse_text("property customer_id.region string;")
+    executor.generate_sql("select customer_id, customer_name;")
+    # the new revision dropped the old plan before planning again
+    assert executor.plan_cache_stats.hits == 0
+    assert len(executor.environment.plan_cache) == 1
+
+
+def test_plan_cache_rowset_reuse():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.execute_raw_sql(
+        """create table orders as select * from (values (1, 1, 5.0), (2, 1, 15.0),
+        (3, 2, 25.0)) t(order_id, customer_id, revenue);"""
+    )
+    executor.parse_text(MODEL)
+    executor.parse_text(
+        """rowset spend <- select customer_id, sum(revenue)->total;
+        auto grand_total <- sum(spend.total);"""
+    )
+    stats = executor.plan_cache_stats
+    assert executor.execute_text(
+        "select spend.customer_id, spend.total order by spend.customer_id asc;"
+    )[-1].fetchall() == [(1, 20.0), (2, 25.0)]
+    assert (stats.hits, stats.misses) == (0, 2)
+    # another statement over the same rowset reuses its plan
+    assert executor.execute_text("select grand_total;")[-1].fetchall() == [(45.0,)]
+    assert (stats.hits, stats.misses) == (1, 3)
+
+
+def test_history_key_order():
+    env = Environment()
+    env, _ = parse_text(MODEL, env)
+    order_id, revenue = env.concepts["order_id"], env.concepts["revenue"]
+    history = History()
+    history.search_to_history([order_id, revenue], False, None)
+    assert history.get_history([revenue, order_id]) is None
+    assert history.get_history([revenue, order_id], accept_partial=True) is False
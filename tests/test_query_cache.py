@@ -0,0 +1,42 @@
+from trilogy import parse
+from trilogy.constants import QueryCacheConfig
+from trilogy.core.query_cache import QueryCache
+
+
+def test_query_cache_key():
+    env, statements = parse(
+        """
+key order_id int;
+property order_id.revenue float;
+
+select order_id, revenue;
+select order_id,   revenue ;
+select order_id;
+"""
+    )
+    cache = QueryCache()
+    first, second, third = statements[-3:]
+    assert cache.key(env, first) == cache.key(env, second)
+    assert cache.key(env, first) != cache.key(env, third)
+    before = cache.key(env, first)
+    env.parse("property order_id.tax float;")
+    assert cache.key(env, first) != before
+
+
+def test_query_cache_eviction(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("trilogy.core.query_cache.monotonic", lambda: now[0])
+    cache = QueryCache(QueryCacheConfig(max_size=2, ttl=10))
+    cache.put("a", "query_a")
+    cache.put("b", "query_b")
+    assert cache.get("a") == "query_a"
+    # b is now least recently used
+    cache.put("c", "query_c")
+    assert cache.get("b") is None
+    assert cache.stats.evictions == 1
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+    assert len(cache) == 1
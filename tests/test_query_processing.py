@@ -171,3 +171,188 @@ def test_full_query(test_environment, test_environment_graph):
         "category_name",
         "total_revenue",
     }
+
+
+def test_projection_pruning(monkeypatch):
+    from trilogy.constants import CONFIG
+    from trilogy.core.models import Datasource
+    from trilogy.parser import parse
+
+    env, statements = parse(
+        """
+key order_id int;
+key customer_id int;
+property order_id.revenue float;
+property order_id.notes string;
+property customer_id.name string;
+property customer_id.email string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue,
+    notes: notes
+)
+grain (order_id)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name,
+    email: email
+)
+grain (customer_id)
+address customers;
+
+select name, sum(revenue)->total_revenue;
+"""
+    )
+
+    def leaf_columns() -> dict[str, set[str]]:
+        query = process_query(statement=statements[-1], environment=env)
+        return {
+            cte.source.datasources[0].identifier: {
+                c.address for c in cte.output_columns
+            }
+            for cte in query.ctes
+            if len(cte.source.datasources) == 1
+            and isinstance(cte.source.datasources[0], Datasource)
+        }
+
+    assert leaf_columns() == {
+        "orders": {"local.customer_id", "local.revenue"},
+        "customers": {"local.customer_id", "local.name"},
+    }
+    monkeypatch.setattr(CONFIG.optimizations, "projection_pruning", False)
+    assert "local.order_id" in leaf_columns()["orders"]
+
+
+def test_predicate_pushdown(monkeypatch):
+    from trilogy.constants import CONFIG
+    from trilogy.core.models import Datasource
+    from trilogy.parser import parse
+
+    env, statements = parse(
+        """
+key order_id int;
+key customer_id int;
+property order_id.revenue float;
+property customer_id.name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue
+)
+grain (order_id)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name
+)
+grain (customer_id)
+address customers;
+
+select order_id, name, revenue where name = 'a' and revenue > 1;
+select name, sum(revenue)->total_revenue where revenue > 1;
+"""
+    )
+
+    def leaf_conditions(statement):
+        query = process_query(statement=statement, environment=env)
+        leaves = {
+            cte.source.datasources[0].identifier: cte.condition
+            for cte in query.ctes
+            if len(cte.source.datasources) == 1
+            and isinstance(cte.source.datasources[0], Datasource)
+        }
+        return leaves, query.where_clause
+
+    leaves, where = leaf_conditions(statements[-2])
+    # the orders filter moves to the scan, but customers are the
+    # null supplying side of a left join, so that filter stays put
+    assert str(leaves["orders"]) == str(statements[-2].where_clause.conditional.right)
+    assert leaves["customers"] is None
+    assert where is None
+
+    # filtering rows that feed an aggregate is left to the final select
+    leaves, where = leaf_conditions(statements[-1])
+    assert leaves["orders"] is None
+    assert where is not None
+
+    monkeypatch.setattr(CONFIG.optimizations, "predicate_pushdown", False)
+    leaves, where = leaf_conditions(statements[-2])
+    assert leaves["orders"] is None
+    assert where is not None
+
+
+def test_flatten_ctes_diamond():
+    from types import SimpleNamespace
+
+    from trilogy.core.query_processor import flatten_ctes
+
+    # each level reads the level below twice, so a naive walk visits
+    # the leaf 2 ** 40 times
+    node = SimpleNamespace(name="leaf", parent_ctes=[])
+    for level in range(40):
+        left = SimpleNamespace(name=f"left_{level}", parent_ctes=[node])
+        right = SimpleNamespace(name=f"right_{level}", parent_ctes=[node])
+        node = SimpleNamespace(name=f"join_{level}", parent_ctes=[left, right])
+    flattened = flatten_ctes(node)
+    assert len(flattened) == 121
+    positions = {cte.name: idx for idx, cte in enumerate(flattened)}
+    for cte in flattened:
+        for parent in cte.parent_ctes:
+            assert positions[parent.name] < positions[cte.name]
+
+
+def test_cte_deduplication_and_inlining():
+    from trilogy.core.optimization import deduplicate_ctes, inline_passthroughs
+    from trilogy.parser import parse
+
+    env, statements = parse(
+        """
+key order_id int;
+key customer_id int;
+property order_id.revenue float;
+property customer_id.name string;
+
+datasource orders (
+    order_id: order_id,
+    customer_id: customer_id,
+    revenue: revenue
+)
+grain (order_id)
+address orders;
+
+datasource customers (
+    customer_id: customer_id,
+    name: name
+)
+grain (customer_id)
+address customers;
+
+select order_id, name;
+select order_id, rank order_id by revenue desc -> revenue_rank;
+"""
+    )
+    query = process_query(statement=statements[-2], environment=env)
+    customers = next(
+        cte for cte in query.ctes if cte.source.datasources[0].identifier == "customers"
+    )
+    consumer = next(cte for cte in query.ctes if customers in cte.parent_ctes)
+    # a structural copy of the customer scan, read by the same consumer
+    duplicate = customers.model_copy(update={"name": "duplicate"})
+    consumer.parent_ctes = consumer.parent_ctes + [duplicate]
+    consumer.source_map["local.name"] = "duplicate"
+    ctes = deduplicate_ctes(query.base, query.ctes + [duplicate])
+    assert len(ctes) == len(query.ctes)
+    assert consumer.source_map["local.name"] == customers.name
+    assert [p.name for p in consumer.parent_ctes].count(customers.name) == 1
+
+    # the window is selected from directly, rather than through a copy
+    query = process_query(statement=statements[-1], environment=env)
+    assert len(query.ctes) == 2
+    assert "local.revenue_rank" in [c.address for c in query.base.output_columns]
+    assert inline_passthroughs(query.base, query.ctes) == (query.base, query.ctes)
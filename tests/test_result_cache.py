@@ -0,0 +1,111 @@
+from datetime import date
+
+from trilogy import Dialects, parse
+from trilogy.constants import ResultCacheConfig
+from trilogy.result_cache import ResultCache
+
+MODEL = """
+key sale_id int;
+key store_id int;
+property sale_id.sale_date date;
+property sale_id.amount float;
+property sale_id.sale_month <- month(sale_date);
+metric revenue <- sum(amount);
+metric sale_count <- count(sale_id);
+metric average_sale <- avg(amount);
+
+datasource sales (
+    sale_id: sale_id,
+    store_id: store_id,
+    sale_date: sale_date,
+    amount: amount,
+)
+grain (sale_id)
+address sales;
+"""
+
+
+def test_result_cache_rollup():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.result_cache = ResultCache()
+    executor.execute_raw_sql(
+        """create table sales as select * from (values
+        (1, 1, DATE '2024-01-01', 10.0), (2, 1, DATE '2024-01-02', 5.0),
+        (3, 2, DATE '2024-01-02', 7.0), (4, 2, DATE '2024-02-01', 3.0))
+        t(sale_id, store_id, sale_date, amount)"""
+    )
+    executor.parse_text(MODEL)
+    daily = """select store_id, sale_date, sale_month, revenue, sale_count
+    order by store_id asc, sale_date asc;"""
+    first = executor.execute_text(daily)[-1].fetchall()
+    assert executor.result_cache.stats.misses == 1
+
+    # with the warehouse table gone, only the cache can answer
+    executor.execute_raw_sql("alter table sales rename to archived_sales")
+    assert executor.execute_text(daily)[-1].fetchall() == first
+    assert executor.execute_text(
+        "select sale_month, revenue, sale_count order by sale_month asc;"
+    )[-1].fetchall() == [(1, 22.0, 3), (2, 3.0, 1)]
+    assert executor.execute_text("select revenue;")[-1].fetchall() == [(25.0,)]
+    assert executor.execute_text("select store_id, revenue where store_id = 2;")[
+        -1
+    ].fetchall() == [(2, 10.0)]
+    assert executor.result_cache.stats.hits == 4
+
+    # averages can't be recombined from the cached rows
+    executor.execute_raw_sql("alter table archived_sales rename to sales")
+    assert executor.execute_text(
+        "select store_id, average_sale order by store_id asc;"
+    )[-1].fetchall() == [(1, 7.5), (2, 5.0)]
+    assert executor.result_cache.stats.misses == 2
+
+
+def test_result_cache_non_additive():
+    executor = Dialects.DUCK_DB.default_executor()
+    executor.result_cache = ResultCache()
+    executor.execute_raw_sql(
+        """create table sales as select * from (values
+        (1, 1, DATE '2024-01-01', 10.0), (2, 1, DATE '2024-01-02', 5.0),
+        (3, 2, DATE '2024-01-02', 7.0), (4, 2, DATE '2024-02-01', 3.0))
+        t(sale_id, store_id, sale_date, amount)"""
+    )
+    executor.parse_text(MODEL)
+    stats = executor.result_cache.stats
+    executor.execute_text("select store_id, sale_date, revenue, average_sale;")
+    # averages at a coarser grain are recomputed, not read from the cache
+    assert executor.execute_text(
+        "select store_id, average_sale order by store_id asc;"
+    )[-1].fetchall() == [(1, 7.5), (2, 5.0)]
+    assert executor.execute_text("select average_sale;")[-1].fetchall() == [(6.25,)]
+    assert (stats.hits, stats.misses) == (0, 3)
+
+    # at the cached grain the rows answer as stored
+    executor.execute_raw_sql("alter table sales rename to archived_sales")
+    assert executor.execute_text(
+        "select store_id, sale_date, average_sale order by store_id asc, sale_date asc;"
+    )[-1].fetchall()[:2] == [(1, date(2024, 1, 1), 10.0), (1, date(2024, 1, 2), 5.0)]
+    assert stats.hits == 1
+
+
+def test_result_cache_eviction():
+    env, statements = parse(
+        MODEL
+        + """
+select store_id, revenue;
+select sale_date, revenue;
+select store_id, sale_count;
+"""
+    )
+    cache = ResultCache(ResultCacheConfig(max_size=2))
+    first, second, third = statements[-3:]
+    cache.put(env, first, ["store_id", "revenue"], [(1, 15.0)])
+    cache.put(env, second, ["sale_date", "revenue"], [])
+    assert cache.get(env, first) == (["store_id", "revenue"], [(1, 15.0)])
+    # second is now least recently used
+    cache.put(env, third, ["store_id", "sale_count"], [(1, 2)])
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    # any change to the environment invalidates every entry
+    env.parse("property sale_id.tax float;")
+    assert cache.get(env, first) is None
+    assert len(cache) == 0
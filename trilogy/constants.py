@@ -1,6 +1,7 @@
 from logging import getLogger
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+import os
 
 logger = getLogger("preql")
 
@@ -18,11 +19,83 @@ class MagicConstants(Enum):
 NULL_VALUE = MagicConstants.NULL
 
 
+class ParserMode(Enum):
+    # LALR with earley fallback
+    LALR = "lalr"
+    EARLEY = "earley"
+
+
+class GraphBackend(Enum):
+    # integer node ids with compressed sparse row adjacency
+    COMPACT = "compact"
+    NETWORKX = "networkx"
+
+
+@dataclass
+class QueryCacheConfig:
+    enabled: bool = True
+    max_size: int = 256
+    # seconds an entry stays valid; None for no expiry
+    ttl: float | None = 600
+
+
+@dataclass
+class PlanCacheConfig:
+    enabled: bool = True
+    max_size: int = 256
+
+
+@dataclass
+class ResultCacheConfig:
+    enabled: bool = False
+    # duckdb database file holding cached results; in memory if unset
+    path: str | None = None
+    max_size: int = 64
+    # larger results are not cached
+    max_rows: int = 100_000
+    # seconds an entry stays valid; None for no expiry
+    ttl: float | None = 600
+
+
+@dataclass
+class Optimizations:
+    # merge CTEs that compute the same rows
+    deduplication: bool = True
+    # read through CTEs that only select columns of their parent
+    inline_passthroughs: bool = True
+    # compute aggregates over the same rows and grain in one CTE
+    aggregate_fusion: bool = True
+    # compute windows and filters over the same rows in one CTE
+    projection_coalescing: bool = True
+    # drop CTE columns that nothing downstream reads
+    projection_pruning: bool = True
+    # apply where clauses and CTE conditions as close to the source as possible
+    predicate_pushdown: bool = True
+    # read only the shards of a sharded datasource a filter can match
+    partition_pruning: bool = True
+    # re-aggregate additive aggregates from datasources storing them at a finer grain
+    aggregate_navigation: bool = True
+
+
 # TODO: support loading from environments
 @dataclass
 class Config:
     strict_mode: bool = True
     human_identifiers: bool = True
+    # name CTEs from a hash of their structure, so identical queries
+    # compile to identical SQL; takes precedence over human identifiers
+    hashed_identifiers: bool = False
+    parser_mode: ParserMode = ParserMode.LALR
+    # storage for the reference graph the planner searches
+    graph_backend: GraphBackend = GraphBackend.NETWORKX
+    # directory for the on disk cache of parsed imports; disabled if unset
+    import_cache_path: str | None = field(
+        default_factory=lambda: os.environ.get("TRILOGY_IMPORT_CACHE")
+    )
+    query_cache: QueryCacheConfig = field(default_factory=QueryCacheConfig)
+    plan_cache: PlanCacheConfig = field(default_factory=PlanCacheConfig)
+    result_cache: ResultCacheConfig = field(default_factory=ResultCacheConfig)
+    optimizations: Optimizations = field(default_factory=Optimizations)
 
 
 CONFIG = Config()
@@ -1,37 +1,46 @@
 from trilogy.core.graph_models import (
-    ReferenceGraph,
+    AnyReferenceGraph,
     concept_to_node,
     datasource_to_node,
+    new_reference_graph,
 )
-from trilogy.core.models import Environment
+from trilogy.core.models import Concept, Datasource, Environment
 from trilogy.core.enums import PurposeLineage
 
 
+def add_concept_to_graph(g: AnyReferenceGraph, concept: Concept):
+    g.add_node(concept)
+    # if we have sources, recursively add them
+    if concept.sources:
+        node_name = concept_to_node(concept)
+        for source in concept.sources:
+            generic = source.with_default_grain()
+            g.add_edge(generic, node_name)
+            if concept.derivation == PurposeLineage.MERGE:
+                g.add_edge(node_name, generic)
+
+
+def add_datasource_to_graph(g: AnyReferenceGraph, dataset: Datasource):
+    node = datasource_to_node(dataset)
+    g.add_node(dataset, type="datasource", datasource=dataset)
+    for concept in dataset.concepts:
+        g.add_edge(node, concept)
+        g.add_edge(concept, node)
+        # if there is a key on a table at a different grain
+        # add an FK edge to the canonical source, if it exists
+        # for example, order ID on order product table
+        g.add_edge(concept, concept.with_default_grain())
+        g.add_edge(concept.with_default_grain(), concept)
+
+
 def generate_graph(
     environment: Environment,
-) -> ReferenceGraph:
-    g = ReferenceGraph()
+) -> AnyReferenceGraph:
+    g = new_reference_graph()
 
     # add all parsed concepts
     for _, concept in environment.concepts.items():
-        g.add_node(concept)
-        # if we have sources, recursively add them
-        if concept.sources:
-            node_name = concept_to_node(concept)
-            for source in concept.sources:
-                generic = source.with_default_grain()
-                g.add_edge(generic, node_name)
-                if concept.derivation == PurposeLineage.MERGE:
-                    g.add_edge(node_name, generic)
+        add_concept_to_graph(g, concept)
     for _, dataset in environment.datasources.items():
-        node = datasource_to_node(dataset)
-        g.add_node(dataset, type="datasource", datasource=dataset)
-        for concept in dataset.concepts:
-            g.add_edge(node, concept)
-            g.add_edge(concept, node)
-            # if there is a key on a table at a different grain
-            # add an FK edge to the canonical source, if it exists
-            # for example, order ID on order product table
-            g.add_edge(concept, concept.with_default_grain())
-            g.add_edge(concept.with_default_grain(), concept)
+        add_datasource_to_graph(g, dataset)
     return g
@@ -1,5 +1,11 @@
+import sys
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Iterator
+
 import networkx as nx
 
+from trilogy.constants import CONFIG, GraphBackend
 from trilogy.core.models import Concept, Datasource
 
 
@@ -17,39 +23,361 @@ def datasource_to_node(input: Datasource) -> str:
     return f"ds~{input.namespace}.{input.identifier}"
 
 
+def reference_node(node_for_adding, attr: dict) -> str:
+    """Node name for a concept, datasource or plain name; concepts and
+    datasources also set the attributes the planner reads back."""
+    if isinstance(node_for_adding, Concept):
+        attr["type"] = "concept"
+        attr["concept"] = node_for_adding
+        attr["grain"] = node_for_adding.grain
+        return concept_to_node(node_for_adding)
+    elif isinstance(node_for_adding, Datasource):
+        attr["type"] = "datasource"
+        attr["ds"] = node_for_adding
+        attr["grain"] = node_for_adding.grain
+        return datasource_to_node(node_for_adding)
+    return node_for_adding
+
+
+def edge_node(graph, node) -> str:
+    """Node name for one end of an edge, adding concepts not yet in the
+    graph with their attributes."""
+    if isinstance(node, Concept):
+        name = concept_to_node(node)
+        if name not in graph.nodes:
+            graph.add_node(node)
+        return name
+    elif isinstance(node, Datasource):
+        return datasource_to_node(node)
+    return node
+
+
 class ReferenceGraph(nx.DiGraph):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def add_node(self, node_for_adding, **attr):
-        if isinstance(node_for_adding, Concept):
-            node_name = concept_to_node(node_for_adding)
-            attr["type"] = "concept"
-            attr["concept"] = node_for_adding
-            attr["grain"] = node_for_adding.grain
-        elif isinstance(node_for_adding, Datasource):
-            node_name = datasource_to_node(node_for_adding)
-            attr["type"] = "datasource"
-            attr["ds"] = node_for_adding
-            attr["grain"] = node_for_adding.grain
-        else:
-            node_name = node_for_adding
-        super().add_node(node_name, **attr)
+        super().add_node(reference_node(node_for_adding, attr), **attr)
 
     def add_edge(self, u_of_edge, v_of_edge, **attr):
-        if isinstance(u_of_edge, Concept):
-            orig = u_of_edge
-            u_of_edge = concept_to_node(u_of_edge)
-            if u_of_edge not in self.nodes:
-                self.add_node(orig)
-        elif isinstance(u_of_edge, Datasource):
-            u_of_edge = datasource_to_node(u_of_edge)
-
-        if isinstance(v_of_edge, Concept):
-            orig = v_of_edge
-            v_of_edge = concept_to_node(v_of_edge)
-            if v_of_edge not in self.nodes:
-                self.add_node(orig)
-        elif isinstance(v_of_edge, Datasource):
-            v_of_edge = datasource_to_node(v_of_edge)
-        super().add_edge(u_of_edge, v_of_edge, **attr)
+        super().add_edge(edge_node(self, u_of_edge), edge_node(self, v_of_edge), **attr)
+
+
+class NodeView:
+    """The parts of the networkx node view the planner uses: membership,
+    iteration in insertion order and attribute lookup by name."""
+
+    def __init__(self, graph: "CompactGraph"):
+        self._graph = graph
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._graph._names)
+
+    def __len__(self) -> int:
+        return len(self._graph._names)
+
+    def __contains__(self, node) -> bool:
+        return node in self._graph._ids
+
+    def __getitem__(self, node: str) -> dict[str, Any]:
+        return self._graph._attrs[self._graph._ids[node]]
+
+    def __call__(self, data: bool = False):
+        if data:
+            return zip(self._graph._names, self._graph._attrs)
+        return self
+
+
+class ParentTree:
+    """BFS tree of a compact graph, as the parent id of every node; reads
+    like the child -> parent dict of names JoinPathIndex builds otherwise."""
+
+    def __init__(self, graph: "CompactGraph", parents: list[int]):
+        self._graph = graph
+        self._parents = parents
+
+    def __contains__(self, node) -> bool:
+        idx = self._graph._ids.get(node)
+        return idx is not None and idx < len(self._parents) and self._parents[idx] >= 0
+
+    def __getitem__(self, node: str) -> str | None:
+        if node not in self:
+            raise KeyError(node)
+        idx = self._graph._ids[node]
+        parent = self._parents[idx]
+        return None if parent == idx else self._graph._names[parent]
+
+    def path(self, target: str) -> list[str]:
+        """Names from the root to a node in the tree."""
+        parents, names = self._parents, self._graph._names
+        idx = self._graph._ids[target]
+        path = [names[idx]]
+        parent = parents[idx]
+        while parent != idx:
+            idx = parent
+            path.append(names[idx])
+            parent = parents[idx]
+        path.reverse()
+        return path
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._parents)
+
+
+class CompactGraph:
+    """Graph over integer node ids, with adjacency held as compressed sparse
+    rows: the neighbors of node i are indices[indptr[i]:indptr[i + 1]], in
+    the order their edges were first added. Edges added since the rows were
+    last built are kept aside and merged in on the next read. Rows hold the
+    same int objects as the node index, so each edge costs one pointer.
+
+    Node names and attributes follow networkx, so the planner can use either;
+    to_networkx() exports a copy for anything else."""
+
+    def __init__(self, directed: bool = True):
+        self.directed = directed
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        self._attrs: list[dict[str, Any]] = []
+        self._indptr: list[int] = [0]
+        self._indices: list[int] = []
+        self._pending: defaultdict[int, list[int]] = defaultdict(list)
+
+    def __contains__(self, node) -> bool:
+        return node in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def nodes(self) -> NodeView:
+        return NodeView(self)
+
+    @property
+    def edges(self) -> Iterator[tuple[str, str]]:
+        names = self._names
+        for node in range(len(names)):
+            for child in self._row(node):
+                if self.directed or node <= child:
+                    yield names[node], names[child]
+
+    def is_directed(self) -> bool:
+        return self.directed
+
+    def _id(self, node: str) -> int:
+        idx = self._ids.get(node)
+        if idx is None:
+            idx = len(self._names)
+            self._ids[node] = idx
+            self._names.append(node)
+            self._attrs.append({})
+        return idx
+
+    def add_node(self, node_for_adding: str, **attr):
+        self._attrs[self._id(node_for_adding)].update(attr)
+
+    def add_edge(self, u_of_edge: str, v_of_edge: str):
+        u = self._id(u_of_edge)
+        v = self._id(v_of_edge)
+        self._pending[u].append(v)
+        if not self.directed:
+            self._pending[v].append(u)
+
+    def _compact(self):
+        if not self._pending:
+            return
+        indptr, indices = self._indptr, self._indices
+        rows = len(indptr) - 1
+        new_indptr = [0]
+        new_indices: list[int] = []
+        for node in range(len(self._names)):
+            row = indices[indptr[node] : indptr[node + 1]] if node < rows else ()
+            added = self._pending.get(node)
+            if added:
+                # keeps the first occurrence of each edge, in order
+                row = dict.fromkeys([*row, *added])
+            new_indices.extend(row)
+            new_indptr.append(len(new_indices))
+        self._indptr, self._indices = new_indptr, new_indices
+        self._pending = defaultdict(list)
+
+    def _row(self, idx: int) -> list[int]:
+        self._compact()
+        return self._indices[self._indptr[idx] : self._indptr[idx + 1]]
+
+    def successors(self, node: str) -> list[str]:
+        names = self._names
+        return [names[child] for child in self._row(self._ids[node])]
+
+    neighbors = successors
+
+    def bfs_tree(self, source: str) -> ParentTree:
+        """Breadth first search from source, a level at a time over the
+        rows; ties go to the earliest added edge, as in networkx."""
+        self._compact()
+        indptr, indices = self._indptr, self._indices
+        root = self._ids[source]
+        parents = [-1] * len(self._names)
+        parents[root] = root
+        frontier = [root]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for child in indices[indptr[node] : indptr[node + 1]]:
+                    if parents[child] < 0:
+                        parents[child] = node
+                        next_frontier.append(child)
+            frontier = next_frontier
+        return ParentTree(self, parents)
+
+    def connected_components(self) -> list[set[str]]:
+        """Node names of each component of an undirected graph, ordered by
+        their first node."""
+        self._compact()
+        indptr, indices, names = self._indptr, self._indices, self._names
+        seen = bytearray(len(names))
+        components = []
+        for root in range(len(names)):
+            if seen[root]:
+                continue
+            seen[root] = 1
+            component = [root]
+            for node in component:
+                for child in indices[indptr[node] : indptr[node + 1]]:
+                    if not seen[child]:
+                        seen[child] = 1
+                        component.append(child)
+            components.append({names[idx] for idx in component})
+        return components
+
+    def _empty_networkx(self) -> nx.Graph:
+        return nx.DiGraph() if self.directed else nx.Graph()
+
+    def to_networkx(self) -> nx.Graph:
+        """Copy of the graph in networkx, for debugging and drawing."""
+        graph = self._empty_networkx()
+        for name, attrs in zip(self._names, self._attrs):
+            graph.add_node(name, **attrs)
+        graph.add_edges_from(self.edges)
+        return graph
+
+    @property
+    def memory_size(self) -> int:
+        """Approximate bytes held by the adjacency rows and node index;
+        node names, attributes and the objects they hold are not counted."""
+        return (
+            sys.getsizeof(self._indptr)
+            + sys.getsizeof(self._indices)
+            + sys.getsizeof(self._ids)
+            + sys.getsizeof(self._names)
+        )
+
+
+class CompactReferenceGraph(CompactGraph):
+    """ReferenceGraph on the compact backend."""
+
+    def __init__(self):
+        super().__init__(directed=True)
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(reference_node(node_for_adding, attr), **attr)
+
+    def add_edge(self, u_of_edge, v_of_edge):
+        super().add_edge(edge_node(self, u_of_edge), edge_node(self, v_of_edge))
+
+    def _empty_networkx(self) -> nx.Graph:
+        return ReferenceGraph()
+
+
+# either backend; the planner only uses the api they share
+AnyReferenceGraph = ReferenceGraph | CompactReferenceGraph
+
+
+def new_reference_graph() -> AnyReferenceGraph:
+    if CONFIG.graph_backend == GraphBackend.COMPACT:
+        return CompactReferenceGraph()
+    return ReferenceGraph()
+
+
+class JoinPathIndex:
+    """Shortest paths from datasource nodes over a reference graph.
+
+    Each source gets a BFS tree, stored as a child -> parent map (or, on
+    the compact backend, a parent id per node), built on first lookup; paths are then read back from the tree rather than
+    searched for. The index is only valid for the graph as it was when the
+    trees were built."""
+
+    def __init__(self, graph: nx.DiGraph | CompactGraph):
+        self.graph = graph
+        self.build_time: float = 0.0
+        self._trees: dict[str, dict[str, str | None] | ParentTree] = {}
+
+    @staticmethod
+    def _bfs(graph: nx.DiGraph, source: str) -> dict[str, str | None]:
+        adjacency = graph._adj
+        tree: dict[str, str | None] = {source: None}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for child in adjacency[node]:
+                    if child not in tree:
+                        tree[child] = node
+                        next_frontier.append(child)
+            frontier = next_frontier
+        return tree
+
+    def _tree(self, source: str) -> dict[str, str | None] | ParentTree:
+        tree = self._trees.get(source)
+        if tree is not None:
+            return tree
+        start = perf_counter()
+        if isinstance(self.graph, CompactGraph):
+            tree = self.graph.bfs_tree(source)
+        else:
+            tree = self._bfs(self.graph, source)
+        self._trees[source] = tree
+        self.build_time += perf_counter() - start
+        return tree
+
+    def build(self) -> "JoinPathIndex":
+        """Eagerly build the trees for every datasource node."""
+        for node, attrs in self.graph.nodes(data=True):
+            if attrs.get("type") == "datasource":
+                self._tree(node)
+        return self
+
+    def shortest_path(self, source: str, target: str) -> list[str]:
+        """Drop in for nx.shortest_path between two nodes, raising the same
+        exceptions."""
+        for node in (source, target):
+            if node not in self.graph:
+                raise nx.NodeNotFound(
+                    f"Either source {source} or target {target} is not in G"
+                )
+        tree = self._tree(source)
+        if target not in tree:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        if isinstance(tree, ParentTree):
+            return tree.path(target)
+        path = [target]
+        parent = tree[target]
+        while parent is not None:
+            path.append(parent)
+            parent = tree[parent]
+        path.reverse()
+        return path
+
+    @property
+    def memory_size(self) -> int:
+        """Approximate bytes held by the index; node names are shared
+        with the graph and not counted."""
+        return sys.getsizeof(self._trees) + sum(
+            sys.getsizeof(tree) for tree in self._trees.values()
+        )
+
+    def __len__(self) -> int:
+        return len(self._trees)
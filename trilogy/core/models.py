@@ -1,6 +1,7 @@
 from __future__ import annotations
 import difflib
 import os
+from contextlib import contextmanager
 from enum import Enum
 from typing import (
     Dict,
@@ -19,6 +20,7 @@ from typing import (
     Tuple,
     Type,
     ItemsView,
+    Iterator,
 )
 from pydantic_core import core_schema
 from pydantic.functional_validators import PlainValidator
@@ -56,7 +58,7 @@ from trilogy.core.enums import (
 )
 from trilogy.core.exceptions import UndefinedConceptException, InvalidSyntaxException
 from trilogy.utility import unique
-from collections import UserList
+from collections import UserList, defaultdict
 from trilogy.utility import string_to_hash
 from functools import cached_property
 from abc import ABC
@@ -272,10 +274,25 @@ class Concept(Namespaced, SelectGrain, BaseModel):
     keys: Optional[Tuple["Concept", ...]] = None
     grain: "Grain" = Field(default=None, validate_default=True)
     modifiers: Optional[List[Modifier]] = Field(default_factory=list)
+    # frozen, so everything derived from the fields can be computed once
+    model_config = ConfigDict(frozen=True)
 
     def __hash__(self):
+        return self._hash
+
+    @cached_property
+    def _hash(self) -> int:
         return hash(str(self))
 
+    def __getstate__(self):
+        # cached values are rebuilt on demand; string hashes in
+        # particular don't carry over to another process
+        state = super().__getstate__()
+        state["__dict__"] = {
+            k: v for k, v in state["__dict__"].items() if k in type(self).model_fields
+        }
+        return state
+
     @field_validator("keys", mode="before")
     @classmethod
     def keys_validator(cls, v, info: ValidationInfo):
@@ -352,6 +369,10 @@ class Concept(Namespaced, SelectGrain, BaseModel):
         )
 
     def __str__(self):
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         grain = ",".join([str(c.address) for c in self.grain.components])
         return f"{self.namespace}.{self.name}<{grain}>"
 
@@ -375,12 +396,28 @@ class Concept(Namespaced, SelectGrain, BaseModel):
     def grain_components(self) -> List["Concept"]:
         return self.grain.components_copy if self.grain else []
 
+    def _derive(self, **fields) -> "Concept":
+        """A variant of this concept that skips validation, as every
+        field is either copied from it or already validated."""
+        values = {name: getattr(self, name) for name in type(self).model_fields}
+        values.update(fields)
+        lineage = values["lineage"]
+        # mirror the grain validator
+        if isinstance(lineage, AggregateWrapper) and lineage.by:
+            values["grain"] = Grain(components=lineage.by)
+        return self.__class__.model_construct(**values)
+
     def with_namespace(self, namespace: str) -> "Concept":
-        return self.__class__(
-            name=self.name,
-            datatype=self.datatype,
-            purpose=self.purpose,
-            metadata=self.metadata,
+        if namespace not in self._namespace_variants:
+            self._namespace_variants[namespace] = self._build_with_namespace(namespace)
+        return self._namespace_variants[namespace]
+
+    @cached_property
+    def _namespace_variants(self) -> dict[str, "Concept"]:
+        return {}
+
+    def _build_with_namespace(self, namespace: str) -> "Concept":
+        return self._derive(
             lineage=self.lineage.with_namespace(namespace) if self.lineage else None,
             grain=(
                 self.grain.with_namespace(namespace)
@@ -399,7 +436,6 @@ class Concept(Namespaced, SelectGrain, BaseModel):
                 if self.keys
                 else None
             ),
-            modifiers=self.modifiers,
         )
 
     def with_select_grain(self, grain: Optional["Grain"] = None) -> "Concept":
@@ -424,17 +460,18 @@ class Concept(Namespaced, SelectGrain, BaseModel):
     def with_grain(self, grain: Optional["Grain"] = None) -> "Concept":
         if not all([isinstance(x, Concept) for x in self.keys or []]):
             raise ValueError(f"Invalid keys {self.keys} for concept {self.address}")
-        return self.__class__(
-            name=self.name,
-            datatype=self.datatype,
-            purpose=self.purpose,
-            metadata=self.metadata,
-            lineage=self.lineage,
-            grain=grain if grain else Grain(components=[]),
-            namespace=self.namespace,
-            keys=self.keys,
-            modifiers=self.modifiers,
-        )
+        grain = grain if grain else Grain(components=[])
+        if isinstance(grain, Concept):
+            grain = Grain(components=[grain])
+        # concepts compare grains by address, so variants can be shared
+        key = (grain.nested, tuple(sorted(grain.set)))
+        if key not in self._grain_variants:
+            self._grain_variants[key] = self._derive(grain=grain)
+        return self._grain_variants[key]
+
+    @cached_property
+    def _grain_variants(self) -> dict[tuple, "Concept"]:
+        return {}
 
     @cached_property
     def _with_default_grain(self) -> "Concept":
@@ -462,33 +499,27 @@ class Concept(Namespaced, SelectGrain, BaseModel):
                 grain = self.grain
         else:
             grain = self.grain  # type: ignore
-        return self.__class__(
-            name=self.name,
-            datatype=self.datatype,
-            purpose=self.purpose,
-            metadata=self.metadata,
-            lineage=self.lineage,
-            grain=grain,
-            keys=self.keys,
-            namespace=self.namespace,
-            modifiers=self.modifiers,
-        )
+        return self.with_grain(grain)
 
     def with_default_grain(self) -> "Concept":
         return self._with_default_grain
 
     @property
     def sources(self) -> List["Concept"]:
+        return [*self._sources]
+
+    @cached_property
+    def _sources(self) -> tuple["Concept", ...]:
         if self.lineage:
-            output = []
+            output: list[Concept] = []
             for item in self.lineage.arguments:
                 if isinstance(item, Concept):
                     if item.address == self.address:
                         raise SyntaxError(f"Concept {self.address} references itself")
                     output.append(item)
-                    output += item.sources
-            return output
-        return []
+                    output += item._sources
+            return tuple(output)
+        return tuple()
 
     @property
     def concept_arguments(self) -> List[Concept]:
@@ -498,7 +529,7 @@ class Concept(Namespaced, SelectGrain, BaseModel):
     def input(self):
         return [self] + self.sources
 
-    @property
+    @cached_property
     def derivation(self) -> PurposeLineage:
         if self.lineage and isinstance(self.lineage, WindowItem):
             return PurposeLineage.WINDOW
@@ -539,7 +570,7 @@ class Concept(Namespaced, SelectGrain, BaseModel):
             return PurposeLineage.CONSTANT
         return PurposeLineage.ROOT
 
-    @property
+    @cached_property
     def granularity(self) -> Granularity:
         """ "used to determine if concepts need to be included in grain
         calculations"""
@@ -582,15 +613,22 @@ class Grain(BaseModel):
             )
         else:
             v2 = unique(v, "address")
+        by_address = {c.address: c for c in v2}
         final = []
         for sub in v2:
             if sub.purpose in (Purpose.PROPERTY, Purpose.METRIC) and sub.keys:
-                if all([c in v2 for c in sub.keys]):
+                if all([by_address.get(c.address) == c for c in sub.keys]):
                     continue
             final.append(sub)
         v2 = sorted(final, key=lambda x: x.name)
         return v2
 
+    @classmethod
+    def trusted(cls, components: List[Concept], nested: bool = False) -> "Grain":
+        """Grain over components that already satisfy the validator:
+        unique, at their default grain unless nested, and sorted."""
+        return cls.model_construct(components=components, nested=nested)
+
     @property
     def components_copy(self) -> List[Concept]:
         return [*self.components]
@@ -603,8 +641,9 @@ class Grain(BaseModel):
         return "Grain<" + ",".join([c.address for c in self.components]) + ">"
 
     def with_namespace(self, namespace: str) -> "Grain":
-        return Grain(
-            components=[c.with_namespace(namespace) for c in self.components],
+        # renaming every component keeps them valid and in order
+        return Grain.trusted(
+            [c.with_namespace(namespace) for c in self.components],
             nested=self.nested,
         )
 
@@ -642,26 +681,37 @@ class Grain(BaseModel):
     def intersection(self, other: "Grain") -> "Grain":
         intersection = self.set.intersection(other.set)
         components = [i for i in self.components if i.address in intersection]
-        return Grain(components=components)
+        if self.nested:
+            return Grain(components=components)
+        return Grain.trusted(components)
 
     def __add__(self, other: "Grain") -> "Grain":
         components: List[Concept] = []
-        for clist in [self.components_copy, other.components_copy]:
+        # membership by equality, checking only concepts at the same address
+        seen: dict[str, list[Concept]] = defaultdict(list)
+        for clist in [self.components, other.components]:
             for component in clist:
-                if component.with_default_grain() in components:
+                default = component.with_default_grain()
+                if any(c == default for c in seen[default.address]):
                     continue
-                components.append(component.with_default_grain())
+                components.append(default)
+                seen[default.address].append(default)
         base_components = [c for c in components if c.purpose == Purpose.KEY]
+        base: dict[str, list[Concept]] = defaultdict(list)
+        for c in base_components:
+            base[c.address].append(c)
         for c in components:
-            if c.purpose == Purpose.PROPERTY and not any(
-                [key in base_components for key in (c.keys or [])]
-            ):
-                base_components.append(c)
-            elif (
+            if (
+                c.purpose == Purpose.PROPERTY
+                and not any(
+                    [any(b == key for b in base[key.address]) for key in (c.keys or [])]
+                )
+            ) or (
                 c.purpose == Purpose.CONSTANT
                 and not c.derivation == PurposeLineage.CONSTANT
             ):
                 base_components.append(c)
+                base[c.address].append(c)
         return Grain(components=base_components)
 
     def __radd__(self, other) -> "Grain":
@@ -944,9 +994,19 @@ class ConceptTransform(Namespaced, BaseModel):
             keys=self.output.keys,
         )
         new_parent = FilterItem(content=new_parent_concept, where=where)
-        self.output.lineage = new_parent
+        output = Concept(
+            name=self.output.name,
+            datatype=self.output.datatype,
+            purpose=self.output.purpose,
+            metadata=self.output.metadata,
+            lineage=new_parent,
+            namespace=self.output.namespace,
+            grain=self.output.grain,
+            keys=self.output.keys,
+            modifiers=self.output.modifiers,
+        )
         return ConceptTransform(
-            function=new_parent, output=self.output, modifiers=self.modifiers
+            function=new_parent, output=output, modifiers=self.modifiers
         )
 
 
@@ -1219,9 +1279,11 @@ class SelectStatement(Namespaced, BaseModel):
         address: Address,
         grain: Grain | None = None,
     ) -> Datasource:
+        # a filtered select only holds some of the values of each column
+        modifiers = [Modifier.PARTIAL] if self.where_clause else []
         columns = [
-            # TODO: replace hardcoded replacement here
-            ColumnAssignment(alias=c.address.replace(".", "_"), concept=c)
+            # match the column names the persisted select renders
+            ColumnAssignment(alias=c.safe_address, concept=c, modifiers=modifiers)
             for c in self.output_components
         ]
         new_datasource = Datasource(
@@ -1462,9 +1524,68 @@ def safe_grain(v) -> Grain:
         raise ValueError(f"Invalid input type to safe_grain {type(v)}")
 
 
+class Shard(BaseModel):
+    """A table holding the rows of a sharded datasource for a single
+    value of its partition field."""
+
+    value: Union[int, float, bool, str]
+    address: Address
+
+
+def shard_location(shards: List[Shard]) -> str:
+    if len(shards) == 1:
+        return shards[0].address.location
+    unions = " UNION ALL ".join(
+        f"SELECT * FROM {shard.address.location}" for shard in shards
+    )
+    return f"({unions})"
+
+
+class DatasourceStatistics(BaseModel):
+    """Table statistics used to estimate the cost of reading a datasource.
+    Distinct counts are keyed by concept address."""
+
+    row_count: Optional[int] = None
+    bytes: Optional[int] = None
+    distinct_counts: Dict[str, int] = Field(default_factory=dict)
+
+    def with_namespace(self, namespace: str) -> "DatasourceStatistics":
+        distinct_counts = {}
+        for address, count in self.distinct_counts.items():
+            concept_namespace, name = address.rsplit(".", 1)
+            if concept_namespace not in (DEFAULT_NAMESPACE, namespace):
+                concept_namespace = namespace + "." + concept_namespace
+            else:
+                concept_namespace = namespace
+            distinct_counts[f"{concept_namespace}.{name}"] = count
+        return DatasourceStatistics(
+            row_count=self.row_count,
+            bytes=self.bytes,
+            distinct_counts=distinct_counts,
+        )
+
+
 class DatasourceMetadata(BaseModel):
     freshness_concept: Concept | None
     partition_fields: List[Concept] = Field(default_factory=list)
+    shards: List[Shard] = Field(default_factory=list)
+    statistics: Optional[DatasourceStatistics] = None
+
+    def with_namespace(self, namespace: str) -> "DatasourceMetadata":
+        return DatasourceMetadata(
+            freshness_concept=(
+                self.freshness_concept.with_namespace(namespace)
+                if self.freshness_concept
+                else None
+            ),
+            partition_fields=[
+                c.with_namespace(namespace) for c in self.partition_fields
+            ],
+            shards=self.shards,
+            statistics=(
+                self.statistics.with_namespace(namespace) if self.statistics else None
+            ),
+        )
 
 
 class MergeStatement(Namespaced, BaseModel):
@@ -1587,8 +1708,28 @@ class Datasource(Namespaced, BaseModel):
             grain=self.grain.with_namespace(namespace),
             address=self.address,
             columns=[c.with_namespace(namespace) for c in self.columns],
+            metadata=self.metadata.with_namespace(namespace),
         )
 
+    def with_shards(self, shards: List[Shard]) -> "Datasource":
+        """A copy of a sharded datasource that reads only the given shards."""
+        return Datasource(
+            identifier=self.identifier,
+            namespace=self.namespace,
+            grain=self.grain,
+            address=Address(location=shard_location(shards)),
+            columns=self.columns,
+            metadata=self.metadata.model_copy(update={"shards": shards}),
+        )
+
+    @property
+    def partition_fields(self) -> List[Concept]:
+        return self.metadata.partition_fields
+
+    @property
+    def statistics(self) -> Optional[DatasourceStatistics]:
+        return self.metadata.statistics
+
     @cached_property
     def concepts(self) -> List[Concept]:
         return [c.concept for c in self.columns]
@@ -1902,7 +2043,7 @@ class QueryDatasource(BaseModel):
 
     @property
     def identifier(self) -> str:
-        filters = abs(hash(str(self.condition))) if self.condition else ""
+        filters = string_to_hash(str(self.condition)) if self.condition else ""
         grain = "_".join(
             [str(c.address).replace(".", "_") for c in self.grain.components]
         )
@@ -2235,7 +2376,55 @@ class UndefinedConcept(Concept):
         )
 
 
-class EnvironmentConceptDict(dict):
+def identical_concepts(left: Concept, right: Concept) -> bool:
+    """Strict equality, including lineage and metadata; Concept.__eq__
+    only compares identity fields."""
+    return left is right or (
+        type(left) is type(right) and BaseModel.__eq__(left, right)
+    )
+
+
+class RevisionedDict(dict):
+    """Dict that counts mutations, so derived structures
+    can tell if they are stale."""
+
+    # class default, as unpickling sets items before instance state
+    revision: int = 0
+
+    def __setitem__(self, key, value):
+        self.revision += 1
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.revision += 1
+        super().__delitem__(key)
+
+    def pop(self, *args):
+        self.revision += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.revision += 1
+        return super().popitem()
+
+    def clear(self):
+        self.revision += 1
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        self.revision += 1
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self.revision += 1
+        return super().setdefault(key, default)
+
+
+class EnvironmentDatasourceDict(RevisionedDict):
+    pass
+
+
+class EnvironmentConceptDict(RevisionedDict):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(self, *args, **kwargs)
         self.undefined: dict[str, UndefinedConcept] = {}
@@ -2312,13 +2501,29 @@ def validate_concepts(v) -> EnvironmentConceptDict:
     raise ValueError
 
 
+def validate_datasources(v) -> EnvironmentDatasourceDict:
+    if isinstance(v, EnvironmentDatasourceDict):
+        return v
+    elif isinstance(v, dict):
+        return EnvironmentDatasourceDict(
+            **{x: Datasource.model_validate(y) for x, y in v.items()}
+        )
+    raise ValueError
+
+
+# private environment attributes that are not derived from its contents
+PICKLED_ENVIRONMENT_STATE = {"_parse_count", "_bulk_depth", "_pending_derivations"}
+
+
 class Environment(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True, strict=False)
 
     concepts: Annotated[EnvironmentConceptDict, PlainValidator(validate_concepts)] = (
         Field(default_factory=EnvironmentConceptDict)
     )
-    datasources: Dict[str, Datasource] = Field(default_factory=dict)
+    datasources: Annotated[
+        EnvironmentDatasourceDict, PlainValidator(validate_datasources)
+    ] = Field(default_factory=EnvironmentDatasourceDict)
     functions: Dict[str, Function] = Field(default_factory=dict)
     data_types: Dict[str, DataType] = Field(default_factory=dict)
     imports: Dict[str, ImportStatement] = Field(default_factory=dict)
@@ -2326,10 +2531,210 @@ class Environment(BaseModel):
     working_path: str | Path = Field(default_factory=lambda: os.getcwd())
     environment_config: EnvironmentOptions = Field(default_factory=EnvironmentOptions)
     version: str = Field(default_factory=get_version)
+    # unused; CTE names are now scoped to each query
     cte_name_map: Dict[str, str] = Field(default_factory=dict)
 
-    materialized_concepts: List[Concept] = Field(default_factory=list)
     _parse_count: int = 0
+    _graph: Any = None
+    _graph_revision: Any = None
+    _join_paths: Any = None
+    _join_paths_revision: Any = None
+    _caches: Any = None
+    _caches_revision: Any = None
+    _plan_cache: Any = None
+    # address -> number of datasources that bind it
+    _bound_addresses: Any = None
+    # address -> keys of concepts with that address
+    _concept_keys: Any = None
+    # concept key -> concept, for concepts bound to a datasource
+    _materialized: Any = None
+    _materialized_list: Any = None
+    _materialized_revision: Any = None
+    _bulk_depth: int = 0
+    _pending_derivations: Any = None
+
+    def __getstate__(self):
+        # planner caches and indexes are rebuilt on demand, and are keyed
+        # on object ids that don't survive a round trip anyway
+        state = super().__getstate__()
+        private = state.get("__pydantic_private__")
+        if private:
+            state["__pydantic_private__"] = {
+                k: v if k in PICKLED_ENVIRONMENT_STATE else None
+                for k, v in private.items()
+            }
+        return state
+
+    @property
+    def revision(self) -> tuple[int, int, int, int] | None:
+        """Changes whenever concepts or datasources are added, replaced or
+        removed. None if either has been swapped for an untracked dict."""
+        concepts = self.concepts
+        datasources = self.datasources
+        if not isinstance(concepts, RevisionedDict) or not isinstance(
+            datasources, RevisionedDict
+        ):
+            return None
+        return (id(concepts), concepts.revision, id(datasources), datasources.revision)
+
+    @property
+    def graph(self):
+        """Reference graph of the environment, rebuilt only when stale."""
+        from trilogy.core.env_processor import generate_graph
+
+        revision = self.revision
+        if self._graph is None or revision is None or revision != self._graph_revision:
+            self._graph = generate_graph(self)
+            self._graph_revision = revision
+        return self._graph
+
+    def revision_cache(self, name: str) -> dict:
+        """Named scratch dict for values derived from the environment;
+        all are cleared whenever the environment changes."""
+        revision = self.revision
+        if (
+            self._caches is None
+            or revision is None
+            or revision != self._caches_revision
+        ):
+            self._caches = {}
+            self._caches_revision = revision
+        return self._caches.setdefault(name, {})
+
+    @property
+    def plan_cache(self):
+        """Resolved plans shared by every statement planned against
+        this environment."""
+        from trilogy.core.processing.plan_cache import PlanCache
+
+        if self._plan_cache is None:
+            self._plan_cache = PlanCache()
+        return self._plan_cache
+
+    def join_path_index(self, graph=None):
+        """Join path index over the environment graph (or a supplied graph),
+        reused until the environment changes."""
+        from trilogy.core.graph_models import JoinPathIndex
+
+        graph = self.graph if graph is None else graph
+        revision = self.revision
+        index = self._join_paths
+        if (
+            index is None
+            or index.graph is not graph
+            or revision is None
+            or revision != self._join_paths_revision
+        ):
+            index = JoinPathIndex(graph)
+            self._join_paths = index
+            self._join_paths_revision = revision
+        return index
+
+    @property
+    def materialized_concepts(self) -> List[Concept]:
+        """Concepts bound to at least one datasource."""
+        revision = self.revision
+        if (
+            self._materialized is None
+            or revision is None
+            or revision != self._materialized_revision
+        ):
+            self.gen_materialized_concepts()
+        if self._materialized_list is None:
+            self._materialized_list = list(self._materialized.values())
+        return self._materialized_list
+
+    def _graph_is_current(self) -> bool:
+        return self._graph is not None and self._graph_revision == self.revision
+
+    def _materialized_is_current(self) -> bool:
+        return (
+            self._materialized is not None
+            and self._materialized_revision == self.revision
+        )
+
+    def _set_concept(self, key: str, concept: Concept):
+        existing = dict.get(self.concepts, key)
+        if existing is not None and identical_concepts(existing, concept):
+            # redeclaring an identical concept (such as an inline
+            # derivation in a repeated query) is not a change
+            return
+        graph_current = self._graph_is_current() and key not in self.concepts
+        materialized_current = self._materialized_is_current()
+        self.concepts[key] = concept
+        if graph_current:
+            from trilogy.core.env_processor import add_concept_to_graph
+
+            add_concept_to_graph(self._graph, concept)
+            self._graph_revision = self.revision
+        if materialized_current:
+            if existing is not None:
+                self._concept_keys.get(existing.address, set()).discard(key)
+                self._materialized.pop(key, None)
+            self._concept_keys.setdefault(concept.address, set()).add(key)
+            if concept.address in self._bound_addresses:
+                self._materialized[key] = concept
+            self._materialized_list = None
+            self._materialized_revision = self.revision
+
+    def _set_datasource(self, key: str, datasource: Datasource):
+        graph_current = self._graph_is_current() and key not in self.datasources
+        materialized_current = self._materialized_is_current()
+        existing = dict.get(self.datasources, key)
+        self.datasources[key] = datasource
+        if graph_current:
+            from trilogy.core.env_processor import add_datasource_to_graph
+
+            add_datasource_to_graph(self._graph, datasource)
+            self._graph_revision = self.revision
+        if materialized_current:
+            if existing is not None:
+                self._unbind(existing)
+            self._bind(datasource)
+            self._materialized_list = None
+            self._materialized_revision = self.revision
+
+    def _bind(self, datasource: Datasource):
+        for address in {c.address for c in datasource.output_concepts}:
+            count = self._bound_addresses.get(address, 0)
+            self._bound_addresses[address] = count + 1
+            if count:
+                continue
+            for key in self._concept_keys.get(address, ()):
+                self._materialized[key] = self.concepts[key]
+
+    def _unbind(self, datasource: Datasource):
+        for address in {c.address for c in datasource.output_concepts}:
+            count = self._bound_addresses.get(address, 0) - 1
+            if count > 0:
+                self._bound_addresses[address] = count
+                continue
+            self._bound_addresses.pop(address, None)
+            for key in self._concept_keys.get(address, ()):
+                self._materialized.pop(key, None)
+
+    @contextmanager
+    def bulk_load(self) -> Iterator["Environment"]:
+        """Defer generation of derived concepts (such as date parts)
+        until all concepts in the batch have been added."""
+        if self._pending_derivations is None:
+            self._pending_derivations = []
+        self._bulk_depth += 1
+        try:
+            yield self
+        except BaseException:
+            # a failed batch leaves nothing for the next one to derive
+            self._pending_derivations = []
+            raise
+        finally:
+            self._bulk_depth -= 1
+        if self._bulk_depth:
+            return
+        from trilogy.core.environment_helpers import generate_related_concepts
+
+        pending, self._pending_derivations = self._pending_derivations, []
+        for concept in pending:
+            generate_related_concepts(concept, self)
 
     @classmethod
     def from_file(cls, path: str | Path) -> "Environment":
@@ -2357,13 +2762,18 @@ class Environment(BaseModel):
         return ppath
 
     def gen_materialized_concepts(self) -> None:
-        concrete_addresses = set()
+        """Rebuild the materialized concept index from scratch; it is
+        otherwise maintained incrementally as concepts and datasources
+        are added."""
+        self._bound_addresses = {}
+        self._concept_keys = {}
+        self._materialized = {}
+        self._materialized_list = None
+        for key, concept in self.concepts.items():
+            self._concept_keys.setdefault(concept.address, set()).add(key)
         for datasource in self.datasources.values():
-            for concept in datasource.output_concepts:
-                concrete_addresses.add(concept.address)
-        self.materialized_concepts = [
-            c for c in self.concepts.values() if c.address in concrete_addresses
-        ]
+            self._bind(datasource)
+        self._materialized_revision = self.revision
 
     def validate_concept(self, lookup: str, meta: Meta | None = None):
         existing: Concept = self.concepts.get(lookup)  # type: ignore
@@ -2396,14 +2806,14 @@ class Environment(BaseModel):
             alias=alias, path=Path(environment.working_path)
         )
         for key, concept in environment.concepts.items():
-            self.concepts[f"{alias}.{key}"] = concept.with_namespace(alias)
+            self._set_concept(f"{alias}.{key}", concept.with_namespace(alias))
         for key, datasource in environment.datasources.items():
-            self.datasources[f"{alias}.{key}"] = datasource.with_namespace(alias)
-        self.gen_materialized_concepts()
+            self._set_datasource(f"{alias}.{key}", datasource.with_namespace(alias))
         return self
 
     def add_file_import(self, path: str, alias: str, env: Environment | None = None):
         from trilogy.parsing.parse_engine import ParseToObjects, PARSER
+        from trilogy.parsing.cache import get_import_cache
 
         apath = path.split(".")
         apath[-1] = apath[-1] + ".preql"
@@ -2425,26 +2835,33 @@ class Environment(BaseModel):
             try:
                 with open(target, "r", encoding="utf-8") as f:
                     text = f.read()
-                nparser = ParseToObjects(
-                    visit_tokens=True,
-                    text=text,
-                    environment=Environment(
-                        working_path=target.parent,
-                    ),
-                    parse_address=str(target),
-                )
-                nparser.transform(PARSER.parse(text))
+                cache = get_import_cache()
+                cached = cache.get(target, text) if cache else None
+                if cached:
+                    env = cached.environment
+                else:
+                    nparser = ParseToObjects(
+                        visit_tokens=True,
+                        text=text,
+                        environment=Environment(
+                            working_path=target.parent,
+                        ),
+                        parse_address=str(target),
+                    )
+                    nparser.transform(PARSER.parse(text))
+                    nparser.cache_environment()
+                    env = nparser.environment
             except Exception as e:
                 raise ImportError(
                     f"Unable to import file {target.parent}, parsing error: {e}"
                 )
-            env = nparser.environment
         if env:
-            for _, concept in env.concepts.items():
-                self.add_concept(concept.with_namespace(alias))
+            with self.bulk_load():
+                for _, concept in env.concepts.items():
+                    self.add_concept(concept.with_namespace(alias))
 
-            for _, datasource in env.datasources.items():
-                self.add_datasource(datasource.with_namespace(alias))
+                for _, datasource in env.datasources.items():
+                    self.add_datasource(datasource.with_namespace(alias))
         imps = ImportStatement(alias=alias, path=target, environment=env)
         self.imports[alias] = imps
         return imps
@@ -2491,14 +2908,15 @@ class Environment(BaseModel):
         if not force:
             self.validate_concept(concept.address, meta=meta)
         if concept.namespace == DEFAULT_NAMESPACE:
-            self.concepts[concept.name] = concept
+            self._set_concept(concept.name, concept)
         else:
-            self.concepts[concept.address] = concept
-        if add_derived:
+            self._set_concept(concept.address, concept)
+        if add_derived and self._bulk_depth:
+            self._pending_derivations.append(concept)
+        elif add_derived:
             from trilogy.core.environment_helpers import generate_related_concepts
 
             generate_related_concepts(concept, self)
-        self.gen_materialized_concepts()
         return concept
 
     def add_datasource(
@@ -2507,13 +2925,11 @@ class Environment(BaseModel):
         meta: Meta | None = None,
     ):
         if not datasource.namespace or datasource.namespace == DEFAULT_NAMESPACE:
-            self.datasources[datasource.name] = datasource
-            self.gen_materialized_concepts()
+            self._set_datasource(datasource.name, datasource)
             return datasource
-        self.datasources[datasource.namespace + "." + datasource.identifier] = (
-            datasource
+        self._set_datasource(
+            datasource.namespace + "." + datasource.identifier, datasource
         )
-        self.gen_materialized_concepts()
         return datasource
 
 
@@ -2594,6 +3010,9 @@ class Comparison(Namespaced, SelectGrain, BaseModel):
             return self
         return Conditional(left=self, right=other, operator=BooleanOperator.AND)
 
+    def __str__(self):
+        return self.__repr__()
+
     def __repr__(self):
         return f"{str(self.left)} {self.operator.value} {str(self.right)}"
 
@@ -2972,24 +3391,39 @@ class RowsetDerivationStatement(Namespaced, BaseModel):
             orig[orig_concept.address] = new_concept
             output.append(new_concept)
         default_grain = Grain(components=[*output])
-        # remap everything to the properties of the rowset
-        for x in output:
-            if x.keys:
-                if all([k.address in orig for k in x.keys]):
-                    x.keys = tuple(
-                        [orig[k.address] if k.address in orig else k for k in x.keys]
-                    )
+        # remap everything to the properties of the rowset; keys point at
+        # the remapped concepts, so build those first
+        final: dict[str, Concept] = {}
+
+        def remap(x: Concept) -> Concept:
+            if x.address in final:
+                return final[x.address]
+            keys = x.keys
+            if keys:
+                if all([k.address in orig for k in keys]):
+                    keys = tuple([remap(orig[k.address]) for k in keys])
                 else:
                     # TODO: fix this up
-                    x.keys = tuple()
-        for x in output:
+                    keys = tuple()
             if all([c.address in orig for c in x.grain.components_copy]):
-                x.grain = Grain(
+                grain = Grain(
                     components=[orig[c.address] for c in x.grain.components_copy]
                 )
             else:
-                x.grain = default_grain
-        return output
+                grain = default_grain
+            final[x.address] = Concept(
+                name=x.name,
+                datatype=x.datatype,
+                purpose=x.purpose,
+                lineage=x.lineage,
+                grain=grain,
+                metadata=x.metadata,
+                namespace=x.namespace,
+                keys=keys,
+            )
+            return final[x.address]
+
+        return [remap(x) for x in output]
 
     @property
     def arguments(self) -> List[Concept]:
@@ -0,0 +1,698 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from trilogy.constants import logger
+from trilogy.core.enums import (
+    BooleanOperator,
+    ComparisonOperator,
+    FunctionClass,
+    FunctionType,
+    JoinType,
+    Purpose,
+    PurposeLineage,
+)
+from trilogy.core.models import (
+    CTE,
+    Comparison,
+    Concept,
+    Conditional,
+    DataType,
+    Datasource,
+    Function,
+    Grain,
+    InstantiatedUnnestJoin,
+    Join,
+    MergeStatement,
+    MultiSelectStatement,
+    Parenthetical,
+    RowsetItem,
+    WhereClause,
+    WindowItem,
+)
+
+LOGGER_PREFIX = "[OPTIMIZATION]"
+
+# lineages that pick their sources while rendering, so their
+# inputs can't be worked out ahead of time
+DYNAMIC_LINEAGE = (MultiSelectStatement, MergeStatement, RowsetItem)
+
+CONDITIONS = (Conditional, Comparison, Parenthetical)
+
+
+def parent_names(source: str | list[str]) -> list[str]:
+    if isinstance(source, list):
+        return source
+    return [source] if source else []
+
+
+def all_references(cte: CTE) -> Dict[str, Set[str]]:
+    references: Dict[str, Set[str]] = defaultdict(set)
+    for address, source in cte.source_map.items():
+        for name in parent_names(source):
+            references[name].add(address)
+    for join in cte.joins:
+        if isinstance(join, Join):
+            for key in join.joinkeys:
+                references[join.left_cte.name].add(key.concept.address)
+                references[join.right_cte.name].add(key.concept.address)
+    return references
+
+
+def cte_references(cte: CTE, outputs: List[Concept]) -> Dict[str, Set[str]]:
+    """Columns a CTE reads from each source to render the given outputs,
+    keyed by source name."""
+    references: Dict[str, Set[str]] = defaultdict(set)
+    pending: List[Concept] = [*outputs, *cte.join_derived_concepts]
+    if cte.condition:
+        pending += cte.condition.concept_arguments
+    if cte.group_to_grain:
+        pending += cte.grain.components
+        # metrics a parent provides at this grain are grouped on
+        for concept in outputs:
+            if concept.purpose != Purpose.METRIC:
+                continue
+            target = concept.with_grain(cte.grain)
+            for parent in cte.parent_ctes:
+                if target in parent.output_columns:
+                    references[parent.name].add(concept.address)
+    for join in cte.joins:
+        if isinstance(join, Join):
+            for key in join.joinkeys:
+                references[join.left_cte.name].add(key.concept.address)
+                references[join.right_cte.name].add(key.concept.address)
+        else:
+            pending.append(join.concept)
+    seen: Set[str] = set()
+    while pending:
+        concept = pending.pop()
+        if concept.address in seen:
+            continue
+        seen.add(concept.address)
+        names = parent_names(cte.source_map.get(concept.address, ""))
+        if names:
+            for name in names:
+                references[name].add(concept.address)
+        elif isinstance(concept.lineage, DYNAMIC_LINEAGE):
+            return all_references(cte)
+        elif concept.lineage:
+            pending += concept.lineage.concept_arguments
+    return references
+
+
+def consumer_order(base: CTE, ctes: List[CTE]) -> List[CTE]:
+    """CTEs ordered so every CTE comes before the CTEs it reads from."""
+    lookup = {cte.name: cte for cte in ctes}
+    visited: Set[str] = set()
+    order: List[CTE] = []
+
+    def visit(cte: CTE):
+        if cte.name in visited:
+            return
+        visited.add(cte.name)
+        for parent in cte.parent_ctes:
+            visit(lookup.get(parent.name, parent))
+        order.append(cte)
+
+    visit(lookup.get(base.name, base))
+    return list(reversed(order))
+
+
+def grouping_metric(cte: CTE, concept: Concept) -> bool:
+    """Whether a metric is one of the keys of a grouped CTE, which is the
+    case if a parent already provides it at the grain of the CTE."""
+    target = concept.with_grain(cte.grain)
+    return any(target in parent.output_columns for parent in cte.parent_ctes)
+
+
+def removable(cte: CTE, concept: Concept) -> bool:
+    # merged and multiselect concepts render from other columns of the CTE
+    if any(isinstance(c.lineage, DYNAMIC_LINEAGE) for c in cte.output_columns):
+        return False
+    if not cte.group_to_grain:
+        return True
+    # columns of a grouped CTE set its grain, except for aggregates
+    return (
+        concept.purpose == Purpose.METRIC
+        and concept.address not in [c.address for c in cte.grain.components]
+        and not grouping_metric(cte, concept)
+    )
+
+
+def prune_cte_columns(
+    base: CTE, ctes: List[CTE], selected: Optional[List[Concept]] = None
+):
+    """Remove CTE columns that no downstream CTE reads, working from the
+    base of the query to the leaves.
+
+    The base keeps the columns the final select reads, or every column if
+    those aren't given, and grouped CTEs only drop aggregates, as their
+    other columns set the grain of their output."""
+    required: Dict[str, Set[str]] = defaultdict(set)
+    if selected is not None:
+        required[base.name] = {c.address for c in selected}
+    for cte in consumer_order(base, ctes):
+        if cte.name != base.name or selected is not None:
+            kept = [
+                c
+                for c in cte.output_columns
+                if c.address in required[cte.name] or not removable(cte, c)
+            ]
+            # a select needs at least one column
+            if kept and len(kept) < len(cte.output_columns):
+                logger.debug(
+                    f"{LOGGER_PREFIX} pruning {len(cte.output_columns) - len(kept)}"
+                    f" unused columns from {cte.name}"
+                )
+                cte.output_columns = kept
+        for name, addresses in cte_references(cte, cte.output_columns).items():
+            required[name] |= addresses
+
+
+def sibling_key(cte: CTE, grain: Grain) -> tuple:
+    return (
+        tuple(sorted({p.name for p in cte.parent_ctes})),
+        tuple(sorted({c.address for c in grain.components})),
+        tuple(
+            sorted(
+                (
+                    j.unique_id
+                    if isinstance(j, Join)
+                    else f"{j.alias}{j.concept.address}"
+                )
+                for j in cte.joins
+            )
+        ),
+        tuple(sorted(d.full_name for d in cte.source.datasources)),
+        str(cte.condition),
+    )
+
+
+def aggregate_key(cte: CTE) -> Optional[tuple]:
+    """Grouped CTEs with the same key aggregate the same rows to the same
+    grain, so can be computed in one pass."""
+    if not cte.group_to_grain:
+        return None
+    if any(isinstance(c.lineage, DYNAMIC_LINEAGE) for c in cte.output_columns):
+        return None
+    return sibling_key(cte, cte.grain)
+
+
+def projection_key(cte: CTE) -> Optional[tuple]:
+    """Ungrouped CTEs with the same key return one row for each row of the
+    same input, such as windows over, or filtered copies of, the same
+    parent, so their columns can be selected together."""
+    if cte.group_to_grain:
+        return None
+    if any(isinstance(c.lineage, DYNAMIC_LINEAGE) for c in cte.output_columns):
+        return None
+    # the grain of the rows read, which derived columns may have added to
+    parents = {p.name: p for p in cte.parent_ctes}
+    if len(parents) == 1:
+        return sibling_key(cte, cte.parent_ctes[0].grain)
+    return sibling_key(cte, cte.grain)
+
+
+def joined_off_grain(ctes: List[CTE], names: Set[str], grain: Set[str]) -> bool:
+    """Whether any CTE joins two of the named CTEs on less than their full
+    grain, in which case the join fans out and can't be dropped."""
+    for cte in ctes:
+        for join in cte.joins:
+            if not isinstance(join, Join):
+                continue
+            if join.left_cte.name not in names or join.right_cte.name not in names:
+                continue
+            if {k.concept.address for k in join.joinkeys} != grain:
+                return True
+    return False
+
+
+def redirect(cte: CTE, renames: Dict[str, CTE]):
+    """Point a CTE at the fused replacements of any parents it reads."""
+    if not any(p.name in renames for p in cte.parent_ctes):
+        return
+    parents: Dict[str, CTE] = {}
+    for parent in cte.parent_ctes:
+        parent = renames.get(parent.name, parent)
+        parents.setdefault(parent.name, parent)
+    cte.parent_ctes = list(parents.values())
+    for address, source in cte.source_map.items():
+        if isinstance(source, list):
+            cte.source_map[address] = list(
+                dict.fromkeys(renames[n].name if n in renames else n for n in source)
+            )
+        elif source in renames:
+            cte.source_map[address] = renames[source].name
+    joins: List[Join | InstantiatedUnnestJoin] = []
+    for join in cte.joins:
+        if isinstance(join, Join):
+            left = renames.get(join.left_cte.name, join.left_cte)
+            right = renames.get(join.right_cte.name, join.right_cte)
+            # both sides are now the same CTE
+            if left.name == right.name:
+                continue
+            join = Join(
+                left_cte=left,
+                right_cte=right,
+                jointype=join.jointype,
+                joinkeys=join.joinkeys,
+            )
+        joins.append(join)
+    cte.joins = joins
+
+
+def fuse_siblings(
+    base: CTE, ctes: List[CTE], key: Callable[[CTE], Optional[tuple]]
+) -> List[CTE]:
+    """Compute sibling CTEs that share a key in a single CTE, returning the
+    remaining CTEs. Consumers read every column from the fused CTE, and
+    joins between the siblings are dropped, as both sides have the same
+    rows."""
+    groups: Dict[tuple, List[CTE]] = defaultdict(list)
+    for cte in ctes:
+        value = key(cte)
+        if value:
+            groups[value].append(cte)
+    renames: Dict[str, CTE] = {}
+    for value, members in groups.items():
+        if len(members) < 2:
+            continue
+        names = {m.name for m in members}
+        if joined_off_grain(ctes, names, set(value[1])):
+            continue
+        # the final select reads from the base by name
+        survivor = next((m for m in members if m.name == base.name), members[0])
+        for member in members:
+            if member is survivor:
+                continue
+            logger.debug(f"{LOGGER_PREFIX} fusing {member.name} into {survivor.name}")
+            # the parents are shared, so there is nothing to merge there
+            member.parent_ctes = []
+            if not survivor.group_to_grain:
+                # derived columns can add to the grain of a projection
+                survivor.grain = survivor.grain + member.grain
+                member.grain = survivor.grain
+            survivor = survivor + member
+            renames[member.name] = survivor
+    if not renames:
+        return ctes
+    remaining = [cte for cte in ctes if cte.name not in renames]
+    for cte in remaining:
+        redirect(cte, renames)
+    return remaining
+
+
+def fuse_aggregates(base: CTE, ctes: List[CTE]) -> List[CTE]:
+    return fuse_siblings(base, ctes, aggregate_key)
+
+
+def coalesce_projections(base: CTE, ctes: List[CTE]) -> List[CTE]:
+    return fuse_siblings(base, ctes, projection_key)
+
+
+def structural_key(cte: CTE) -> Optional[tuple]:
+    """CTEs with the same key compute the same rows from the same inputs,
+    and differ at most in the columns they select."""
+    if any(isinstance(c.lineage, DYNAMIC_LINEAGE) for c in cte.output_columns):
+        return None
+    return (*sibling_key(cte, cte.grain), cte.group_to_grain)
+
+
+def deduplicate_ctes(base: CTE, ctes: List[CTE]) -> List[CTE]:
+    """Merge structurally identical CTEs. Merging parents can make their
+    consumers identical in turn, so repeat until nothing changes."""
+    while True:
+        remaining = fuse_siblings(base, ctes, structural_key)
+        if len(remaining) == len(ctes):
+            return remaining
+        ctes = remaining
+
+
+def passthrough_parent(cte: CTE) -> Optional[CTE]:
+    """The parent of a CTE that only selects columns of that parent."""
+    if cte.group_to_grain or cte.condition or cte.joins:
+        return None
+    if len({p.name for p in cte.parent_ctes}) != 1:
+        return None
+    parent = cte.parent_ctes[0]
+    available = {c.address for c in parent.output_columns}
+    for concept in cte.output_columns:
+        if concept.address not in available:
+            return None
+        if parent_names(cte.source_map.get(concept.address, "")) != [parent.name]:
+            return None
+        if isinstance(concept.lineage, DYNAMIC_LINEAGE):
+            return None
+    return parent
+
+
+def inline_passthroughs(base: CTE, ctes: List[CTE]) -> tuple[CTE, List[CTE]]:
+    """Read from the parent of any CTE that only passes its columns
+    through, returning the new base and the remaining CTEs."""
+    candidates: Dict[str, CTE] = {}
+    for cte in ctes:
+        parent = passthrough_parent(cte)
+        if parent:
+            candidates[cte.name] = parent
+
+    def resolve(cte: CTE) -> CTE:
+        while cte.name in candidates:
+            cte = candidates[cte.name]
+        return cte
+
+    # a join between a CTE and a copy of it can only be dropped if it
+    # is on the full grain, as otherwise it fans out
+    for cte in ctes:
+        for join in cte.joins:
+            if not isinstance(join, Join):
+                continue
+            target = resolve(join.left_cte)
+            if target.name != resolve(join.right_cte).name:
+                continue
+            keys = {k.concept.address for k in join.joinkeys}
+            if keys != {c.address for c in target.grain.components}:
+                candidates.pop(join.left_cte.name, None)
+                candidates.pop(join.right_cte.name, None)
+    if not candidates:
+        return base, ctes
+    renames = {name: resolve(cte) for name, cte in candidates.items()}
+    logger.debug(f"{LOGGER_PREFIX} inlining pass through CTEs {list(renames)}")
+    remaining = [cte for cte in ctes if cte.name not in renames]
+    for cte in remaining:
+        redirect(cte, renames)
+    return renames.get(base.name, base), remaining
+
+
+def decompose_condition(
+    condition: Conditional | Comparison | Parenthetical,
+) -> List[Conditional | Comparison | Parenthetical]:
+    """Split a condition into the clauses that are ANDed together."""
+    if isinstance(condition, Parenthetical) and isinstance(
+        condition.content, CONDITIONS
+    ):
+        return decompose_condition(condition.content)
+    if not isinstance(condition, Conditional):
+        return [condition]
+    if condition.operator != BooleanOperator.AND:
+        return [condition]
+    if not isinstance(condition.left, CONDITIONS) or not isinstance(
+        condition.right, CONDITIONS
+    ):
+        return [condition]
+    return decompose_condition(condition.left) + decompose_condition(condition.right)
+
+
+def merge_conditions(
+    conditions: List[Conditional | Comparison | Parenthetical],
+) -> Optional[Conditional | Comparison | Parenthetical]:
+    if not conditions:
+        return None
+    merged = conditions[0]
+    for condition in conditions[1:]:
+        merged = Conditional(left=merged, right=condition, operator=BooleanOperator.AND)
+    return merged
+
+
+def is_scalar(expr) -> bool:
+    """Whether an expression is evaluated row by row, with no aggregates
+    or windows that would see a different set of rows once filtered."""
+    if isinstance(expr, (Comparison, Conditional)):
+        return is_scalar(expr.left) and is_scalar(expr.right)
+    if isinstance(expr, Parenthetical):
+        return is_scalar(expr.content)
+    if isinstance(expr, Function):
+        if expr.operator in FunctionClass.AGGREGATE_FUNCTIONS.value:
+            return False
+        return all(is_scalar(arg) for arg in expr.arguments)
+    if isinstance(expr, (list, tuple)):
+        return all(is_scalar(arg) for arg in expr)
+    if isinstance(expr, Concept):
+        return True
+    return not hasattr(expr, "concept_arguments")
+
+
+def filtered_concepts(condition) -> List[Concept]:
+    return [
+        c
+        for c in condition.concept_arguments
+        if c.derivation != PurposeLineage.CONSTANT
+    ]
+
+
+def filterable(cte: CTE, condition) -> bool:
+    """Whether filtering the input rows of a CTE on a condition is the same
+    as filtering its output, which holds if the condition only reads
+    columns passed through from a parent, and nothing in the CTE is
+    computed over the rows the filter would remove."""
+    if not is_scalar(condition):
+        return False
+    outputs = {c.address for c in cte.output_columns}
+    for concept in filtered_concepts(condition):
+        if concept.address not in outputs:
+            return False
+        if not parent_names(cte.source_map.get(concept.address, "")):
+            return False
+    # windows see every row of their partition
+    return not any(
+        isinstance(c.lineage, WindowItem) and not cte.source_map.get(c.address)
+        for c in cte.output_columns
+    )
+
+
+def null_supplying(cte: CTE, name: str) -> bool:
+    """Whether a source is on the optional side of one of the CTE's joins."""
+    for join in cte.joins:
+        if not isinstance(join, Join):
+            continue
+        if join.right_cte.name == name and join.jointype in (
+            JoinType.LEFT_OUTER,
+            JoinType.FULL,
+        ):
+            return True
+        if join.left_cte.name == name and join.jointype in (
+            JoinType.RIGHT_OUTER,
+            JoinType.FULL,
+        ):
+            return True
+    return False
+
+
+def pushdown_target(
+    cte: CTE, condition, lookup: Dict[str, CTE], consumers: Dict[str, int]
+) -> Optional[CTE]:
+    """The parent CTE a condition on this CTE can move to, if any."""
+    concepts = filtered_concepts(condition)
+    if not concepts:
+        return None
+    sources = {tuple(parent_names(cte.source_map.get(c.address, ""))) for c in concepts}
+    if len(sources) != 1:
+        return None
+    names = sources.pop()
+    # coalesced columns come from more than one parent
+    if len(names) != 1 or names[0] not in lookup:
+        return None
+    parent = lookup[names[0]]
+    if consumers[parent.name] != 1 or null_supplying(cte, parent.name):
+        return None
+    if any(c.address in parent.source.partial_concepts for c in concepts):
+        return None
+    if not filterable(parent, condition):
+        return None
+    return parent
+
+
+def add_condition(cte: CTE, condition):
+    cte.condition = merge_conditions(
+        (decompose_condition(cte.condition) if cte.condition else []) + [condition]
+    )
+
+
+def predicate_pushdown(
+    base: CTE, ctes: List[CTE], where: Optional[WhereClause]
+) -> Optional[WhereClause]:
+    """Move filters as close to the source tables as they can go without
+    changing the result, first applying the query where clause in the base
+    CTE, then sinking CTE conditions into their parents. Returns whatever
+    part of the where clause must still be applied to the final select."""
+    order = consumer_order(base, ctes)
+    lookup = {cte.name: cte for cte in order}
+    root = lookup.get(base.name, base)
+    consumers: Dict[str, int] = defaultdict(int)
+    # the final select reads from the base
+    consumers[root.name] += 1
+    for cte in order:
+        for parent in {p.name for p in cte.parent_ctes}:
+            consumers[parent] += 1
+
+    remaining = []
+    if where:
+        for condition in decompose_condition(where.conditional):
+            if filtered_concepts(condition) and filterable(root, condition):
+                add_condition(root, condition)
+            else:
+                remaining.append(condition)
+
+    for cte in order:
+        if not cte.condition:
+            continue
+        kept = []
+        for condition in decompose_condition(cte.condition):
+            target = pushdown_target(cte, condition, lookup, consumers)
+            if target:
+                logger.debug(
+                    f"{LOGGER_PREFIX} pushing {condition} from {cte.name} to"
+                    f" {target.name}"
+                )
+                add_condition(target, condition)
+            else:
+                kept.append(condition)
+        if len(kept) < len(decompose_condition(cte.condition)):
+            cte.condition = merge_conditions(kept)
+    if where and len(remaining) == len(decompose_condition(where.conditional)):
+        return where
+    final = merge_conditions(remaining)
+    return WhereClause(conditional=final) if final else None
+
+
+def parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y%m%d").date()
+
+
+def partition_value(value, datatype) -> Any:
+    """The python value of a literal compared against a partition field,
+    or None if it can't be worked out ahead of time."""
+    if isinstance(value, Function):
+        if value.operator == FunctionType.CAST:
+            return partition_value(value.arguments[0], value.arguments[1])
+        if value.operator == FunctionType.CONSTANT:
+            return partition_value(value.arguments[0], datatype)
+        return None
+    if isinstance(value, Concept):
+        if value.derivation == PurposeLineage.CONSTANT and value.lineage:
+            return partition_value(value.lineage, datatype)
+        return None
+    if not isinstance(value, (str, int, float)):
+        return None
+    try:
+        if datatype == DataType.DATE:
+            return value if isinstance(value, date) else parse_date(str(value))
+        if datatype in (DataType.DATETIME, DataType.TIMESTAMP):
+            return datetime.fromisoformat(str(value))
+        if datatype in (DataType.INTEGER, DataType.BIGINT):
+            return int(value)
+        if datatype in (DataType.FLOAT, DataType.NUMBER, DataType.NUMERIC):
+            return float(value)
+    except ValueError:
+        return None
+    return value
+
+
+def partition_values(value, datatype) -> Optional[List[Any]]:
+    if isinstance(value, Parenthetical):
+        value = value.content
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    values = [partition_value(v, datatype) for v in value]
+    if any(v is None for v in values):
+        return None
+    return values
+
+
+COMPARISONS = {
+    ComparisonOperator.EQ: lambda a, b: a == b,
+    ComparisonOperator.NE: lambda a, b: a != b,
+    ComparisonOperator.LT: lambda a, b: a < b,
+    ComparisonOperator.GT: lambda a, b: a > b,
+    ComparisonOperator.LTE: lambda a, b: a <= b,
+    ComparisonOperator.GTE: lambda a, b: a >= b,
+}
+
+FLIPPED = {
+    ComparisonOperator.LT: ComparisonOperator.GT,
+    ComparisonOperator.GT: ComparisonOperator.LT,
+    ComparisonOperator.LTE: ComparisonOperator.GTE,
+    ComparisonOperator.GTE: ComparisonOperator.LTE,
+}
+
+
+def partition_match(condition, field: Concept, value) -> Optional[bool]:
+    """Whether rows with the given partition value can pass a condition;
+    None when that depends on more than the partition value."""
+    if isinstance(condition, Parenthetical):
+        if isinstance(condition.content, CONDITIONS):
+            return partition_match(condition.content, field, value)
+        return None
+    if isinstance(condition, Conditional):
+        left = partition_match(condition.left, field, value)
+        right = partition_match(condition.right, field, value)
+        if condition.operator == BooleanOperator.AND:
+            if left is False or right is False:
+                return False
+            return True if left and right else None
+        if left is True or right is True:
+            return True
+        return False if left is False and right is False else None
+    if not isinstance(condition, Comparison):
+        return None
+    operator = condition.operator
+    if isinstance(condition.left, Concept) and condition.left.address == field.address:
+        other = condition.right
+    elif (
+        isinstance(condition.right, Concept)
+        and condition.right.address == field.address
+        and operator not in (ComparisonOperator.IN, ComparisonOperator.NOT_IN)
+    ):
+        other = condition.left
+        operator = FLIPPED.get(operator, operator)
+    else:
+        return None
+    try:
+        if operator in (ComparisonOperator.IN, ComparisonOperator.NOT_IN):
+            values = partition_values(other, field.datatype)
+            if values is None:
+                return None
+            return (value in values) == (operator == ComparisonOperator.IN)
+        if operator not in COMPARISONS:
+            return None
+        target = partition_value(other, field.datatype)
+        if target is None:
+            return None
+        return COMPARISONS[operator](value, target)
+    except TypeError:
+        return None
+
+
+def prune_partitions(ctes: List[CTE]):
+    """Restrict CTEs that scan a sharded datasource to the shards their
+    condition can match. The condition is still applied to the rows read,
+    so this only changes how much is scanned."""
+    for cte in ctes:
+        if not cte.condition or len(cte.source.datasources) != 1:
+            continue
+        datasource = cte.source.datasources[0]
+        if not isinstance(datasource, Datasource) or not datasource.metadata.shards:
+            continue
+        field = datasource.partition_fields[0]
+        shards = datasource.metadata.shards
+        kept = []
+        for shard in shards:
+            value = partition_value(shard.value, field.datatype)
+            if (
+                value is None
+                or partition_match(cte.condition, field, value) is not False
+            ):
+                kept.append(shard)
+        if len(kept) == len(shards):
+            continue
+        logger.debug(
+            f"{LOGGER_PREFIX} reading {len(kept)} of {len(shards)} shards of"
+            f" {datasource.identifier} in {cte.name}"
+        )
+        # nothing will match, but the scan still needs a table to read
+        kept = kept or shards[:1]
+        cte.source = cte.source.model_copy(
+            update={"datasources": [datasource.with_shards(kept)]}
+        )
@@ -4,8 +4,8 @@ from typing import List, Optional, Callable
 
 from trilogy.constants import logger
 from trilogy.core.enums import PurposeLineage, Granularity, FunctionType
-from trilogy.core.env_processor import generate_graph
-from trilogy.core.graph_models import ReferenceGraph
+from trilogy.core.env_processor import generate_graph  # noqa: F401
+from trilogy.core.graph_models import AnyReferenceGraph, concept_to_node
 from trilogy.core.models import Concept, Environment, Function, Grain
 from trilogy.core.processing.utility import (
     get_disconnected_components,
@@ -43,23 +43,84 @@ class ValidationResult(Enum):
 LOGGER_PREFIX = "[CONCEPT DETAIL]"
 
 
+def get_lineage_closure(
+    base: Concept, cache: dict[str, frozenset[str]] | None = None
+) -> frozenset[str]:
+    """Addresses of every concept in the lineage of base, memoized by
+    concept node (address and grain) in cache."""
+    cache = {} if cache is None else cache
+    key = concept_to_node(base)
+    existing = cache.get(key)
+    if existing is not None:
+        return existing
+    upstream: set[str] = set()
+    if base.lineage:
+        for x in base.lineage.concept_arguments:
+            upstream.add(x.address)
+            upstream |= get_lineage_closure(x, cache)
+    closure = frozenset(upstream)
+    cache[key] = closure
+    return closure
+
+
 def get_upstream_concepts(base: Concept, nested: bool = False) -> set[str]:
-    upstream = set()
+    upstream = set(get_lineage_closure(base))
     if nested:
         upstream.add(base.address)
-    if not base.lineage:
-        return upstream
-    for x in base.lineage.concept_arguments:
-        upstream = upstream.union(get_upstream_concepts(x, nested=True))
     return upstream
 
 
+PRIORITY_ANY_GRANULARITY = {
+    PurposeLineage.MERGE: 1,
+    PurposeLineage.MULTISELECT: 2,
+    PurposeLineage.ROWSET: 3,
+}
+
+PRIORITY_MULTI_ROW = {
+    # aggregates, windows and filters to remove them from scope,
+    # as they cannot get partials
+    PurposeLineage.AGGREGATE: 4,
+    PurposeLineage.WINDOW: 5,
+    PurposeLineage.FILTER: 6,
+    # unnests are weird?
+    PurposeLineage.UNNEST: 7,
+    PurposeLineage.BASIC: 8,
+    # finally our plain selects
+    PurposeLineage.ROOT: 9,
+    # and any non-single row constants
+    PurposeLineage.CONSTANT: 10,
+}
+
+
+def get_priority_bucket(concept: Concept) -> int:
+    derivation = concept.derivation
+    single_row = concept.granularity == Granularity.SINGLE_ROW
+    # find anything that needs no joins first, so we can exit early
+    if derivation == PurposeLineage.CONSTANT and single_row:
+        return 0
+    # anything that requires merging concept universes
+    # then multiselects and rowsets to remove them from scope,
+    # as they cannot get partials
+    elif derivation in PRIORITY_ANY_GRANULARITY:
+        return PRIORITY_ANY_GRANULARITY[derivation]
+    # single row derived concepts go after all multi-row concepts
+    elif single_row:
+        return len(PRIORITY_ANY_GRANULARITY) + len(PRIORITY_MULTI_ROW) + 1
+    return PRIORITY_MULTI_ROW.get(
+        derivation, len(PRIORITY_ANY_GRANULARITY) + len(PRIORITY_MULTI_ROW) + 2
+    )
+
+
 def get_priority_concept(
     all_concepts: List[Concept],
     attempted_addresses: set[str],
     found_concepts: set[str],
     depth: int,
+    environment: Environment | None = None,
 ) -> Concept:
+    closures: dict[str, frozenset[str]] = (
+        environment.revision_cache("lineage_closure") if environment else {}
+    )
     # optimized search for missing concepts
     pass_one = [
         c
@@ -71,104 +132,24 @@ def get_priority_concept(
     pass_two = [c for c in all_concepts if c.address not in attempted_addresses]
 
     for remaining_concept in (pass_one, pass_two):
-        priority = (
-            # find anything that needs no joins first, so we can exit early
-            [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.CONSTANT
-                and c.granularity == Granularity.SINGLE_ROW
-            ]
-            +
-            # anything that requires merging concept universes
-            [c for c in remaining_concept if c.derivation == PurposeLineage.MERGE]
-            +
-            # then multiselects to remove them from scope
-            [c for c in remaining_concept if c.derivation == PurposeLineage.MULTISELECT]
-            +
-            # then rowsets to remove them from scope, as they cannot get partials
-            [c for c in remaining_concept if c.derivation == PurposeLineage.ROWSET]
-            # we should be home-free here
-            +
-            # then aggregates to remove them from scope, as they cannot get partials
-            [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.AGGREGATE
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # then windows to remove them from scope, as they cannot get partials
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.WINDOW
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # then filters to remove them from scope, also cannot get partials
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.FILTER
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # unnests are weird?
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.UNNEST
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.BASIC
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # finally our plain selects
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.ROOT
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # and any non-single row constants
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation == PurposeLineage.CONSTANT
-                and not c.granularity == Granularity.SINGLE_ROW
-            ]
-            # catch all
-            + [
-                c
-                for c in remaining_concept
-                if c.derivation != PurposeLineage.CONSTANT
-                and c.granularity == Granularity.SINGLE_ROW
-            ]
-        )
-
-        priority += [
-            c
-            for c in remaining_concept
-            if c.address not in [x.address for x in priority]
-        ]
-        final = []
+        if not remaining_concept:
+            continue
+        # stable, so ties keep their input order
+        priority = sorted(remaining_concept, key=get_priority_bucket)
         # if any thing is derived from another concept
         # get the derived copy first
         # as this will usually resolve cleaner
+        upstream: set[str] = set()
+        for c in priority:
+            upstream |= get_lineage_closure(c, closures)
         for x in priority:
-            if any([x.address in get_upstream_concepts(c) for c in priority]):
+            if x.address in upstream:
                 logger.info(
                     f"{depth_to_prefix(depth)}{LOGGER_PREFIX} delaying fetch of {x.address} as parent of another concept"
                 )
                 continue
-            final.append(x)
-        # then append anything we didn't get
-        for x2 in priority:
-            if x2 not in final:
-                final.append(x2)
-        if final:
-            return final[0]
+            return x
+        return priority[0]
     raise ValueError(
         f"Cannot resolve query. No remaining priority concepts, have attempted {attempted_addresses}"
     )
@@ -200,7 +181,7 @@ def generate_node(
     concept: Concept,
     local_optional: List[Concept],
     environment: Environment,
-    g: ReferenceGraph,
+    g: AnyReferenceGraph,
     depth: int,
     source_concepts: Callable,
     accept_partial: bool = False,
@@ -378,7 +359,7 @@ def search_concepts(
     mandatory_list: List[Concept],
     environment: Environment,
     depth: int,
-    g: ReferenceGraph,
+    g: AnyReferenceGraph,
     accept_partial: bool = False,
     history: History | None = None,
 ) -> StrategyNode | None:
@@ -408,7 +389,7 @@ def _search_concepts(
     mandatory_list: List[Concept],
     environment: Environment,
     depth: int,
-    g: ReferenceGraph,
+    g: AnyReferenceGraph,
     history: History,
     accept_partial: bool = False,
 ) -> StrategyNode | None:
@@ -424,7 +405,11 @@ def _search_concepts(
 
     while attempted != all_mandatory:
         priority_concept = get_priority_concept(
-            mandatory_list, attempted, found_concepts=found, depth=depth
+            mandatory_list,
+            attempted,
+            found_concepts=found,
+            depth=depth,
+            environment=environment,
         )
         logger.info(
             f"{depth_to_prefix(depth)}{LOGGER_PREFIX} priority concept is {str(priority_concept)}"
@@ -573,10 +558,10 @@ def _search_concepts(
 def source_query_concepts(
     output_concepts: List[Concept],
     environment: Environment,
-    g: Optional[ReferenceGraph] = None,
+    g: Optional[AnyReferenceGraph] = None,
 ):
     if not g:
-        g = generate_graph(environment)
+        g = environment.graph
     if not output_concepts:
         raise ValueError(f"No output concepts provided {output_concepts}")
     history = History()
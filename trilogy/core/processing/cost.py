@@ -0,0 +1,60 @@
+from math import inf, prod
+from typing import List, Optional, Union
+
+from trilogy.core.models import Concept, Datasource, QueryDatasource
+
+# assumed width of a single value when only row counts are known
+DEFAULT_VALUE_WIDTH = 8
+
+
+def scan_cost(datasource: Datasource, concepts: List[Concept]) -> float:
+    """Estimated bytes read to select concepts from a datasource.
+    Sources without statistics are infinitely expensive, so they keep
+    their existing ordering among themselves and rank after any source
+    that can be costed."""
+    statistics = datasource.statistics
+    if not statistics or not datasource.columns:
+        return inf
+    addresses = {c.address for c in concepts}
+    read = [c for c in datasource.columns if c.concept.address in addresses]
+    width = max(len(read), 1)
+    if statistics.bytes is not None:
+        return statistics.bytes * width / len(datasource.columns)
+    if statistics.row_count is not None:
+        return statistics.row_count * width * DEFAULT_VALUE_WIDTH
+    return inf
+
+
+def distinct_count(
+    source: Union[Datasource, QueryDatasource], concepts: List[Concept]
+) -> Optional[int]:
+    """Upper bound on distinct combinations of concepts in a source,
+    if every concept has a recorded distinct count."""
+    if isinstance(source, QueryDatasource):
+        if len(source.datasources) != 1:
+            return None
+        return distinct_count(source.datasources[0], concepts)
+    if not source.statistics or not concepts:
+        return None
+    counts = source.statistics.distinct_counts
+    if not all(c.address in counts for c in concepts):
+        return None
+    return prod(counts[c.address] for c in concepts)
+
+
+def estimated_rows(source: Union[Datasource, QueryDatasource]) -> Optional[int]:
+    """Estimated rows produced by a source, or None if unknown."""
+    if isinstance(source, Datasource):
+        return source.statistics.row_count if source.statistics else None
+    # joins can fan out or filter arbitrarily; don't guess
+    if len(source.datasources) != 1 or source.joins:
+        return None
+    rows = estimated_rows(source.datasources[0])
+    if rows is None:
+        return None
+    if source.limit is not None:
+        rows = min(rows, source.limit)
+    distinct = distinct_count(source, source.grain.components)
+    if distinct is not None:
+        rows = min(rows, distinct)
+    return rows
@@ -1,11 +1,25 @@
-from trilogy.core.models import Concept, Environment, LooseConceptList
+from trilogy.core.enums import FunctionType, PurposeLineage
+from trilogy.core.models import (
+    AggregateWrapper,
+    ColumnAssignment,
+    Concept,
+    Datasource,
+    Environment,
+    Function,
+    LooseConceptList,
+)
 from trilogy.utility import unique
-from trilogy.core.processing.nodes import GroupNode, StrategyNode, History
+from trilogy.core.processing.nodes import (
+    GroupNode,
+    SelectNode,
+    StrategyNode,
+    History,
+)
 from typing import List
 from trilogy.core.processing.node_generators.common import (
     resolve_function_parent_concepts,
 )
-from trilogy.constants import logger
+from trilogy.constants import logger, CONFIG
 from trilogy.core.processing.utility import padding, create_log_lambda
 from trilogy.core.processing.node_generators.common import (
     gen_enrichment_node,
@@ -13,6 +27,183 @@ from trilogy.core.processing.node_generators.common import (
 
 LOGGER_PREFIX = "[GEN_GROUP_NODE]"
 
+# aggregates that can be recomputed from partial aggregates
+# and the function that combines them
+ROLLUP_FUNCTIONS = {
+    FunctionType.SUM: FunctionType.SUM,
+    FunctionType.COUNT: FunctionType.SUM,
+    FunctionType.MIN: FunctionType.MIN,
+    FunctionType.MAX: FunctionType.MAX,
+}
+
+
+def derivable_from(concept: Concept, available: set[str]) -> List[Concept] | None:
+    """The available concepts a concept can be computed from without
+    aggregation, or None if it cannot be."""
+    if concept.address in available:
+        return [concept]
+    if concept.derivation != PurposeLineage.BASIC or not concept.lineage:
+        return None
+    arguments = concept.lineage.concept_arguments
+    if not arguments:
+        return None
+    found: List[Concept] = []
+    for argument in arguments:
+        inputs = derivable_from(argument, available)
+        if inputs is None:
+            return None
+        found += inputs
+    return found
+
+
+def rollup_lineage(concept: Concept) -> Function | None:
+    """The aggregate function of a concept, if it can be recombined from
+    values aggregated at a finer grain."""
+    lineage = concept.lineage
+    if isinstance(lineage, AggregateWrapper):
+        # an explicit grain may repeat across the rows of a finer source
+        if lineage.by:
+            return None
+        lineage = lineage.function
+    if not isinstance(lineage, Function) or lineage.operator not in ROLLUP_FUNCTIONS:
+        return None
+    return lineage
+
+
+def gen_rollup_node(
+    concept: Concept,
+    environment: Environment,
+    g,
+    depth: int,
+) -> StrategyNode | None:
+    """Re-aggregate an additive aggregate from a datasource that stores it
+    at a finer grain, such as a persisted rollup, rather than recomputing
+    it from the raw rows."""
+    lineage = rollup_lineage(concept)
+    if lineage is None:
+        return None
+    target = (
+        concept.grain.components_copy
+        if concept.grain and not concept.grain.abstract
+        else []
+    )
+    for datasource in environment.datasources.values():
+        # a partial source is missing rows, so can't be rolled up
+        if not all(c.is_complete for c in datasource.columns):
+            continue
+        stored = [c for c in datasource.columns if c.concept.address == concept.address]
+        if not stored or stored[0].concept.grain == concept.grain:
+            continue
+        available = {c.concept.address for c in datasource.columns}
+        inputs: List[Concept] = []
+        for component in target:
+            found = derivable_from(component, available)
+            if found is None:
+                break
+            inputs += found
+        else:
+            logger.info(
+                f"{padding(depth)}{LOGGER_PREFIX} rolling up {concept.address} from {datasource.identifier} at grain {datasource.grain}"
+            )
+            return rollup_node(
+                concept,
+                lineage,
+                datasource,
+                stored[0],
+                target,
+                inputs,
+                environment,
+                g,
+                depth,
+            )
+    return None
+
+
+def rollup_partial(concept: Concept) -> Concept:
+    """A concept for an aggregate as stored, so it can be aggregated
+    again under the original address."""
+    return Concept(
+        name=f"_rollup_{concept.name}",
+        datatype=concept.datatype,
+        purpose=concept.purpose,
+        namespace=concept.namespace,
+        grain=concept.grain,
+        keys=concept.keys,
+    )
+
+
+def rollup_source(datasource: Datasource) -> Datasource:
+    """A copy of a datasource with each stored aggregate bound to its
+    partial concept; identical for every aggregate read from the source,
+    so rollups of several aggregates can merge."""
+    return Datasource(
+        identifier=f"{datasource.identifier}_rollup",
+        namespace=datasource.namespace,
+        grain=datasource.grain,
+        address=datasource.address,
+        columns=[
+            (
+                ColumnAssignment(
+                    alias=c.alias,
+                    concept=rollup_partial(c.concept),
+                    modifiers=c.modifiers,
+                )
+                if c.concept.derivation == PurposeLineage.AGGREGATE
+                else c
+            )
+            for c in datasource.columns
+        ],
+        metadata=datasource.metadata,
+    )
+
+
+def rollup_node(
+    concept: Concept,
+    lineage: Function,
+    datasource: Datasource,
+    stored: ColumnAssignment,
+    target: List[Concept],
+    inputs: List[Concept],
+    environment: Environment,
+    g,
+    depth: int,
+) -> StrategyNode:
+    partial = rollup_partial(stored.concept)
+    source = rollup_source(datasource)
+    rollup = Concept(
+        name=concept.name,
+        datatype=concept.datatype,
+        purpose=concept.purpose,
+        namespace=concept.namespace,
+        grain=concept.grain,
+        keys=concept.keys,
+        metadata=concept.metadata,
+        modifiers=concept.modifiers,
+        lineage=lineage.model_copy(
+            update={
+                "operator": ROLLUP_FUNCTIONS[lineage.operator],
+                "arguments": [partial],
+            }
+        ),
+    )
+    inputs = unique([partial, *inputs], "address")
+    parent = SelectNode(
+        input_concepts=[c.concept for c in source.columns],
+        output_concepts=inputs,
+        environment=environment,
+        g=g,
+        datasource=source,
+        depth=depth,
+    )
+    return GroupNode(
+        output_concepts=[rollup, *target],
+        input_concepts=inputs,
+        environment=environment,
+        g=g,
+        parents=[parent],
+        depth=depth,
+    )
+
 
 def gen_group_node(
     concept: Concept,
@@ -23,6 +214,44 @@ def gen_group_node(
     source_concepts,
     history: History | None = None,
 ):
+    # the keys we group by
+    # are what we can use for enrichment
+    group_key_parents = concept.grain.components_copy
+
+    group_node: StrategyNode | None = None
+    if CONFIG.optimizations.aggregate_navigation:
+        group_node = gen_rollup_node(concept, environment, g, depth)
+    if not group_node:
+        group_node = gen_source_group_node(
+            concept, environment, g, depth, source_concepts, history
+        )
+    if not group_node:
+        return None
+
+    # early exit if no optional
+    if not local_optional:
+        return group_node
+    logger.info(f"{padding(depth)}{LOGGER_PREFIX} group node requires enrichment")
+    return gen_enrichment_node(
+        group_node,
+        join_keys=group_key_parents,
+        local_optional=local_optional,
+        environment=environment,
+        g=g,
+        depth=depth,
+        source_concepts=source_concepts,
+        log_lambda=create_log_lambda(LOGGER_PREFIX, depth, logger),
+    )
+
+
+def gen_source_group_node(
+    concept: Concept,
+    environment: Environment,
+    g,
+    depth: int,
+    source_concepts,
+    history: History | None = None,
+) -> StrategyNode | None:
     # aggregates MUST always group to the proper grain
     # except when the
     parent_concepts: List[Concept] = unique(
@@ -63,11 +292,7 @@ def gen_group_node(
     else:
         parents = []
 
-    # the keys we group by
-    # are what we can use for enrichment
-    group_key_parents = concept.grain.components_copy
-
-    group_node = GroupNode(
+    return GroupNode(
         output_concepts=output_concepts,
         input_concepts=parent_concepts,
         environment=environment,
@@ -75,18 +300,3 @@ def gen_group_node(
         parents=parents,
         depth=depth,
     )
-
-    # early exit if no optional
-    if not local_optional:
-        return group_node
-    logger.info(f"{padding(depth)}{LOGGER_PREFIX} group node requires enrichment")
-    return gen_enrichment_node(
-        group_node,
-        join_keys=group_key_parents,
-        local_optional=local_optional,
-        environment=environment,
-        g=g,
-        depth=depth,
-        source_concepts=source_concepts,
-        log_lambda=create_log_lambda(LOGGER_PREFIX, depth, logger),
-    )
@@ -3,13 +3,19 @@ from typing import List, Optional
 from trilogy.core.models import Concept, Environment, Datasource, Conditional
 from trilogy.core.processing.nodes import MergeNode, History
 import networkx as nx
-from trilogy.core.graph_models import concept_to_node, datasource_to_node
+from trilogy.core.graph_models import (
+    AnyReferenceGraph,
+    concept_to_node,
+    datasource_to_node,
+    JoinPathIndex,
+)
 from trilogy.core.processing.utility import PathInfo
 from trilogy.constants import logger
 from trilogy.utility import unique
 from trilogy.core.exceptions import AmbiguousRelationshipResolutionException
 from trilogy.core.processing.utility import padding
 from trilogy.core.processing.graph_utils import extract_mandatory_subgraphs
+from trilogy.core.processing.node_generators.select_node import stored_at_grain
 
 LOGGER_PREFIX = "[GEN_MERGE_NODE]"
 
@@ -29,16 +35,20 @@ def identify_ds_join_paths(
     datasource: Datasource,
     accept_partial: bool = False,
     fail: bool = False,
+    index: JoinPathIndex | None = None,
 ) -> PathInfo | None:
+    # a stored aggregate read at another grain would return the stored rows
+    if not stored_at_grain(datasource, all_concepts):
+        return None
     all_found = True
     any_direct_found = False
     paths = {}
+    index = index or JoinPathIndex(g)
     for bitem in all_concepts:
         item = bitem.with_default_grain()
         target_node = concept_to_node(item)
         try:
-            path = nx.shortest_path(
-                g,
+            path = index.shortest_path(
                 source=datasource_to_node(datasource),
                 target=target_node,
             )
@@ -77,7 +87,7 @@ def identify_ds_join_paths(
 
 def gen_merge_node(
     all_concepts: List[Concept],
-    g: nx.DiGraph,
+    g: AnyReferenceGraph,
     environment: Environment,
     depth: int,
     source_concepts,
@@ -86,9 +96,12 @@ def gen_merge_node(
     conditions: Conditional | None = None,
 ) -> Optional[MergeNode]:
     join_candidates: List[PathInfo] = []
+    index = environment.join_path_index(g)
     # anchor on datasources
     for datasource in environment.datasources.values():
-        path = identify_ds_join_paths(all_concepts, g, datasource, accept_partial)
+        path = identify_ds_join_paths(
+            all_concepts, g, datasource, accept_partial, index=index
+        )
         if path and path.reduced_concepts:
             join_candidates.append(path)
     join_candidates.sort(key=lambda x: sum([len(v) for v in x.paths.values()]))
@@ -2,6 +2,7 @@ from trilogy.core.models import (
     Concept,
     Environment,
     MultiSelectStatement,
+    LooseConceptList,
 )
 from trilogy.core.processing.nodes import MergeNode, NodeJoin, History
 from trilogy.core.processing.nodes.base_node import concept_list_to_grain, StrategyNode
@@ -15,6 +16,7 @@ from collections import defaultdict
 from itertools import combinations
 from trilogy.core.enums import Purpose
 from trilogy.core.processing.node_generators.common import resolve_join_order
+from trilogy.core.processing.plan_cache import cached_plan, plan_key
 
 LOGGER_PREFIX = "[GEN_MULTISELECT_NODE]"
 
@@ -58,7 +60,7 @@ def gen_multiselect_node(
     depth: int,
     source_concepts,
     history: History | None = None,
-) -> MergeNode | None:
+) -> StrategyNode | None:
     if not isinstance(concept.lineage, MultiSelectStatement):
         logger.info(
             f"{padding(depth)}{LOGGER_PREFIX} Cannot generate multiselect node for {concept}"
@@ -66,45 +68,6 @@ def gen_multiselect_node(
         return None
     lineage: MultiSelectStatement = concept.lineage
 
-    base_parents: List[StrategyNode] = []
-    for select in lineage.selects:
-        snode: StrategyNode = source_concepts(
-            mandatory_list=select.output_components,
-            environment=environment,
-            g=g,
-            depth=depth + 1,
-            history=history,
-        )
-        if not snode:
-            logger.info(
-                f"{padding(depth)}{LOGGER_PREFIX} Cannot generate multiselect node for {concept}"
-            )
-            return None
-        if select.where_clause:
-            snode.conditions = select.where_clause.conditional
-        merge_concepts = []
-        for x in [*snode.output_concepts]:
-            merge = lineage.get_merge_concept(x)
-            if merge:
-                snode.output_concepts.append(merge)
-                merge_concepts.append(merge)
-        # clear cache so QPS
-        snode.rebuild_cache()
-        for mc in merge_concepts:
-            assert mc in snode.resolve().output_concepts
-        base_parents.append(snode)
-
-    node_joins = extra_align_joins(lineage, base_parents)
-    node = MergeNode(
-        input_concepts=[x for y in base_parents for x in y.output_concepts],
-        output_concepts=[x for y in base_parents for x in y.output_concepts],
-        environment=environment,
-        g=g,
-        depth=depth,
-        parents=base_parents,
-        node_joins=node_joins,
-    )
-
     enrichment = set([x.address for x in local_optional])
 
     rowset_relevant = [
@@ -112,26 +75,86 @@ def gen_multiselect_node(
         for x in lineage.derived_concepts
         if x.address == concept.address or x.address in enrichment
     ]
+    last_select = lineage.selects[-1]
     additional_relevant = [
-        x for x in select.output_components if x.address in enrichment
+        x for x in last_select.output_components if x.address in enrichment
     ]
-    # add in other other concepts
-    for item in rowset_relevant:
-        node.output_concepts.append(item)
-    for item in additional_relevant:
-        node.output_concepts.append(item)
-    if select.where_clause:
+
+    def build() -> StrategyNode | None:
+        base_parents: List[StrategyNode] = []
+        for select in lineage.selects:
+            snode: StrategyNode = source_concepts(
+                mandatory_list=select.output_components,
+                environment=environment,
+                g=g,
+                depth=depth + 1,
+                history=history,
+            )
+            if not snode:
+                return None
+            if select.where_clause:
+                snode.conditions = select.where_clause.conditional
+            merge_concepts = []
+            for x in [*snode.output_concepts]:
+                merge = lineage.get_merge_concept(x)
+                if merge:
+                    snode.output_concepts.append(merge)
+                    merge_concepts.append(merge)
+            # clear cache so QPS
+            snode.rebuild_cache()
+            for mc in merge_concepts:
+                assert mc in snode.resolve().output_concepts
+            base_parents.append(snode)
+
+        node_joins = extra_align_joins(lineage, base_parents)
+        node = MergeNode(
+            input_concepts=[x for y in base_parents for x in y.output_concepts],
+            output_concepts=[x for y in base_parents for x in y.output_concepts],
+            environment=environment,
+            g=g,
+            depth=depth,
+            parents=base_parents,
+            node_joins=node_joins,
+        )
+
+        # add in other other concepts
+        for item in rowset_relevant:
+            node.output_concepts.append(item)
         for item in additional_relevant:
-            node.partial_concepts.append(item)
+            node.output_concepts.append(item)
+        if select.where_clause:
+            for item in additional_relevant:
+                node.partial_concepts.append(item)
+        node.output_lcl = LooseConceptList(concepts=node.output_concepts)
+        node.partial_lcl = LooseConceptList(concepts=node.partial_concepts)
+
+        # we need a better API for refreshing a nodes QDS
+        node.resolution_cache = node._resolve()
 
-    # we need a better API for refreshing a nodes QDS
-    node.resolution_cache = node._resolve()
+        # assume grain to be output of select
+        # but don't include anything aggregate at this point
+        node.resolution_cache.grain = concept_list_to_grain(
+            node.output_concepts, parent_sources=node.resolution_cache.datasources
+        )
+        return node
 
-    # assume grain to be output of select
-    # but don't include anything aggregate at this point
-    node.resolution_cache.grain = concept_list_to_grain(
-        node.output_concepts, parent_sources=node.resolution_cache.datasources
+    node = cached_plan(
+        environment,
+        g,
+        plan_key(
+            "multiselect",
+            lineage.derived_concepts,
+            rowset_relevant,
+            additional_relevant,
+        ),
+        build,
+        depth,
     )
+    if not node:
+        logger.info(
+            f"{padding(depth)}{LOGGER_PREFIX} Cannot generate multiselect node for {concept}"
+        )
+        return None
     possible_joins = concept_to_relevant_joins(additional_relevant)
     if not local_optional:
         logger.info(
@@ -5,6 +5,7 @@ from trilogy.core.models import (
     RowsetDerivationStatement,
     RowsetItem,
     MultiSelectStatement,
+    LooseConceptList,
 )
 from trilogy.core.processing.nodes import MergeNode, NodeJoin, History, StrategyNode
 from trilogy.core.processing.nodes.base_node import concept_list_to_grain
@@ -14,6 +15,7 @@ from trilogy.core.enums import JoinType
 from trilogy.constants import logger
 from trilogy.core.processing.utility import padding
 from trilogy.core.processing.node_generators.common import concept_to_relevant_joins
+from trilogy.core.processing.plan_cache import cached_plan, plan_key
 
 
 LOGGER_PREFIX = "[GEN_ROWSET_NODE]"
@@ -39,21 +41,6 @@ def gen_rowset_node(
         targets = select.output_components + where.conditional.concept_arguments
     else:
         targets = select.output_components
-    node: StrategyNode = source_concepts(
-        mandatory_list=targets,
-        environment=environment,
-        g=g,
-        depth=depth + 1,
-        history=history,
-    )
-    if not node:
-        logger.info(
-            f"{padding(depth)}{LOGGER_PREFIX} Cannot generate rowset node for {concept}"
-        )
-        return None
-    node.conditions = select.where_clause.conditional if select.where_clause else None
-    # rebuild any cached info with the new condition clause
-    node.rebuild_cache()
     enrichment = set([x.address for x in local_optional])
     rowset_relevant = [
         x
@@ -63,21 +50,54 @@ def gen_rowset_node(
     additional_relevant = [
         x for x in select.output_components if x.address in enrichment
     ]
-    # add in other other concepts
-    for item in rowset_relevant:
-        node.output_concepts.append(item)
-    for item in additional_relevant:
-        node.output_concepts.append(item)
-    if select.where_clause:
+
+    def build() -> StrategyNode | None:
+        node: StrategyNode = source_concepts(
+            mandatory_list=targets,
+            environment=environment,
+            g=g,
+            depth=depth + 1,
+            history=history,
+        )
+        if not node:
+            return None
+        node.conditions = (
+            select.where_clause.conditional if select.where_clause else None
+        )
+        # add in other other concepts
+        for item in rowset_relevant:
+            node.output_concepts.append(item)
         for item in additional_relevant:
-            node.partial_concepts.append(item)
+            node.output_concepts.append(item)
+        if select.where_clause:
+            for item in additional_relevant:
+                node.partial_concepts.append(item)
+        node.output_lcl = LooseConceptList(concepts=node.output_concepts)
+        node.partial_lcl = LooseConceptList(concepts=node.partial_concepts)
+        # rebuild any cached info with the new condition clause and outputs
+        node.rebuild_cache()
+
+        # assume grain to be output of select
+        # but don't include anything aggregate at this point
+        assert node.resolution_cache
+        node.resolution_cache.grain = concept_list_to_grain(
+            node.output_concepts, parent_sources=node.resolution_cache.datasources
+        )
+        return node
 
-    # assume grain to be output of select
-    # but don't include anything aggregate at this point
-    assert node.resolution_cache
-    node.resolution_cache.grain = concept_list_to_grain(
-        node.output_concepts, parent_sources=node.resolution_cache.datasources
+    # the rowset's own concepts tie the key to its select
+    node = cached_plan(
+        environment,
+        g,
+        plan_key("rowset", rowset_relevant, targets, additional_relevant),
+        build,
+        depth,
     )
+    if not node:
+        logger.info(
+            f"{padding(depth)}{LOGGER_PREFIX} Cannot generate rowset node for {concept}"
+        )
+        return None
     possible_joins = concept_to_relevant_joins(additional_relevant)
     if not local_optional:
         logger.info(
@@ -1,4 +1,3 @@
-from itertools import combinations
 from typing import List, Optional
 
 from trilogy.core.enums import PurposeLineage
@@ -17,10 +16,14 @@ from trilogy.core.processing.nodes import (
     ConstantNode,
 )
 from trilogy.core.exceptions import NoDatasourceException
-import networkx as nx
-from trilogy.core.graph_models import concept_to_node, datasource_to_node
+from trilogy.core.graph_models import (
+    AnyReferenceGraph,
+    concept_to_node,
+    datasource_to_node,
+)
 from trilogy.constants import logger
 from trilogy.core.processing.utility import padding
+from trilogy.core.processing.cost import scan_cost
 from dataclasses import dataclass
 
 LOGGER_PREFIX = "[GEN_SELECT_NODE]"
@@ -37,11 +40,65 @@ class DatasourceMatch:
         return f"DatasourceMatch({self.key}, {self.datasource.identifier}, {str(self.matched)}, {str(self.partial)})"
 
 
+def datasource_coverage(g: AnyReferenceGraph, datasource: Datasource) -> set[str]:
+    """Default grain concept nodes a datasource can directly provide.
+
+    A datasource covers a concept if the graph reaches the concept's default
+    grain node from the datasource node without passing through any other
+    concept or datasource; equivalent to the shortest path check it replaces,
+    at the cost of a neighbor scan."""
+    ds_node = datasource_to_node(datasource)
+    if ds_node not in g:
+        return set()
+    covered: set[str] = set()
+    for node in g.successors(ds_node):
+        if g.nodes[node].get("type") != "concept":
+            continue
+        covered.add(node)
+        address = g.nodes[node]["concept"].address
+        for child in g.successors(node):
+            if (
+                g.nodes[child].get("type") == "concept"
+                and g.nodes[child]["concept"].address == address
+            ):
+                covered.add(child)
+    return covered
+
+
+def stored_at_grain(datasource: Datasource, concepts: List[Concept]) -> bool:
+    """Aggregates stored in a datasource can only be read directly at the
+    grain they were stored at; any other grain has to aggregate again."""
+    stored = {c.concept.address: c.concept for c in datasource.columns}
+    return all(
+        stored[c.address].grain == c.grain
+        for c in concepts
+        if c.derivation == PurposeLineage.AGGREGATE and c.address in stored
+    )
+
+
+def can_serve(datasource: Datasource, concept: Concept, accept_partial: bool) -> bool:
+    """Whether a datasource that binds a concept can select it directly:
+    complete, unless partial results are accepted, and at the grain it
+    is stored at."""
+    if not accept_partial and any(
+        not c.is_complete and c.concept.address == concept.address
+        for c in datasource.columns
+    ):
+        return False
+    return stored_at_grain(datasource, [concept])
+
+
+def validate_nodes(g: AnyReferenceGraph, nodes: list[str]):
+    for node in nodes:
+        if node not in g:
+            raise SyntaxError("Could not find node for {}".format(node))
+
+
 def dm_to_strategy_node(
     dm: DatasourceMatch,
     target_grain: Grain,
     environment: Environment,
-    g: nx.DiGraph,
+    g: AnyReferenceGraph,
     depth: int,
     accept_partial: bool = False,
 ) -> StrategyNode:
@@ -97,7 +154,7 @@ def dm_to_strategy_node(
 def gen_select_nodes_from_tables_v2(
     mandatory_concept: Concept,
     all_concepts: List[Concept],
-    g: nx.DiGraph,
+    g: AnyReferenceGraph,
     environment: Environment,
     depth: int,
     target_grain: Grain,
@@ -132,46 +189,13 @@ def gen_select_nodes_from_tables_v2(
     nodes_to_find = [concept_to_node(x.with_default_grain()) for x in all_lcl.concepts]
     matches: dict[str, DatasourceMatch] = {}
     for k, datasource in environment.datasources.items():
-        matched = []
-        matched_paths = []
-        for idx, req_concept in enumerate(nodes_to_find):
-            try:
-                path = nx.shortest_path(
-                    g,
-                    source=datasource_to_node(datasource),
-                    target=req_concept,
-                )
-                ds_valid = (
-                    sum(
-                        [
-                            1 if g.nodes[node]["type"] == "datasource" else 0
-                            for node in path
-                        ]
-                    )
-                    == 1
-                )
-                address_valid = (
-                    sum(
-                        [
-                            (
-                                1
-                                if g.nodes[node]["type"] == "concept"
-                                and g.nodes[node]["concept"].address
-                                != all_lcl.concepts[idx].address
-                                else 0
-                            )
-                            for node in path
-                        ]
-                    )
-                    == 0
-                )
-                if ds_valid and address_valid:
-                    matched_paths.append(path)
-                    matched.append(all_lcl.concepts[idx])
-            except nx.NodeNotFound:
-                continue
-            except nx.exception.NetworkXNoPath:
-                continue
+        coverage = datasource_coverage(g, datasource)
+        matched = [
+            all_lcl.concepts[idx]
+            for idx, req_concept in enumerate(nodes_to_find)
+            if req_concept in coverage
+            and stored_at_grain(datasource, [all_lcl.concepts[idx]])
+        ]
         dm = DatasourceMatch(
             key=k,
             datasource=datasource,
@@ -198,12 +222,14 @@ def gen_select_nodes_from_tables_v2(
     if not matches:
         return False, [], []
     while not all_found and not all_checked:
+        # break ties in coverage by the cheapest source to scan
         final_key: str = max(
             matches,
-            key=lambda x: len(
-                [m for m in matches[x].matched.addresses if m not in found]
-            )
-            - 0.1 * len(matches[x].partial.addresses),
+            key=lambda x: (
+                len([m for m in matches[x].matched.addresses if m not in found])
+                - 0.1 * len(matches[x].partial.addresses),
+                -scan_cost(matches[x].datasource, all_lcl.concepts),
+            ),
         )
         final: DatasourceMatch = matches[final_key]
         candidate = dm_to_strategy_node(
@@ -229,7 +255,7 @@ def gen_select_nodes_from_tables_v2(
 def gen_select_node_from_table(
     target_concept: Concept,
     all_concepts: List[Concept],
-    g: nx.DiGraph,
+    g: AnyReferenceGraph,
     environment: Environment,
     depth: int,
     target_grain: Grain,
@@ -255,53 +281,15 @@ def gen_select_node_from_table(
             force_group=False,
         )
     candidates: dict[str, StrategyNode] = {}
-    scores: dict[str, int] = {}
+    scores: dict[str, tuple[int, float]] = {}
     # otherwise, we need to look for a table
     nodes_to_find = [concept_to_node(x.with_default_grain()) for x in all_concepts]
+    if environment.datasources:
+        validate_nodes(g, nodes_to_find)
     for datasource in environment.datasources.values():
-        all_found = True
-        for idx, req_concept in enumerate(nodes_to_find):
-            try:
-                path = nx.shortest_path(
-                    g,
-                    source=datasource_to_node(datasource),
-                    target=req_concept,
-                )
-            except nx.NodeNotFound as e:
-                # just to provide better error
-                ncandidates = [
-                    datasource_to_node(datasource),
-                    req_concept,
-                ]
-                for ncandidate in ncandidates:
-                    try:
-                        g.nodes[ncandidate]
-                    except KeyError:
-                        raise SyntaxError(
-                            "Could not find node for {}".format(ncandidate)
-                        )
-                raise e
-            except nx.exception.NetworkXNoPath:
-                all_found = False
-                break
-            # 2023-10-18 - more strict condition then below
-            # 2023-10-20 - we need this to get through abstract concepts
-            # but we may want to add a filter to avoid using this for anything with lineage
-            # if len(path) != 2:
-            #     all_found = False
-            #     break
-            if len([p for p in path if g.nodes[p]["type"] == "datasource"]) != 1:
-                all_found = False
-                break
-            for node in path:
-                if g.nodes[node]["type"] == "datasource":
-                    continue
-                if g.nodes[node]["concept"].address == all_concepts[idx].address:
-                    continue
-                all_found = False
-                break
-
-        if not all_found:
+        coverage = datasource_coverage(g, datasource)
+        all_found = all(node in coverage for node in nodes_to_find)
+        if not all_found or not stored_at_grain(datasource, all_concepts):
             # skip to next node
             continue
         partial_concepts = [
@@ -366,7 +354,11 @@ def gen_select_node_from_table(
             f"{padding(depth)}{LOGGER_PREFIX} found select node with {datasource.identifier}, returning {candidate.output_lcl}"
         )
         candidates[datasource.identifier] = candidate
-        scores[datasource.identifier] = -len(partial_concepts)
+        # prefer complete sources, then the cheapest to scan
+        scores[datasource.identifier] = (
+            -len(partial_concepts),
+            -scan_cost(datasource, all_concepts),
+        )
     if not candidates:
         return None
     final = max(candidates, key=lambda x: scores[x])
@@ -378,7 +370,7 @@ def gen_select_nodes_from_tables(
     depth: int,
     concept: Concept,
     environment: Environment,
-    g: nx.DiGraph,
+    g: AnyReferenceGraph,
     accept_partial: bool,
     all_concepts: List[Concept],
 ) -> tuple[bool, list[Concept], list[StrategyNode]]:
@@ -387,58 +379,68 @@ def gen_select_nodes_from_tables(
     logger.info(
         f"{padding(depth)}{LOGGER_PREFIX} looking for multiple sources that can satisfy"
     )
-    all_found = False
-    unreachable: list[str] = []
-    # first pass
-    for opt_con in local_optional:
+    # greedy set cover; each round takes the datasource that provides the
+    # most optional concepts not yet found, preferring fewer partial columns
+    # and then the cheapest source to scan
+    nodes = {c.address: concept_to_node(c.with_default_grain()) for c in local_optional}
+    concept_node = concept_to_node(concept.with_default_grain())
+    candidates: dict[str, tuple[Datasource, set[str]]] = {}
+    for key, datasource in environment.datasources.items():
+        coverage = datasource_coverage(g, datasource)
+        # the core concept is required in every source, to join on
+        if concept_node not in coverage or not can_serve(
+            datasource, concept, accept_partial
+        ):
+            continue
+        # only count concepts the source can provide on its own, so a
+        # pick never fails over one partial or differently grained column
+        candidates[key] = (
+            datasource,
+            {
+                c.address
+                for c in local_optional
+                if nodes[c.address] in coverage
+                and can_serve(datasource, c, accept_partial)
+            },
+        )
+    remaining = set(nodes)
+    while remaining and candidates:
+        key = max(
+            candidates,
+            key=lambda x: (
+                len(candidates[x][1] & remaining)
+                - 0.1 * len([c for c in candidates[x][0].columns if not c.is_complete]),
+                -scan_cost(candidates[x][0], [concept, *local_optional]),
+            ),
+        )
+        _, covered = candidates.pop(key)
+        local_combo = [c for c in local_optional if c.address in covered & remaining]
+        if not local_combo:
+            break
+        # include core concept as join
+        combo_concepts = [concept, *local_combo]
         ds = gen_select_node_from_table(
             concept,
-            [concept, opt_con],
+            combo_concepts,
             g=g,
             environment=environment,
             depth=depth + 1,
             accept_partial=accept_partial,
-            target_grain=Grain(components=all_concepts),
+            target_grain=Grain(components=combo_concepts),
         )
         if not ds:
-            unreachable.append(opt_con.address)
-    all_found = False
-    for x in reversed(range(1, len(local_optional) + 1)):
-        if all_found:
-            break
-        for combo in combinations(local_optional, x):
-            if all_found:
-                break
-            # filter to just the original ones we need to get
-            local_combo = [
-                x for x in combo if x not in found and x.address not in unreachable
-            ]
-            # skip if nothing new in this combo
-            if not local_combo:
-                continue
-            # include core concept as join
-            all_concepts = [concept, *local_combo]
-
-            ds = gen_select_node_from_table(
-                concept,
-                all_concepts,
-                g=g,
-                environment=environment,
-                depth=depth + 1,
-                accept_partial=accept_partial,
-                target_grain=Grain(components=all_concepts),
-            )
-            if ds:
-                logger.info(
-                    f"{padding(depth)}{LOGGER_PREFIX} found a source with {[x.address for x in all_concepts]}"
-                )
-                parents.append(ds)
-                found += [x for x in ds.output_concepts if x != concept]
-                if {x.address for x in found} == {c.address for c in local_optional}:
-                    logger.info(
-                        f"{padding(depth)}{LOGGER_PREFIX} found all optional {[c.address for c in local_optional]}"
-                    )
-                    all_found = True
+            continue
+        logger.info(
+            f"{padding(depth)}{LOGGER_PREFIX} found a source with {[x.address for x in combo_concepts]}"
+        )
+        parents.append(ds)
+        found += [x for x in ds.output_concepts if x != concept]
+        remaining -= {x.address for x in found}
+    all_found = not remaining
+    if all_found:
+        logger.info(
+            f"{padding(depth)}{LOGGER_PREFIX} found all optional {[c.address for c in local_optional]}"
+        )
     return all_found, found, parents
 
 
@@ -455,12 +457,12 @@ def gen_select_node(
 ) -> StrategyNode | None:
     all_concepts = [concept] + local_optional
     all_lcl = LooseConceptList(concepts=all_concepts)
+    materialized = {z.address for z in environment.materialized_concepts}
     materialized_lcl = LooseConceptList(
         concepts=[
             x
             for x in all_concepts
-            if x.address in [z.address for z in environment.materialized_concepts]
-            or x.derivation == PurposeLineage.CONSTANT
+            if x.address in materialized or x.derivation == PurposeLineage.CONSTANT
         ]
     )
     if not target_grain:
@@ -16,7 +16,7 @@ class History(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _concepts_to_lookup(self, search: list[Concept], accept_partial: bool) -> str:
-        return "-".join([c.address for c in search]) + str(accept_partial)
+        return "-".join(sorted({c.address for c in search})) + str(accept_partial)
 
     def search_to_history(
         self, search: list[Concept], accept_partial: bool, output: StrategyNode | None
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable, List
+
+from trilogy.constants import CONFIG, PlanCacheConfig, logger
+from trilogy.core.models import (
+    BaseJoin,
+    Comparison,
+    Concept,
+    Conditional,
+    Environment,
+    Grain,
+    Parenthetical,
+    QueryDatasource,
+)
+from trilogy.core.processing.nodes import StaticSelectNode, StrategyNode
+from trilogy.core.processing.utility import padding
+from trilogy.core.query_cache import CacheStats
+
+LOGGER_PREFIX = "[PLAN_CACHE]"
+
+
+def plan_key(kind: str, *groups: Iterable[Concept]) -> tuple:
+    """Key for a plan; the order concepts were requested in doesn't
+    change what they resolve to, so each group is a set."""
+    return (kind, *(frozenset(str(c) for c in group) for group in groups))
+
+
+def copy_plan(
+    datasource: QueryDatasource, copies: dict[int, QueryDatasource] | None = None
+) -> QueryDatasource:
+    """Copy of a resolved plan with its own query datasources, lists and
+    maps; concepts and tables are shared, as nothing downstream edits them."""
+    copies = {} if copies is None else copies
+    if id(datasource) in copies:
+        return copies[id(datasource)]
+
+    def swap(source):
+        if isinstance(source, QueryDatasource):
+            return copy_plan(source, copies)
+        return source
+
+    joins = [
+        (
+            join.model_copy(
+                update={
+                    "left_datasource": swap(join.left_datasource),
+                    "right_datasource": swap(join.right_datasource),
+                    "concepts": list(join.concepts),
+                }
+            )
+            if isinstance(join, BaseJoin)
+            else join
+        )
+        for join in datasource.joins
+    ]
+    copy = datasource.model_copy(
+        update={
+            "input_concepts": list(datasource.input_concepts),
+            "output_concepts": list(datasource.output_concepts),
+            "partial_concepts": list(datasource.partial_concepts),
+            "filter_concepts": list(datasource.filter_concepts),
+            "join_derived_concepts": list(datasource.join_derived_concepts),
+            "datasources": [swap(x) for x in datasource.datasources],
+            "source_map": {
+                k: {swap(x) for x in v} for k, v in datasource.source_map.items()
+            },
+            "joins": joins,
+        }
+    )
+    copies[id(datasource)] = copy
+    return copy
+
+
+@dataclass
+class CachedPlan:
+    datasource: QueryDatasource
+    output_concepts: List[Concept]
+    partial_concepts: List[Concept]
+    conditions: Conditional | Comparison | Parenthetical | None
+
+    @classmethod
+    def from_node(cls, node: StrategyNode) -> "CachedPlan":
+        return cls(
+            datasource=copy_plan(node.resolve()),
+            output_concepts=list(node.output_concepts),
+            partial_concepts=list(node.partial_concepts),
+            conditions=node.conditions,
+        )
+
+    def to_node(self, environment: Environment, g, depth: int = 0) -> StrategyNode:
+        datasource = copy_plan(self.datasource)
+        node = StaticSelectNode(
+            input_concepts=datasource.input_concepts,
+            output_concepts=self.output_concepts,
+            environment=environment,
+            g=g,
+            datasource=datasource,
+            depth=depth,
+            partial_concepts=self.partial_concepts,
+        )
+        node.conditions = self.conditions
+        return node
+
+
+class PlanCache:
+    """LRU cache of resolved strategy nodes, shared by the statements
+    planned against an environment.
+
+    Every entry is dropped when the environment revision changes. Resolved
+    datasources are copied on the way in and out, as the CTE pipeline
+    edits the datasources it is given in place."""
+
+    def __init__(self, config: PlanCacheConfig | None = None):
+        config = config or CONFIG.plan_cache
+        self.max_size = config.max_size
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, CachedPlan] = OrderedDict()
+        self._revision: Hashable = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_revision(self, environment: Environment) -> bool:
+        revision = environment.revision
+        if revision != self._revision:
+            self._entries.clear()
+            self._revision = revision
+        return revision is not None
+
+    def get(self, environment: Environment, key: Hashable) -> CachedPlan | None:
+        if not self._check_revision(environment):
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry
+
+    def put(self, environment: Environment, key: Hashable, node: StrategyNode):
+        # static nodes can't stand in for plans without a grain
+        if not self._check_revision(environment) or node.resolve().grain == Grain():
+            return
+        self._entries[key] = CachedPlan.from_node(node)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+def cached_plan(
+    environment: Environment,
+    g,
+    key: tuple,
+    build: Callable[[], StrategyNode | None],
+    depth: int = 0,
+) -> StrategyNode | None:
+    """The node build() returns, or a static node over the plan it
+    resolved to the last time this key was planned."""
+    if not CONFIG.plan_cache.enabled or g is not environment.graph:
+        return build()
+    cache: PlanCache = environment.plan_cache
+    cached = cache.get(environment, key)
+    if cached is not None:
+        logger.info(f"{padding(depth)}{LOGGER_PREFIX} reusing plan for {key[0]}")
+        return cached.to_node(environment, g, depth)
+    node = build()
+    if node is not None:
+        cache.put(environment, key, node)
+    return node
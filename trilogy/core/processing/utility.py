@@ -1,5 +1,5 @@
 from typing import List, Tuple, Dict, Set
-import networkx as nx
+from trilogy.core.graph_models import CompactGraph
 from trilogy.core.models import (
     Datasource,
     JoinType,
@@ -11,6 +11,7 @@ from trilogy.core.models import (
 
 from trilogy.core.enums import Purpose, Granularity
 from trilogy.core.constants import CONSTANT_DATASET
+from trilogy.core.processing.cost import estimated_rows
 from enum import Enum
 from trilogy.utility import unique
 from collections import defaultdict
@@ -55,7 +56,7 @@ def create_log_lambda(prefix: str, depth: int, logger: Logger):
 
 
 def calculate_graph_relevance(
-    g: nx.DiGraph, subset_nodes: set[str], concepts: set[Concept]
+    g: CompactGraph, subset_nodes: set[str], concepts: set[Concept]
 ) -> int:
     """Calculate the relevance of each node in a graph
     Relevance is used to prune irrelevant nodes from the graph
@@ -88,9 +89,26 @@ def calculate_graph_relevance(
     return relevance
 
 
+def cost_ordered_joins(joins: List[BaseJoin]) -> List[BaseJoin]:
+    """Order joins after the first so inner joins against the smallest
+    sources run first, shrinking intermediate results. Only applied when
+    every source has a row estimate and no full joins are present, as
+    otherwise the reordering can't be shown to help."""
+    if len(joins) < 3 or any(j.join_type == JoinType.FULL for j in joins):
+        return joins
+    estimates = [estimated_rows(j.right_datasource) for j in joins[1:]]
+    if any(e is None for e in estimates):
+        return joins
+    ranked = sorted(
+        zip(joins[1:], estimates),
+        key=lambda x: (x[0].join_type != JoinType.INNER, x[1]),
+    )
+    return [joins[0], *[join for join, _ in ranked]]
+
+
 def resolve_join_order(joins: List[BaseJoin]) -> List[BaseJoin]:
     available_aliases: set[str] = set()
-    final_joins_pre = [*joins]
+    final_joins_pre = cost_ordered_joins(joins)
     final_joins = []
     while final_joins_pre:
         new_final_joins_pre: List[BaseJoin] = []
@@ -128,7 +146,7 @@ def get_node_joins(
     grain: List[Concept],
     # concepts:List[Concept],
 ) -> List[BaseJoin]:
-    graph = nx.Graph()
+    graph = CompactGraph(directed=False)
     concepts: List[Concept] = []
     for datasource in datasources:
         graph.add_node(datasource.identifier, type=NodeType.NODE)
@@ -253,9 +271,7 @@ def get_disconnected_components(
     concept_map: Dict[str, Set[Concept]]
 ) -> Tuple[int, List]:
     """Find if any of the datasources are not linked"""
-    import networkx as nx
-
-    graph = nx.Graph()
+    graph = CompactGraph(directed=False)
     all_concepts = set()
     for datasource, concepts in concept_map.items():
         graph.add_node(datasource, type=NodeType.NODE)
@@ -271,7 +287,7 @@ def get_disconnected_components(
             graph.add_node(concept.address, type=NodeType.CONCEPT)
             graph.add_edge(datasource, concept.address)
             all_concepts.add(concept)
-    sub_graphs = list(nx.connected_components(graph))
+    sub_graphs = graph.connected_components()
     sub_graphs = [
         x for x in sub_graphs if calculate_graph_relevance(graph, x, all_concepts) > 0
     ]
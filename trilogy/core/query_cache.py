@@ -0,0 +1,124 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Callable, Hashable
+
+from trilogy.constants import CONFIG, QueryCacheConfig
+from trilogy.core.models import (
+    Environment,
+    MultiSelectStatement,
+    ProcessedQuery,
+    SelectStatement,
+)
+
+
+def statement_fingerprint(statement: SelectStatement | MultiSelectStatement) -> str:
+    """Canonical fingerprint of a statement; the rendered text
+    plus the grain of each output, which the text alone does not pin down."""
+    from trilogy.parsing.render import Renderer
+
+    parts = [type(statement).__name__, Renderer().to_string(statement)]
+    parts += [str(c) for c in statement.output_components]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CachedQuery:
+    processed: ProcessedQuery
+    created: float
+    sql: str | None = None
+
+
+class QueryCache:
+    """LRU cache of processed queries and their compiled SQL, bounded
+    by size and entry age.
+
+    Keys combine the statement fingerprint with the environment revision,
+    so any change to concepts or datasources misses the cache."""
+
+    def __init__(self, config: QueryCacheConfig | None = None):
+        config = config or CONFIG.query_cache
+        self.max_size = config.max_size
+        self.ttl = config.ttl
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, CachedQuery] = OrderedDict()
+        # id of cached processed query -> key, for compiled sql lookups
+        self._keys: dict[int, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self,
+        environment: Environment,
+        statement: SelectStatement | MultiSelectStatement,
+    ) -> Hashable | None:
+        revision = environment.revision
+        if revision is None:
+            return None
+        return (statement_fingerprint(statement), revision)
+
+    def _lookup(self, key: Hashable) -> CachedQuery | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and monotonic() - entry.created > self.ttl:
+            self._remove(key)
+            self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._keys.pop(id(entry.processed), None)
+
+    def get(self, key: Hashable) -> ProcessedQuery | None:
+        entry = self._lookup(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return entry.processed
+
+    def put(self, key: Hashable, processed: ProcessedQuery):
+        if self.max_size <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedQuery(processed=processed, created=monotonic())
+        self._keys[id(processed)] = key
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def compile(
+        self, processed: ProcessedQuery, compiler: Callable[[ProcessedQuery], str]
+    ) -> str:
+        """Compile a query, reusing the SQL if it came from this cache."""
+        key = self._keys.get(id(processed))
+        entry = self._lookup(key) if key is not None else None
+        if entry is None or entry.processed is not processed:
+            return compiler(processed)
+        if entry.sql is None:
+            entry.sql = compiler(processed)
+        return entry.sql
+
+    def clear(self):
+        self._entries.clear()
+        self._keys.clear()
@@ -1,9 +1,10 @@
 from typing import List, Optional, Set, Union, Dict
 
-from trilogy.core.env_processor import generate_graph
-from trilogy.core.graph_models import ReferenceGraph
+from trilogy.core.env_processor import generate_graph  # noqa: F401
+from trilogy.core.graph_models import AnyReferenceGraph
 from trilogy.core.constants import CONSTANT_DATASET
 from trilogy.core.processing.concept_strategies_v3 import source_query_concepts
+from trilogy.core.processing.plan_cache import cached_plan, plan_key
 from trilogy.constants import CONFIG, DEFAULT_NAMESPACE
 from trilogy.core.models import (
     Environment,
@@ -21,7 +22,10 @@ from trilogy.core.models import (
     Datasource,
     BaseJoin,
     InstantiatedUnnestJoin,
+    Concept,
+    Grain,
 )
+from trilogy.core.enums import Purpose, PurposeLineage
 
 from trilogy.utility import unique
 from collections import defaultdict
@@ -29,10 +33,23 @@ from trilogy.hooks.base_hook import BaseHook
 from trilogy.constants import logger
 from random import shuffle
 from trilogy.core.ergonomics import CTE_NAMES
+from trilogy.core.optimization import (
+    coalesce_projections,
+    deduplicate_ctes,
+    fuse_aggregates,
+    inline_passthroughs,
+    predicate_pushdown,
+    prune_cte_columns,
+    prune_partitions,
+)
 from math import ceil
+from hashlib import sha256
 
 LOGGER_PREFIX = "[QUERY BUILD]"
 
+# CTE_NAMES is deduplicated through a set, so its order varies by process
+SORTED_CTE_NAMES = sorted(CTE_NAMES)
+
 
 def base_join_to_join(
     base_join: BaseJoin | UnnestJoin, ctes: List[CTE]
@@ -138,7 +155,26 @@ def datasource_to_query_datasource(datasource: Datasource) -> QueryDatasource:
     )
 
 
+def hashed_cte_name(full_name: str, name_map: dict[str, str]) -> str:
+    """Name derived only from the datasource identifier, so the same
+    query always renders the same SQL."""
+    if full_name in name_map:
+        return name_map[full_name]
+    digest = sha256(full_name.encode("utf-8")).hexdigest()
+    prefix = SORTED_CTE_NAMES[int(digest[:8], 16) % len(SORTED_CTE_NAMES)]
+    used = set(name_map.values())
+    # lengthen the suffix on the off chance of a collision
+    for length in range(8, len(digest) + 1, 8):
+        new_name = f"{prefix}_{digest[:length]}"
+        if new_name not in used:
+            break
+    name_map[full_name] = new_name
+    return new_name
+
+
 def generate_cte_name(full_name: str, name_map: dict[str, str]) -> str:
+    if CONFIG.hashed_identifiers:
+        return hashed_cte_name(full_name, name_map)
     if CONFIG.human_identifiers:
         if full_name in name_map:
             return name_map[full_name]
@@ -158,8 +194,14 @@ def generate_cte_name(full_name: str, name_map: dict[str, str]) -> str:
 
 
 def datasource_to_ctes(
-    query_datasource: QueryDatasource, name_map: dict[str, str]
+    query_datasource: QueryDatasource,
+    name_map: dict[str, str],
+    cache: dict[int, List[CTE]] | None = None,
 ) -> List[CTE]:
+    # datasources shared by several branches of the plan become one CTE
+    cache = {} if cache is None else cache
+    if id(query_datasource) in cache:
+        return cache[id(query_datasource)]
     output: List[CTE] = []
     parents: list[CTE] = []
     if len(query_datasource.datasources) > 1 or any(
@@ -172,7 +214,7 @@ def datasource_to_ctes(
             else:
                 sub_datasource = datasource_to_query_datasource(datasource)
 
-            sub_cte = datasource_to_ctes(sub_datasource, name_map)
+            sub_cte = datasource_to_ctes(sub_datasource, name_map, cache)
             parents += sub_cte
             all_new_ctes += sub_cte
         source_map = generate_source_map(query_datasource, all_new_ctes)
@@ -225,24 +267,67 @@ def datasource_to_ctes(
             )
 
     output.append(cte)
+    cache[id(query_datasource)] = output
     return output
 
 
+def where_concepts(statement: SelectStatement | MultiSelectStatement) -> List[Concept]:
+    """Concepts the where clause filters on that the query doesn't output,
+    but that can be sourced with the output without changing its grain.
+
+    Only keys and properties whose grain is within the select grain have
+    one value per output row. Anything finer, such as a key that is not
+    selected, would add rows to the output and to any aggregate's group by,
+    so it is left out and the filter is rejected as before."""
+    if not isinstance(statement, SelectStatement) or not statement.where_clause:
+        return []
+    if not CONFIG.optimizations.predicate_pushdown:
+        return []
+    outputs = {c.address for c in statement.output_components}
+    # the statement grain also counts keys in the where clause, so compare
+    # against the grain of the outputs alone
+    output_grain = Grain(
+        components=[
+            c
+            for c in statement.output_components
+            if c.purpose in (Purpose.KEY, Purpose.PROPERTY)
+        ]
+    )
+    found: List[Concept] = []
+    for concept in statement.where_clause.concept_arguments:
+        if concept.address in outputs or concept.derivation == PurposeLineage.CONSTANT:
+            continue
+        if (
+            concept.purpose in (Purpose.KEY, Purpose.PROPERTY)
+            and concept.grain
+            and concept.grain.components
+            and concept.grain.issubset(output_grain)
+        ):
+            found.append(concept)
+    return unique(found, "address")
+
+
 def get_query_datasources(
     environment: Environment,
     statement: SelectStatement | MultiSelectStatement,
-    graph: Optional[ReferenceGraph] = None,
+    graph: Optional[AnyReferenceGraph] = None,
     hooks: Optional[List[BaseHook]] = None,
 ) -> QueryDatasource:
-    graph = graph or generate_graph(environment)
+    graph = graph or environment.graph
     logger.info(
         f"{LOGGER_PREFIX} getting source datasource for query with output {[str(c) for c in statement.output_components]}"
     )
     if not statement.output_components:
         raise ValueError(f"Statement has no output components {statement}")
-    ds = source_query_concepts(
-        statement.output_components, environment=environment, g=graph
+    concepts = statement.output_components + where_concepts(statement)
+    ds = cached_plan(
+        environment,
+        graph,
+        plan_key("query", concepts),
+        lambda: source_query_concepts(concepts, environment=environment, g=graph),
     )
+    if not ds:
+        raise ValueError(f"Could not resolve a plan for {statement}")
     if hooks:
         for hook in hooks:
             hook.process_root_strategy_node(ds)
@@ -251,9 +336,20 @@ def get_query_datasources(
 
 
 def flatten_ctes(input: CTE) -> list[CTE]:
-    output = [input]
-    for cte in input.parent_ctes:
-        output += flatten_ctes(cte)
+    """The input and every CTE it reads from, ordered so that parents come
+    before the CTEs that read them. Shared parents are visited once."""
+    output: list[CTE] = []
+    visited: set[int] = set()
+
+    def visit(cte: CTE):
+        if id(cte) in visited:
+            return
+        visited.add(id(cte))
+        for parent in reversed(cte.parent_ctes):
+            visit(parent)
+        output.append(cte)
+
+    visit(input)
     return output
 
 
@@ -293,35 +389,57 @@ def process_query(
     hooks: List[BaseHook] | None = None,
 ) -> ProcessedQuery:
     hooks = hooks or []
-    graph = generate_graph(environment)
+    graph = environment.graph
     root_datasource = get_query_datasources(
         environment=environment, graph=graph, statement=statement, hooks=hooks
     )
     for hook in hooks:
         hook.process_root_datasource(root_datasource)
+    # names are scoped to the query, so nothing accumulates across queries
+    cte_name_map: dict[str, str] = {}
     # this should always return 1 - TODO, refactor
-    root_cte = datasource_to_ctes(root_datasource, environment.cte_name_map)[0]
+    root_cte = datasource_to_ctes(root_datasource, cte_name_map)[0]
     for hook in hooks:
         hook.process_root_cte(root_cte)
-    raw_ctes: List[CTE] = list(reversed(flatten_ctes(root_cte)))
-    seen = dict()
+    raw_ctes: List[CTE] = flatten_ctes(root_cte)
+    seen: Dict[str, CTE] = dict()
     # we can have duplicate CTEs at this point
     # so merge them together
     for cte in raw_ctes:
         if cte.name not in seen:
             seen[cte.name] = cte
-        else:
+        elif seen[cte.name] is not cte:
             # merge them up
             seen[cte.name] = seen[cte.name] + cte
     for cte in raw_ctes:
         cte.parent_ctes = [seen[x.name] for x in cte.parent_ctes]
     final_ctes: List[CTE] = list(seen.values())
+    if CONFIG.optimizations.deduplication:
+        final_ctes = deduplicate_ctes(root_cte, final_ctes)
+    if CONFIG.optimizations.aggregate_fusion:
+        final_ctes = fuse_aggregates(root_cte, final_ctes)
+    if CONFIG.optimizations.projection_coalescing:
+        final_ctes = coalesce_projections(root_cte, final_ctes)
+    if CONFIG.optimizations.inline_passthroughs:
+        root_cte, final_ctes = inline_passthroughs(root_cte, final_ctes)
+    where_clause = statement.where_clause
+    if CONFIG.optimizations.predicate_pushdown:
+        where_clause = predicate_pushdown(root_cte, final_ctes, where_clause)
+    if CONFIG.optimizations.partition_pruning:
+        prune_partitions(final_ctes)
+    if CONFIG.optimizations.projection_pruning:
+        selected = [*statement.output_components, *statement.hidden_components]
+        if where_clause:
+            selected += where_clause.concept_arguments
+        if statement.order_by:
+            selected += [item.expr for item in statement.order_by.items]
+        prune_cte_columns(root_cte, final_ctes, selected)
 
     return ProcessedQuery(
         order_by=statement.order_by,
         grain=statement.grain,
         limit=statement.limit,
-        where_clause=statement.where_clause,
+        where_clause=where_clause,
         output_columns=statement.output_components,
         ctes=final_ctes,
         base=root_cte,
@@ -44,6 +44,7 @@ from trilogy.core.models import (
     ImportStatement,
 )
 from trilogy.core.query_processor import process_query, process_persist
+from trilogy.core.query_cache import QueryCache
 from trilogy.dialect.common import render_join
 from trilogy.hooks.base_hook import BaseHook
 from trilogy.utility import unique
@@ -228,6 +229,26 @@ def safe_get_cte_value(coalesce, cte: CTE, address: str, rendered: str):
     return coalesce([f"{x}.{rendered}" for x in raw])
 
 
+def cached_process_query(
+    environment: Environment,
+    statement: SelectStatement | MultiSelectStatement,
+    hooks: Optional[List[BaseHook]] = None,
+    cache: Optional[QueryCache] = None,
+) -> ProcessedQuery:
+    # hooks observe the planning process, so always plan when they are set
+    if cache is None or hooks:
+        return process_query(environment, statement, hooks=hooks)
+    key = cache.key(environment, statement)
+    if key is not None:
+        cached = cache.get(key)
+        if cached:
+            return cached
+    processed = process_query(environment, statement, hooks=hooks)
+    if key is not None:
+        cache.put(key, processed)
+    return processed
+
+
 class BaseDialect:
     WINDOW_FUNCTION_MAP = WINDOW_FUNCTION_MAP
     FUNCTION_MAP = FUNCTION_MAP
@@ -470,8 +491,9 @@ class BaseDialect:
                 # if cte.name in where_assignment
                 # else None,
                 group_by=(
+                    # dedupe in order, so identical queries render identically
                     list(
-                        set(
+                        dict.fromkeys(
                             [
                                 self.render_concept_sql(c, cte, alias=False)
                                 for c in unique(
@@ -531,6 +553,7 @@ class BaseDialect:
             | ImportStatement
         ],
         hooks: Optional[List[BaseHook]] = None,
+        cache: Optional[QueryCache] = None,
     ) -> List[ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement]:
         output: List[
             ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement
@@ -546,12 +569,16 @@ class BaseDialect:
                 if hooks:
                     for hook in hooks:
                         hook.process_select_info(statement)
-                output.append(process_query(environment, statement, hooks=hooks))
+                output.append(
+                    cached_process_query(environment, statement, hooks, cache)
+                )
             elif isinstance(statement, MultiSelectStatement):
                 if hooks:
                     for hook in hooks:
                         hook.process_multiselect_info(statement)
-                output.append(process_query(environment, statement, hooks=hooks))
+                output.append(
+                    cached_process_query(environment, statement, hooks, cache)
+                )
             elif isinstance(statement, RowsetDerivationStatement):
                 if hooks:
                     for hook in hooks:
@@ -628,7 +655,8 @@ class BaseDialect:
                     if not x.derivation == PurposeLineage.CONSTANT
                 ]
             )
-            query_output = set([str(z.address) for z in query.output_columns])
+            # filters not pushed into a CTE apply to the columns of the base
+            query_output = set([str(z.address) for z in query.base.output_columns])
             if filter.issubset(query_output):
                 output_where = True
                 found = True
@@ -84,6 +84,7 @@ class Dialects(Enum):
         environment: Optional["Environment"] = None,
         hooks: List["BaseHook"] | None = None,
         conf: DialectConfig | None = None,
+        max_workers: int = 1,
     ) -> "Executor":
         from trilogy import Executor, Environment
 
@@ -92,4 +93,5 @@ class Dialects(Enum):
             environment=environment or Environment(),
             dialect=self,
             hooks=hooks,
+            max_workers=max_workers,
         )
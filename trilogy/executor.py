@@ -1,9 +1,13 @@
-from typing import List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from weakref import WeakSet
+from typing import Callable, List, Optional, Any, Sequence
 from functools import singledispatchmethod
 from sqlalchemy import text
 from sqlalchemy.engine import Engine, CursorResult
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
-from trilogy.constants import logger
+from trilogy.constants import logger, CONFIG
 from trilogy.core.models import (
     Environment,
     ProcessedQuery,
@@ -14,10 +18,21 @@ from trilogy.core.models import (
     PersistStatement,
     ShowStatement,
     Concept,
+    Datasource,
+    DatasourceStatistics,
+    QueryDatasource,
 )
 from trilogy.dialect.base import BaseDialect
+from trilogy.core.query_cache import QueryCache, CacheStats
+from trilogy.result_cache import ResultCache
 from trilogy.dialect.enums import Dialects
 from trilogy.parser import parse_text
+from trilogy.results import (
+    DEFAULT_BATCH_SIZE,
+    StreamingResult,
+    stream_cursor,
+    stream_duckdb,
+)
 from trilogy.hooks.base_hook import BaseHook
 
 from dataclasses import dataclass
@@ -42,6 +57,62 @@ def generate_result_set(columns: List[Concept], output_data: list[Any]) -> MockR
     )
 
 
+def buffer_result(result: Any) -> Any:
+    """Fetch all rows of a result up front, so it outlives its cursor."""
+    if getattr(result, "returns_rows", False):
+        return result.freeze()()
+    return result
+
+
+def _query_sources(query: ProcessedQuery) -> set[str]:
+    """Table addresses a processed query reads from."""
+    found: set[str] = set()
+    stack: list = [cte.source for cte in query.ctes]
+    while stack:
+        source = stack.pop()
+        if isinstance(source, Datasource) and source.metadata.shards:
+            found |= {shard.address.location for shard in source.metadata.shards}
+        elif isinstance(source, Datasource):
+            found.add(source.safe_location)
+        elif isinstance(source, QueryDatasource):
+            stack.extend(source.datasources)
+    return found
+
+
+def _query_targets(query: ProcessedQuery) -> set[str]:
+    """Table addresses a processed query writes to."""
+    if isinstance(query, ProcessedQueryPersist):
+        return {query.output_to.address.location}
+    return set()
+
+
+def execution_stages(
+    statements: Sequence[
+        ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement
+    ],
+) -> list[int]:
+    """Stage index for each statement; statements in a stage are independent
+    of each other, and run after every statement they depend on, which is any
+    earlier statement writing a table they read or write, or reading a table
+    they write."""
+    stages: list[int] = []
+    reads: list[set[str]] = []
+    writes: list[set[str]] = []
+    for statement in statements:
+        if isinstance(statement, ProcessedQuery):
+            read, write = _query_sources(statement), _query_targets(statement)
+        else:
+            read, write = set(), set()
+        stage = 0
+        for idx, prior in enumerate(stages):
+            if (writes[idx] & (read | write)) or (reads[idx] & write):
+                stage = max(stage, prior + 1)
+        stages.append(stage)
+        reads.append(read)
+        writes.append(write)
+    return stages
+
+
 class Executor(object):
     def __init__(
         self,
@@ -49,6 +120,7 @@ class Executor(object):
         engine: Engine,
         environment: Optional[Environment] = None,
         hooks: List[BaseHook] | None = None,
+        max_workers: int = 1,
     ):
         self.dialect: Dialects = dialect
         self.engine = engine
@@ -56,6 +128,18 @@ class Executor(object):
         self.generator: BaseDialect
         self.logger = logger
         self.hooks = hooks
+        # statements run concurrently on pooled connections if above 1
+        self.max_workers = max_workers
+        # guards planning, which mutates the environment and caches
+        self._lock = RLock()
+        # streams still reading from the executor connection
+        self._streams: WeakSet[StreamingResult] = WeakSet()
+        self.query_cache: QueryCache | None = (
+            QueryCache() if CONFIG.query_cache.enabled else None
+        )
+        self.result_cache: ResultCache | None = (
+            ResultCache() if CONFIG.result_cache.enabled else None
+        )
         if self.dialect == Dialects.BIGQUERY:
             from trilogy.dialect.bigquery import BigqueryDialect
 
@@ -89,6 +173,84 @@ class Executor(object):
             raise ValueError(f"Unsupported dialect {self.dialect}")
         self.connection = self.engine.connect()
 
+    @property
+    def shared_pool(self) -> bool:
+        """Whether connections checked out from the engine pool see the
+        same database. Pools that hand each thread its own database, such
+        as in memory DuckDB or SQLite, can't share tables across workers."""
+        pool = getattr(self.engine, "pool", None)
+        return pool is not None and not isinstance(
+            pool, (SingletonThreadPool, StaticPool)
+        )
+
+    @property
+    def pooled(self) -> bool:
+        """Whether statements run on pooled connections rather than the
+        executor connection."""
+        return self.max_workers > 1 and self.shared_pool
+
+    def _generate_queries(
+        self, statements: list
+    ) -> List[ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement]:
+        with self._lock:
+            output = self.generator.generate_queries(
+                self.environment, statements, hooks=self.hooks, cache=self.query_cache
+            )
+            if self.result_cache is not None:
+                # selects map one to one to the plain processed queries
+                selects = [
+                    x
+                    for x in statements
+                    if isinstance(x, (SelectStatement, MultiSelectStatement))
+                ]
+                processed = [x for x in output if type(x) is ProcessedQuery]
+                for statement, query in zip(selects, processed):
+                    if isinstance(statement, SelectStatement):
+                        self.result_cache.track(query, statement)
+            return output
+
+    def _release_connection(self):
+        """Buffer any streams pending on the executor connection, as a
+        connection holds one open result and the next statement would
+        end them."""
+        for stream in list(self._streams):
+            stream.buffer()
+        self._streams.clear()
+
+    def _run_sql(self, sql: str) -> Any:
+        if not self.pooled:
+            with self._lock:
+                self._release_connection()
+                return self.connection.execute(text(sql))
+        return self._run_pooled(sql)
+
+    def _run_pooled(self, sql: str) -> Any:
+        with self.engine.connect() as connection:
+            # buffer rows, as the connection goes back to the pool
+            output = buffer_result(connection.execute(text(sql)))
+            connection.commit()
+        return output
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Hit and miss counts of the compiled query cache."""
+        if self.query_cache is None:
+            return CacheStats()
+        return self.query_cache.stats
+
+    @property
+    def plan_cache_stats(self) -> CacheStats:
+        """Hit and miss counts of plans reused across statements."""
+        return self.environment.plan_cache.stats
+
+    def compile_statement(
+        self, query: ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement
+    ) -> str:
+        with self._lock:
+            if self.query_cache is not None and isinstance(query, ProcessedQuery):
+                return self.query_cache.compile(query, self.generator.compile_statement)
+            return self.generator.compile_statement(query)
+
     def execute_statement(self, statement) -> Optional[CursorResult]:
         if not isinstance(statement, (ProcessedQuery, ProcessedQueryPersist)):
             return None
@@ -100,9 +262,7 @@ class Executor(object):
 
     @execute_query.register
     def _(self, query: SelectStatement | PersistStatement) -> CursorResult:
-        sql = self.generator.generate_queries(
-            self.environment, [query], hooks=self.hooks
-        )
+        sql = self._generate_queries([query])
         return self.execute_query(sql[0])
 
     @execute_query.register
@@ -110,7 +270,7 @@ class Executor(object):
         return generate_result_set(
             query.output_columns,
             [
-                self.generator.compile_statement(x)
+                self.compile_statement(x)
                 for x in query.output_values
                 if isinstance(x, ProcessedQuery)
             ],
@@ -118,13 +278,40 @@ class Executor(object):
 
     @execute_query.register
     def _(self, query: ProcessedQuery | ProcessedQueryPersist) -> CursorResult:
-        sql = self.generator.compile_statement(query)
-        # connection = self.engine.connect()
-        output = self.connection.execute(text(sql))
+        statement = (
+            self.result_cache.statement(query)
+            if self.result_cache is not None
+            and not isinstance(query, ProcessedQueryPersist)
+            else None
+        )
+        if statement is not None:
+            return self._execute_cached(query, statement)
+        sql = self.compile_statement(query)
+        logger.debug(sql)
+        output = self._run_sql(sql)
         if isinstance(query, ProcessedQueryPersist):
-            self.environment.add_datasource(query.datasource)
+            with self._lock:
+                self.environment.add_datasource(query.datasource)
         return output
 
+    def _execute_cached(self, query: ProcessedQuery, statement: SelectStatement) -> Any:
+        """Answer a select from the result cache if possible, caching
+        the result otherwise."""
+        assert self.result_cache is not None
+        with self._lock:
+            cached = self.result_cache.get(self.environment, statement)
+        if cached is not None:
+            columns, rows = cached
+            return MockResult(values=rows, columns=columns)
+        result = self._run_sql(self.compile_statement(query))
+        frozen = result.freeze()
+        rows = frozen().fetchall()
+        with self._lock:
+            self.result_cache.put(
+                self.environment, statement, list(result.keys()), rows
+            )
+        return frozen()
+
     @singledispatchmethod
     def generate_sql(self, command: ProcessedQuery | str) -> list[str]:
         raise NotImplementedError(
@@ -134,18 +321,16 @@ class Executor(object):
     @generate_sql.register  # type: ignore
     def _(self, command: ProcessedQuery) -> List[str]:
         output = []
-        compiled_sql = self.generator.compile_statement(command)
+        compiled_sql = self.compile_statement(command)
         output.append(compiled_sql)
         return output
 
     @generate_sql.register  # type: ignore
     def _(self, command: MultiSelectStatement) -> List[str]:
         output = []
-        sql = self.generator.generate_queries(
-            self.environment, [command], hooks=self.hooks
-        )
+        sql = self._generate_queries([command])
         for statement in sql:
-            compiled_sql = self.generator.compile_statement(statement)
+            compiled_sql = self.compile_statement(statement)
             output.append(compiled_sql)
 
         output.append(compiled_sql)
@@ -154,11 +339,9 @@ class Executor(object):
     @generate_sql.register  # type: ignore
     def _(self, command: SelectStatement) -> List[str]:
         output = []
-        sql = self.generator.generate_queries(
-            self.environment, [command], hooks=self.hooks
-        )
+        sql = self._generate_queries([command])
         for statement in sql:
-            compiled_sql = self.generator.compile_statement(statement)
+            compiled_sql = self.compile_statement(statement)
             output.append(compiled_sql)
         return output
 
@@ -169,14 +352,12 @@ class Executor(object):
         generatable = [
             x for x in parsed if isinstance(x, (SelectStatement, PersistStatement))
         ]
-        sql = self.generator.generate_queries(
-            self.environment, generatable, hooks=self.hooks
-        )
+        sql = self._generate_queries(generatable)
         output = []
         for statement in sql:
             if isinstance(statement, ProcessedShowStatement):
                 continue
-            compiled_sql = self.generator.compile_statement(statement)
+            compiled_sql = self.compile_statement(statement)
             output.append(compiled_sql)
         return output
 
@@ -184,6 +365,12 @@ class Executor(object):
         self, command: str, persist: bool = False
     ) -> List[ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement]:
         """Process a preql text command"""
+        with self._lock:
+            return self._parse_text(command, persist)
+
+    def _parse_text(
+        self, command: str, persist: bool = False
+    ) -> List[ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement]:
         _, parsed = parse_text(command, self.environment)
         generatable = [
             x
@@ -201,42 +388,178 @@ class Executor(object):
         sql = []
         while generatable:
             t = generatable.pop(0)
-            x = self.generator.generate_queries(
-                self.environment, [t], hooks=self.hooks
-            )[0]
+            x = self._generate_queries([t])[0]
             if persist and isinstance(x, ProcessedQueryPersist):
                 self.environment.add_datasource(x.datasource)
             sql.append(x)
         return sql
 
+    @singledispatchmethod
+    def execute_stream(
+        self, query, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> StreamingResult:
+        """Run a query, returning a result read in batches of batch_size
+        rows rather than all at once"""
+        raise NotImplementedError("Cannot stream type {}".format(type(query)))
+
+    @execute_stream.register
+    def _(self, query: str, batch_size: int = DEFAULT_BATCH_SIZE) -> StreamingResult:
+        # run anything before the final select, and stream that
+        statements = self.parse_text(query)
+        if not statements:
+            raise ValueError("No statements to stream")
+        for statement in statements[:-1]:
+            self.execute_query(statement)
+        return self.execute_stream(statements[-1], batch_size)
+
+    @execute_stream.register
+    def _(
+        self, query: SelectStatement, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> StreamingResult:
+        sql = self._generate_queries([query])
+        return self.execute_stream(sql[0], batch_size)
+
+    @execute_stream.register
+    def _(
+        self, query: ProcessedQuery, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> StreamingResult:
+        if isinstance(query, ProcessedQueryPersist):
+            raise NotImplementedError("Cannot stream a persist statement")
+        sql = self.compile_statement(query)
+        if self.pooled:
+            # hold a connection from the pool until the stream is consumed
+            connection = self.engine.connect()
+            on_close: Callable[[], None] | None = connection.close
+        else:
+            connection = self.connection
+            on_close = None
+        native = self._native_duckdb(connection)
+        with self._lock:
+            if not self.pooled:
+                self._release_connection()
+            if native is not None:
+                stream = stream_duckdb(
+                    native, sql, query.output_columns, batch_size, on_close
+                )
+            else:
+                if hasattr(connection, "execution_options"):
+                    # server side cursors, where the driver supports them
+                    connection = connection.execution_options(stream_results=True)
+                result = connection.execute(text(sql))
+                stream = stream_cursor(
+                    result, query.output_columns, batch_size, on_close
+                )
+            if not self.pooled:
+                self._streams.add(stream)
+        return stream
+
+    def _native_duckdb(self, connection) -> Any:
+        """The underlying duckdb connection, to skip building
+        SQLAlchemy rows"""
+        if self.dialect != Dialects.DUCK_DB:
+            return None
+        dbapi = getattr(
+            getattr(connection, "connection", None), "dbapi_connection", None
+        )
+        return dbapi if hasattr(dbapi, "fetch_record_batch") else None
+
     def execute_raw_sql(self, command: str) -> CursorResult:
         """Run a command against the raw underlying
         execution engine"""
-        return self.connection.execute(text(command))
+        return self._run_sql(command)
+
+    def analyze_datasource(self, datasource: Datasource) -> DatasourceStatistics:
+        """Collect row and distinct counts for a datasource; only
+        plain column aliases can be counted"""
+        columns = [c for c in datasource.columns if isinstance(c.alias, str)]
+        quote = self.generator.QUOTE_CHARACTER
+        counts = "".join(f", count(distinct {quote}{c.alias}{quote})" for c in columns)
+        row = self.execute_raw_sql(
+            f"SELECT count(*){counts} FROM {datasource.safe_location} as analyzed"
+        ).fetchone()
+        return DatasourceStatistics(
+            row_count=row[0],
+            bytes=datasource.statistics.bytes if datasource.statistics else None,
+            distinct_counts={
+                c.concept.address: row[idx + 1] for idx, c in enumerate(columns)
+            },
+        )
 
     def execute_text(self, command: str) -> List[CursorResult]:
         """Run a preql text command"""
         sql = self.parse_text(command)
         output = []
-        # connection = self.engine.connect()
         for statement in sql:
             if isinstance(statement, ProcessedShowStatement):
                 output.append(
                     generate_result_set(
                         statement.output_columns,
                         [
-                            self.generator.compile_statement(x)
+                            self.compile_statement(x)
                             for x in statement.output_values
                             if isinstance(x, ProcessedQuery)
                         ],
                     )
                 )
                 continue
-            compiled_sql = self.generator.compile_statement(statement)
-            logger.debug(compiled_sql)
+            output.append(self.execute_query(statement))
+        return output
 
-            output.append(self.connection.execute(text(compiled_sql)))
-            # generalize post-run success hooks
-            if isinstance(statement, ProcessedQueryPersist):
-                self.environment.add_datasource(statement.datasource)
+    def execute_many(
+        self,
+        statements: Sequence[
+            ProcessedQuery | ProcessedQueryPersist | ProcessedShowStatement
+        ],
+        max_workers: int | None = None,
+    ) -> List[Any]:
+        """Run processed statements, concurrently where they don't depend
+        on each other, returning results in statement order.
+
+        A statement waits for any earlier persist that writes a table it
+        reads or writes, and persists wait for earlier reads of their target.
+        Without a shareable pool, statements run in order on the executor
+        connection."""
+        workers = max_workers or self.max_workers
+        compiled: list[str | None] = []
+        output: list[Any] = [None] * len(statements)
+        for idx, statement in enumerate(statements):
+            if isinstance(statement, ProcessedShowStatement):
+                output[idx] = self.execute_query(statement)
+                compiled.append(None)
+            else:
+                compiled.append(self.compile_statement(statement))
+        stages = execution_stages(statements)
+        if workers <= 1 or not self.shared_pool:
+            for idx, sql in enumerate(compiled):
+                if sql is None:
+                    continue
+                # buffer rows, as the next statement invalidates the cursor
+                with self._lock:
+                    self._release_connection()
+                    result = buffer_result(self.connection.execute(text(sql)))
+                output[idx] = self._finish(statements[idx], result)
+            return output
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for stage in sorted(set(stages)):
+                futures = [
+                    (idx, pool.submit(self._run_pooled, sql))
+                    for idx, sql in enumerate(compiled)
+                    if sql is not None and stages[idx] == stage
+                ]
+                # register persisted datasources in order once the stage lands
+                for idx, future in futures:
+                    output[idx] = self._finish(statements[idx], future.result())
         return output
+
+    def _finish(self, statement, result: Any) -> Any:
+        if isinstance(statement, ProcessedQueryPersist):
+            with self._lock:
+                self.environment.add_datasource(statement.datasource)
+        return result
+
+    def execute_text_concurrent(
+        self, command: str, max_workers: int | None = None
+    ) -> List[Any]:
+        """Run a preql text command, executing independent statements
+        concurrently on pooled connections"""
+        return self.execute_many(self.parse_text(command), max_workers=max_workers)
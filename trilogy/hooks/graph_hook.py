@@ -1,4 +1,5 @@
 from trilogy.hooks.base_hook import BaseHook
+from trilogy.core.graph_models import CompactGraph
 from networkx import DiGraph
 
 
@@ -10,11 +11,11 @@ class GraphHook(BaseHook):
         except ImportError:
             raise ImportError("GraphHook requires matplotlib and scipy to be installed")
 
-    def query_graph_built(self, graph: DiGraph):
+    def query_graph_built(self, graph: DiGraph | CompactGraph):
         from networkx import draw_kamada_kawai
         from matplotlib import pyplot as plt
 
-        graph = graph.copy()
+        graph = graph.to_networkx() if isinstance(graph, CompactGraph) else graph.copy()
         nodes = [*graph.nodes]
         for node in nodes:
             if "__preql_internal" in node:
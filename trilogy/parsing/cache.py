@@ -0,0 +1,104 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from trilogy.constants import CONFIG, logger
+from trilogy.core.models import Environment, get_version
+
+IMPORT_CACHE_SUFFIX = ".preqlc"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedImport:
+    version: str
+    environment: Environment
+    # resolved path -> content hash of every file transitively imported
+    dependencies: dict[str, str] = field(default_factory=dict)
+
+
+class ImportCache:
+    """On disk cache of the parsed environment of imported files.
+
+    Entries are keyed by the trilogy version, the file path and a hash
+    of the file contents, and are invalidated if any file it imports
+    has changed since it was written. Environments are pickled, as
+    they can contain circular references that do not round trip
+    through JSON."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def key(self, target: str | Path, text: str) -> str:
+        return content_hash(f"{get_version()}:{Path(target).resolve()}:{text}")
+
+    def entry_path(self, target: str | Path, text: str) -> Path:
+        return self.path / f"{self.key(target, text)}{IMPORT_CACHE_SUFFIX}"
+
+    def get(self, target: str | Path, text: str) -> CachedImport | None:
+        path = self.entry_path(target, text)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                entry: CachedImport = pickle.load(f)
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable import cache entry {path}: {e}")
+            return None
+        if entry.version != get_version():
+            return None
+        for dependency, expected in entry.dependencies.items():
+            try:
+                with open(dependency, "r", encoding="utf-8") as f:
+                    current = content_hash(f.read())
+            except OSError:
+                return None
+            if current != expected:
+                return None
+        return entry
+
+    def put(
+        self,
+        target: str | Path,
+        text: str,
+        environment: Environment,
+        dependencies: dict[str, str] | None = None,
+    ) -> Path | None:
+        """Write an entry, returning its path. The cache is best effort;
+        if the entry can't be written it is logged and skipped."""
+        path = self.entry_path(target, text)
+        entry = CachedImport(
+            version=get_version(),
+            environment=environment,
+            dependencies=dependencies or {},
+        )
+        staged: str | None = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # write then rename, so concurrent readers never see a partial
+            # file; each writer, in any process or thread, stages to its own
+            with tempfile.NamedTemporaryFile(
+                dir=self.path, suffix=".tmp", delete=False
+            ) as f:
+                staged = f.name
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(staged, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            # TypeError and AttributeError are raised for unpicklable objects
+            logger.warning(f"Unable to write import cache entry {path}: {e}")
+            if staged:
+                Path(staged).unlink(missing_ok=True)
+            return None
+        return path
+
+
+def get_import_cache() -> ImportCache | None:
+    if not CONFIG.import_cache_path:
+        return None
+    return ImportCache(CONFIG.import_cache_path)
@@ -1,5 +1,6 @@
+from dataclasses import dataclass, field
 from os.path import dirname, join
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from re import IGNORECASE
 from lark import Lark, Transformer, v_args
 from lark.exceptions import (
@@ -10,13 +11,16 @@ from lark.exceptions import (
     VisitError,
 )
 from pathlib import Path
-from lark.tree import Meta
+from lark.tree import Meta, Tree
 from pydantic import ValidationError
 from trilogy.core.internal import INTERNAL_NAMESPACE, ALL_ROWS_CONCEPT
 from trilogy.constants import (
+    CONFIG,
     DEFAULT_NAMESPACE,
     NULL_VALUE,
     VIRTUAL_CONCEPT_PREFIX,
+    ParserMode,
+    logger,
 )
 from trilogy.core.enums import (
     BooleanOperator,
@@ -54,6 +58,10 @@ from trilogy.core.functions import (
 )
 from trilogy.core.models import (
     Address,
+    DatasourceMetadata,
+    DatasourceStatistics,
+    Shard,
+    shard_location,
     AlignClause,
     AlignItem,
     AggregateWrapper,
@@ -99,8 +107,10 @@ from trilogy.core.models import (
     ConceptDerivation,
     RowsetDerivationStatement,
     LooseConceptList,
+    identical_concepts,
 )
 from trilogy.parsing.exceptions import ParseError
+from trilogy.parsing.cache import content_hash, get_import_cache
 from trilogy.utility import string_to_hash
 from trilogy.parsing.common import (
     agg_wrapper_to_concept,
@@ -147,9 +157,21 @@ grammar = r"""
     prop_ident: "<" (IDENTIFIER ",")* IDENTIFIER ","? ">" "." IDENTIFIER
 
     // datasource concepts
-    datasource: "datasource" IDENTIFIER  "("  column_assignment_list ")"  grain_clause? (address | query)
+    datasource: "datasource" IDENTIFIER  "("  column_assignment_list ")"  grain_clause? partition_clause? statistics_clause? (address | query | shards)
     
     grain_clause: "grain" "(" column_list ")"
+
+    partition_clause: "partition"i "(" column_list ")"
+
+    statistic: IDENTIFIER ":" int_lit
+
+    distinct_statistics: "distinct"i "(" statistic ("," statistic)* ","? ")"
+
+    statistics_clause: "statistics"i "(" (statistic | distinct_statistics) ("," (statistic | distinct_statistics))* ","? ")"
+
+    shard: literal ":" ADDRESS
+
+    shards: "shards"i "(" shard ("," shard)* ","? ")"
     
     address: "address" ADDRESS
     
@@ -398,11 +420,334 @@ grammar = r"""
     %ignore WS
 """  # noqa: E501
 
-PARSER = Lark(
+# an LALR(1) compatible restatement of the grammar above.
+# rules and terminals keep the same names, so the trees
+# it produces are consumed by the same transformer.
+# inputs it can not handle fall back to the earley grammar.
+# changes to one grammar must be made to both; tests/test_parser_modes.py
+# checks they parse every .preql file in the tests to the same tree.
+lalr_grammar = r"""
+    !start: ( block | show_statement | comment )*
+    block: statement _TERMINATOR comment?
+    ?statement: concept
+    | datasource
+    | function
+    | multi_select_statement
+    | select_statement
+    | persist_statement
+    | rowset_derivation_statement
+    | import_statement
+    | merge_statement
+
+    _TERMINATOR:  ";"i /\s*/
+
+    comment:   /#.*(\n|$)/ |  /\/\/.*\n/
+
+    concept_declaration: PURPOSE IDENTIFIER data_type concept_nullable_modifier? metadata?
+    concept_property_declaration: PROPERTY (prop_ident | IDENTIFIER) data_type concept_nullable_modifier? metadata?
+    concept_derivation:  (PURPOSE | AUTO | PROPERTY ) IDENTIFIER "<-" expr
+
+    rowset_derivation_statement: ("rowset"i IDENTIFIER "<-" (multi_select_statement | select_statement)) | ("with"i IDENTIFIER "as"i (multi_select_statement | select_statement))
+
+    concept_nullable_modifier: "?"
+    concept:  (concept_declaration | concept_derivation | concept_property_declaration)
+
+    prop_ident: "<" IDENTIFIER ("," IDENTIFIER)* ","? ">" "." IDENTIFIER
+
+    datasource: "datasource" IDENTIFIER  "("  column_assignment_list ")"  grain_clause? partition_clause? statistics_clause? (address | query | shards)
+
+    grain_clause: "grain" "(" column_list ")"
+
+    partition_clause: "partition"i "(" column_list ")"
+
+    statistic: IDENTIFIER ":" int_lit
+
+    distinct_statistics: "distinct"i "(" statistic ("," statistic)* ","? ")"
+
+    statistics_clause: "statistics"i "(" (statistic | distinct_statistics) ("," (statistic | distinct_statistics))* ","? ")"
+
+    shard: literal ":" ADDRESS
+
+    shards: "shards"i "(" shard ("," shard)* ","? ")"
+
+    address: "address" ADDRESS
+
+    query: "query" MULTILINE_STRING
+
+    concept_assignment: IDENTIFIER | (MODIFIER "[" concept_assignment "]" ) | (SHORTHAND_MODIFIER concept_assignment  )
+
+    column_assignment: ((LABEL | raw_column_assignment | _static_functions ) ":" concept_assignment)
+
+    raw_column_assignment: "raw" "(" MULTILINE_STRING ")"
+
+    column_assignment_list : column_assignment ("," column_assignment)* ","?
+
+    column_list : IDENTIFIER ("," IDENTIFIER)* ","?
+
+    import_statement: "import" (IDENTIFIER ".") * IDENTIFIER "as"i IDENTIFIER
+
+    persist_statement: "persist"i IDENTIFIER "into"i IDENTIFIER "from"i select_statement grain_clause?
+
+    select_statement: "select"i select_list  where? comment* (order_by comment*)? (limit comment*)?
+
+    multi_select_statement: select_statement ("merge" select_statement)+ "align"i align_clause  where? comment* (order_by comment*)? (limit comment*)?
+
+    align_item: LABEL ":" IDENTIFIER ("," IDENTIFIER)* ","?
+
+    align_clause: align_item+
+
+    merge_statement: "merge" IDENTIFIER ("," IDENTIFIER)* ","? comment*
+
+    function: raw_function
+    function_binding_item: IDENTIFIER data_type
+    function_binding_list: function_binding_item ("," function_binding_item)* ","?
+    raw_function: "def" "rawsql"  IDENTIFIER  "("  function_binding_list ")" "->" data_type "as"i MULTILINE_STRING
+
+    filter_item: "filter"i IDENTIFIER where
+
+    WINDOW_TYPE.2: ("row_number"i|"rank"i|"lag"i|"lead"i | "sum"i)  /[\s]+/
+
+    window_item: WINDOW_TYPE IDENTIFIER window_item_over? window_item_order?
+
+    window_item_over: ("OVER"i over_list)
+
+    window_item_order: ("ORDER"i? "BY"i order_list)
+
+    select_hide_modifier: "--"
+    select_partial_modifier: "~"
+    select_item: (select_hide_modifier | select_partial_modifier)? (IDENTIFIER | select_transform)
+
+    select_list: select_item ("," select_item)* ","?
+
+    _assignment: "->" | "as"i
+    select_transform : expr _assignment IDENTIFIER metadata?
+
+    metadata: "metadata" "(" IDENTIFIER "=" _string_lit ")"
+
+    limit: "LIMIT"i /[0-9]+/
+
+    order_list: expr ORDERING ("," expr ORDERING)* ","?
+
+    over_list: IDENTIFIER ("," IDENTIFIER)* ","?
+
+    ORDERING.2: /(ASC|DESC)\b/i
+
+    order_by: "ORDER"i "BY"i order_list
+
+    LOGICAL_OPERATOR.2: /(AND|OR)\b/i
+
+    conditional: expr LOGICAL_OPERATOR (conditional | expr)
+
+    where: "WHERE"i (expr | conditional)
+
+    expr_reference: IDENTIFIER
+
+    !array_comparison: ( ("NOT"i "IN"i) | "IN"i)
+
+    COMPARISON_OPERATOR: (/is[\s]+not\b/ | /is\b/ |"=" | ">" | "<" | ">=" | "<=" | "!="  )
+
+    // operator precedence is encoded by rule nesting, as LALR can not
+    // resolve the ambiguous binary operator productions of the earley grammar
+    ?expr: comparison | alt_like | sum_expr
+
+    comparison: (sum_expr COMPARISON_OPERATOR sum_expr) | (sum_expr array_comparison expr_tuple)
+
+    alt_like: sum_expr "like"i sum_expr
+
+    ?sum_expr: product_expr
+    | sum_expr "+" product_expr -> fadd
+    | sum_expr "-" product_expr -> fsub
+    | sum_expr "||" product_expr -> concat
+
+    ?product_expr: unary_expr
+    | product_expr "*" unary_expr -> fmul
+    | product_expr "/" unary_expr -> fdiv
+    | product_expr "%" unary_expr -> fmod
+
+    ?unary_expr: postfix_expr | fnot
+
+    ?postfix_expr: atom | index_access | attr_access
+
+    ?atom: window_item | filter_item | fgroup |  aggregate_functions | unnest | _call_functions | literal |  expr_reference  | parenthetical
+
+    expr_tuple: "(" expr ("," expr)* ","? ")"
+
+    unnest: "UNNEST"i "(" expr ")"
+    index_access: postfix_expr "[" int_lit "]"
+    attr_access: postfix_expr  "[" _string_lit "]"
+
+    parenthetical: "(" (conditional | expr) ")"
+
+    fadd: "add"i "(" expr "," expr ")"
+    fsub: "subtract"i "(" expr "," expr ")"
+    fmul: "multiply"i "(" expr "," expr ")"
+    fdiv: "divide"i "(" expr "," expr ")"
+    fmod: "mod"i "(" expr "," expr ")"
+    fround: "round"i "(" expr "," expr ")"
+    fabs: "abs"i "(" expr ")"
+
+    _math_functions: fadd | fsub | fmul | fdiv | fround | fmod | fabs
+
+    fcast: "cast"i "(" expr "as"i data_type ")"
+    concat: "concat"i "(" expr ("," expr)* ")"
+    fcoalesce: "coalesce"i "(" expr ("," expr)* ")"
+    fcase_when: "WHEN"i (expr | conditional) "THEN"i expr
+    fcase_else: "ELSE"i expr
+    fcase: "CASE"i (fcase_when)* (fcase_else)? "END"i
+    len: "len"i "(" expr ")"
+    fnot: "NOT"i unary_expr
+
+    _generic_functions: fcast | concat | fcoalesce | fcase | len
+
+    fcurrent_date: "current_date"i "(" ")"
+    fcurrent_datetime: "current_datetime"i "(" ")"
+
+    _constant_functions: fcurrent_date | fcurrent_datetime
+
+    like: "like"i "(" expr "," _string_lit ")"
+    ilike: "ilike"i "(" expr "," _string_lit ")"
+    upper: "upper"i "(" expr ")"
+    lower: "lower"i "(" expr ")"
+    fsplit: "split"i "(" expr "," _string_lit ")"
+    fstrpos: "strpos"i "(" expr "," expr ")"
+    fsubstring: "substring"i "(" expr "," expr "," expr ")"
+
+    _string_functions: like | ilike | upper | lower | fsplit | fstrpos | fsubstring
+
+    fgroup: "group"i "(" expr ")" aggregate_over?
+    count: "count"i "(" expr ")"
+    count_distinct: "count_distinct"i "(" expr ")"
+    sum: "sum"i "(" expr ")"
+    avg: "avg"i "(" expr ")"
+    max: "max"i "(" expr ")"
+    min: "min"i "(" expr ")"
+
+    aggregate_all: "*"
+    aggregate_over: ("BY"i (aggregate_all | over_list))
+    aggregate_functions: (count | count_distinct | sum | avg | max | min) aggregate_over?
+
+    fdate: "date"i "(" expr ")"
+    fdatetime: "datetime"i "(" expr ")"
+    ftimestamp: "timestamp"i "(" expr ")"
+
+    fsecond: "second"i "(" expr ")"
+    fminute: "minute"i "(" expr ")"
+    fhour: "hour"i "(" expr ")"
+    fday: "day"i "(" expr ")"
+    fday_of_week: "day_of_week"i "(" expr ")"
+    fweek: "week"i "(" expr ")"
+    fmonth: "month"i "(" expr ")"
+    fquarter: "quarter"i  "(" expr ")"
+    fyear: "year"i "(" expr ")"
+
+    DATE_PART.2: /(DAY|WEEK|MONTH|QUARTER|YEAR|MINUTE|HOUR|SECOND)\b/i
+    fdate_trunc: "date_trunc"i "(" expr "," DATE_PART ")"
+    fdate_part: "date_part"i "(" expr "," DATE_PART ")"
+    fdate_add: "date_add"i "(" expr "," DATE_PART "," int_lit ")"
+    fdate_diff: "date_diff"i "(" expr "," expr "," DATE_PART ")"
+
+    _date_functions: fdate | fdate_add | fdate_diff | fdatetime | ftimestamp | fsecond | fminute | fhour | fday | fday_of_week | fweek | fmonth | fquarter | fyear | fdate_part | fdate_trunc
+
+    _call_functions: _string_functions | _math_functions | _generic_functions | _constant_functions| _date_functions
+
+    _static_functions: _call_functions | alt_like | fnot
+
+    // an identifier immediately followed by a colon, so keys do not need an extra token of lookahead
+    LABEL.2: /[a-zA-Z_][a-zA-Z0-9_\\-\\.\-]*(?=\s*:)/
+    IDENTIFIER: /[a-zA-Z_][a-zA-Z0-9_\\-\\.\-]*/
+    ADDRESS: /[a-zA-Z_][a-zA-Z0-9_\\-\\.\-\*]*/ | /`[a-zA-Z_][a-zA-Z0-9_\\-\\.\-\*]*`/
+
+    MULTILINE_STRING: /\'{3}(.*?)\'{3}/s
+
+    DOUBLE_STRING_CHARS: /(?:(?!\${)([^"\\]|\\.))+/+ // any character except "
+    SINGLE_STRING_CHARS: /(?:(?!\${)([^'\\]|\\.))+/+ // any character except '
+    _single_quote: "'" ( SINGLE_STRING_CHARS )* "'"
+    _double_quote: "\"" ( DOUBLE_STRING_CHARS )* "\""
+    _string_lit: _single_quote | _double_quote
+
+    MINUS: "-"
+
+    int_lit: MINUS? /[0-9]+/
+
+    float_lit: /[0-9]*\.[0-9]+/
+
+    array_lit: "[" literal ("," literal)* ","? "]"
+
+    !bool_lit: "True"i | "False"i
+
+    !null_lit: "null"i
+
+    literal: _string_lit | int_lit | float_lit | bool_lit | null_lit | array_lit
+
+    MODIFIER.2: /(Optional|Partial|Nullable)\b/i
+
+    SHORTHAND_MODIFIER: "~"
+
+    struct_type: "struct" "<" (data_type | IDENTIFIER) ("," (data_type | IDENTIFIER))* ","? ">"
+
+    list_type: "list" "<" data_type ">"
+
+    !data_type: "string"i | "number"i | "numeric"i | "map"i | "list"i | "array"i | "any"i | "int"i | "bigint" | "date"i | "datetime"i | "timestamp"i | "float"i | "bool"i | struct_type | list_type
+
+    PURPOSE.2: /(key|metric|constant|const)\b/i
+    PROPERTY.2: /property\b/i
+    AUTO.2: /AUTO\b/i
+
+    CONCEPTS.2: /CONCEPTS\b/i
+    DATASOURCES.2: /DATASOURCES\b/i
+
+    show_category: CONCEPTS | DATASOURCES
+
+    show_statement: "show"i ( show_category | select_statement | persist_statement) _TERMINATOR
+
+    %import common.WS
+    %ignore WS
+"""  # noqa: E501
+
+EARLEY_PARSER = Lark(
     grammar, start="start", propagate_positions=True, g_regex_flags=IGNORECASE
 )
 
 
+class TrilogyParser:
+    """Parse with the LALR grammar, falling back to earley
+    for any text the LALR grammar rejects."""
+
+    def __init__(self, mode: ParserMode | None = None):
+        self.mode = mode
+        self._lalr: Lark | None = None
+
+    @property
+    def lalr(self) -> Lark:
+        # building the parse table is slow, so defer until first use
+        if self._lalr is None:
+            self._lalr = Lark(
+                lalr_grammar,
+                start="start",
+                parser="lalr",
+                propagate_positions=True,
+                g_regex_flags=IGNORECASE,
+                cache=True,
+            )
+        return self._lalr
+
+    @property
+    def earley(self) -> Lark:
+        return EARLEY_PARSER
+
+    def parse(self, text: str) -> Tree:
+        mode = self.mode or CONFIG.parser_mode
+        if mode == ParserMode.LALR:
+            try:
+                return self.lalr.parse(text)
+            except UnexpectedInput as e:
+                logger.debug(f"LALR parse failed, falling back to earley: {e}")
+        return self.earley.parse(text)
+
+
+PARSER = TrilogyParser()
+
+
 def parse_concept_reference(
     name: str, environment: Environment, purpose: Optional[Purpose] = None
 ) -> Tuple[str, str, str, str | None]:
@@ -460,6 +805,15 @@ def unwrap_transformation(
         )
 
 
+@dataclass
+class ParsedStatement:
+    tree: Tree
+    result: Any
+    # referenced a concept or import that was not yet fully defined
+    missing: bool = False
+    imports: list["ParseToObjects"] = field(default_factory=list)
+
+
 class ParseToObjects(Transformer):
     def __init__(
         self,
@@ -478,13 +832,45 @@ class ParseToObjects(Transformer):
         # after initial parsing
         self.pass_count = 1
         self._results_stash = None
-
-    def transform(self, tree):
-        results = super().transform(tree)
+        self._statements: list[ParsedStatement] = []
+        self._statement_imports: list[ParseToObjects] = []
+        self._statement_partial = False
+        # set if the second pass had to re-transform any statements
+        self.rehydrated = False
+        # path -> content hash of every file transitively imported
+        self.dependencies: dict[str, str] = {}
+        # environments of imports loaded from the on disk cache
+        self.cached_imports: dict[str, Environment] = {}
+
+    def transform(self, tree: Tree):
+        # transform statement by statement, recording which ones
+        # hit undefined concepts so the second pass can be limited to them
+        self._statements = [
+            ParsedStatement(tree=child, result=None) for child in tree.children
+        ]
+        for statement in self._statements:
+            self._transform_statement(statement)
+        results = self.start([statement.result for statement in self._statements])
         self._results_stash = results
         self.environment._parse_count += 1
         return results
 
+    def _transform_statement(self, statement: "ParsedStatement"):
+        concepts = self.environment.concepts
+        prior = concepts.undefined
+        concepts.undefined = {}
+        self._statement_imports = []
+        self._statement_partial = False
+        try:
+            statement.result = super().transform(statement.tree)
+            statement.missing = self._statement_partial or bool(concepts.undefined)
+            statement.imports = self._statement_imports
+        finally:
+            concepts.undefined = {**prior, **concepts.undefined}
+
+    def _requires_rehydration(self, statement: "ParsedStatement") -> bool:
+        return statement.missing or any(x.rehydrated for x in statement.imports)
+
     def hydrate_missing(self):
         self.pass_count = 2
         for k, v in self.parsed.items():
@@ -493,11 +879,39 @@ class ParseToObjects(Transformer):
                 continue
             v.hydrate_missing()
         self.environment.concepts.fail_on_missing = True
-        # if not self.environment.concepts.undefined:
-        #     return self._results_stash
-        reparsed = self.transform(PARSER.parse(self.text))
+        start = next(
+            (
+                idx
+                for idx, statement in enumerate(self._statements)
+                if self._requires_rehydration(statement)
+            ),
+            None,
+        )
+        if start is None:
+            self.cache_environment()
+            return self._results_stash
+        # anything after the first unresolved statement may depend on it
+        for statement in self._statements[start:]:
+            self._transform_statement(statement)
+        self.rehydrated = True
         self.environment.concepts.undefined = {}
-        return reparsed
+        results = self.start([statement.result for statement in self._statements])
+        self._results_stash = results
+        self.environment._parse_count += 1
+        self.cache_environment()
+        return results
+
+    def cache_environment(self):
+        # only imported files are cached, and not if part of an import cycle
+        if self.parse_address == "root" or self.parse_address in self.dependencies:
+            return
+        if any(statement.missing for statement in self._statements):
+            return
+        cache = get_import_cache()
+        if cache:
+            cache.put(
+                self.parse_address, self.text, self.environment, self.dependencies
+            )
 
     def process_function_args(
         self, args, meta: Meta, concept_arguments: Optional[LooseConceptList] = None
@@ -595,6 +1009,9 @@ class ParseToObjects(Transformer):
     def IDENTIFIER(self, args) -> str:
         return args.value
 
+    def LABEL(self, args) -> str:
+        return args.value
+
     def ADDRESS(self, args) -> str:
         return args.value
 
@@ -911,6 +1328,39 @@ class ParseToObjects(Transformer):
         #            namespace=self.environment.namespace,
         return Grain(components=[self.environment.concepts[a] for a in args[0]])
 
+    def partition_clause(self, args) -> DatasourceMetadata:
+        return DatasourceMetadata(
+            freshness_concept=None,
+            partition_fields=[self.environment.concepts[a] for a in args[0]],
+        )
+
+    def statistic(self, args) -> Tuple[str, int]:
+        return (str(args[0]), args[1])
+
+    def distinct_statistics(self, args) -> Dict[str, int]:
+        return {self.environment.concepts[k].address: v for k, v in args}
+
+    def statistics_clause(self, args) -> DatasourceStatistics:
+        statistics = DatasourceStatistics()
+        for arg in args:
+            if isinstance(arg, dict):
+                statistics.distinct_counts.update(arg)
+            elif arg[0].lower() == "rows":
+                statistics.row_count = arg[1]
+            elif arg[0].lower() == "bytes":
+                statistics.bytes = arg[1]
+            else:
+                raise ParseError(
+                    f"Unknown datasource statistic {arg[0]}, expected rows or bytes"
+                )
+        return statistics
+
+    def shard(self, args) -> Shard:
+        return Shard(value=args[0], address=Address(location=args[1]))
+
+    def shards(self, args) -> List[Shard]:
+        return args
+
     def raw_column_assignment(self, args):
         return RawColumnExpr(text=args[0][3:-3])
 
@@ -920,13 +1370,32 @@ class ParseToObjects(Transformer):
         columns: List[ColumnAssignment] = args[1]
         grain: Optional[Grain] = None
         address: Optional[Address] = None
-        for val in args[1:]:
+        metadata = DatasourceMetadata(freshness_concept=None)
+        shards: List[Shard] = []
+        statistics: Optional[DatasourceStatistics] = None
+        for val in args[2:]:
             if isinstance(val, Address):
                 address = val
             elif isinstance(val, Grain):
                 grain = val
             elif isinstance(val, Query):
                 address = Address(location=f"({val.text})")
+            elif isinstance(val, DatasourceMetadata):
+                metadata = val
+            elif isinstance(val, DatasourceStatistics):
+                statistics = val
+            elif isinstance(val, list):
+                shards = val
+        if shards:
+            if len(metadata.partition_fields) != 1:
+                raise ParseError(
+                    f"Sharded datasource {name} must declare a single partition"
+                    f" field, line {meta.line}"
+                )
+            metadata.shards = shards
+            address = Address(location=shard_location(shards))
+        if statistics:
+            metadata.statistics = statistics
         if not address:
             raise ValueError(
                 "Malformed datasource, missing address or query declaration"
@@ -939,6 +1408,7 @@ class ParseToObjects(Transformer):
             grain=grain,  # type: ignore
             address=address,
             namespace=self.environment.namespace,
+            metadata=metadata,
         )
         for column in columns:
             column.concept = column.concept.with_grain(datasource.grain)
@@ -988,7 +1458,16 @@ class ParseToObjects(Transformer):
             )
         if concept.metadata:
             concept.metadata.line_number = meta.line
-        self.environment.add_concept(concept, meta=meta)
+        existing = self.environment.concepts.get(
+            concept.name if concept.namespace == DEFAULT_NAMESPACE else concept.address
+        )
+        # a repeated select redeclares its derived concepts; keep the grain
+        # resolved version from the last run rather than churning the environment
+        if not (
+            isinstance(existing, Concept)
+            and identical_concepts(existing, concept.with_select_grain(existing.grain))
+        ):
+            self.environment.add_concept(concept, meta=meta)
         return ConceptTransform(function=function, output=concept)
 
     @v_args(meta=True)
@@ -1061,39 +1540,56 @@ class ParseToObjects(Transformer):
         path = args[0].split(".")
 
         target = join(self.environment.working_path, *path) + ".preql"
+        nparser: ParseToObjects | None = None
         if target in self.parsed:
             nparser = self.parsed[target]
+            environment = nparser.environment
+            self.dependencies[target] = content_hash(nparser.text)
+        elif target in self.cached_imports:
+            environment = self.cached_imports[target]
         else:
             try:
                 with open(target, "r", encoding="utf-8") as f:
                     text = f.read()
-                nparser = ParseToObjects(
-                    visit_tokens=True,
-                    text=text,
-                    environment=Environment(
-                        working_path=dirname(target),
-                        # namespace=alias,
-                    ),
-                    parse_address=target,
-                    parsed={**self.parsed, **{self.parse_address: self}},
-                )
-                nparser.transform(PARSER.parse(text))
-                self.parsed[target] = nparser
-                # add the parsed objects of the import in
-                self.parsed = {**self.parsed, **nparser.parsed}
+                cache = get_import_cache()
+                cached = cache.get(target, text) if cache else None
+                if cached:
+                    environment = cached.environment
+                    self.cached_imports[target] = environment
+                    self.dependencies.update(cached.dependencies)
+                else:
+                    nparser = ParseToObjects(
+                        visit_tokens=True,
+                        text=text,
+                        environment=Environment(
+                            working_path=dirname(target),
+                            # namespace=alias,
+                        ),
+                        parse_address=target,
+                        parsed={**self.parsed, **{self.parse_address: self}},
+                    )
+                    nparser.transform(PARSER.parse(text))
+                    environment = nparser.environment
+                    self.parsed[target] = nparser
+                    # add the parsed objects of the import in
+                    self.parsed = {**self.parsed, **nparser.parsed}
+                self.dependencies[target] = content_hash(text)
             except Exception as e:
                 raise ImportError(
                     f"Unable to import file {dirname(target)}, parsing error: {e}"
                 )
-
-        for _, concept in nparser.environment.concepts.items():
+        if nparser:
+            self.dependencies.update(nparser.dependencies)
+            self._statement_imports.append(nparser)
+            # a circular import of a file that is still being transformed
+            if nparser._results_stash is None:
+                self._statement_partial = True
+        for _, concept in environment.concepts.items():
             self.environment.add_concept(concept.with_namespace(alias))
 
-        for _, datasource in nparser.environment.datasources.items():
+        for _, datasource in environment.datasources.items():
             self.environment.add_datasource(datasource.with_namespace(alias))
-        imps = ImportStatement(
-            alias=alias, path=Path(args[0]), environment=nparser.environment
-        )
+        imps = ImportStatement(alias=alias, path=Path(args[0]), environment=environment)
         self.environment.imports[alias] = imps
         return imps
 
@@ -1937,7 +2433,7 @@ def parse_text(text: str, environment: Optional[Environment] = None) -> Tuple[
         | None
     ],
 ]:
-    environment = environment or Environment(datasources={})
+    environment = environment or Environment()
     parser = ParseToObjects(visit_tokens=True, text=text, environment=environment)
 
     try:
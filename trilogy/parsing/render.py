@@ -22,6 +22,8 @@ from trilogy.core.models import (
     ConceptDeclarationStatement,
     ConceptDerivation,
     Datasource,
+    Shard,
+    DatasourceStatistics,
     WindowItem,
     FilterItem,
     ColumnAssignment,
@@ -129,12 +131,45 @@ class Renderer:
     @to_string.register
     def _(self, arg: Datasource):
         assignments = ",\n\t".join([self.to_string(x) for x in arg.columns])
-        return f"""datasource {arg.name} (
+        base = f"""datasource {arg.name} (
     {assignments}
     ) 
-{self.to_string(arg.grain)} 
+{self.to_string(arg.grain)} """
+        if arg.metadata.partition_fields:
+            fields = ",".join(self.to_string(x) for x in arg.metadata.partition_fields)
+            base += f"\npartition ({fields}) "
+        if arg.metadata.statistics:
+            base += f"\n{self.to_string(arg.metadata.statistics)} "
+        if arg.metadata.shards:
+            shards = ",\n\t".join(self.to_string(x) for x in arg.metadata.shards)
+            return f"""{base}
+shards (
+    {shards}
+    );"""
+        return f"""{base}
 {self.to_string(arg.address)};"""
 
+    @to_string.register
+    def _(self, arg: DatasourceStatistics):
+        stats = []
+        if arg.row_count is not None:
+            stats.append(f"rows: {arg.row_count}")
+        if arg.bytes is not None:
+            stats.append(f"bytes: {arg.bytes}")
+        if arg.distinct_counts:
+            local = DEFAULT_NAMESPACE + "."
+            counts = ", ".join(
+                f"{address.removeprefix(local)}: {count}"
+                for address, count in arg.distinct_counts.items()
+            )
+            stats.append(f"distinct ({counts})")
+        return f"statistics ({', '.join(stats)})"
+
+    @to_string.register
+    def _(self, arg: Shard):
+        value = f"'{arg.value}'" if isinstance(arg.value, str) else str(arg.value)
+        return f"{value}: {arg.address.location}"
+
     @to_string.register
     def _(self, arg: "Grain"):
         components = ",".join(self.to_string(x) for x in arg.components)
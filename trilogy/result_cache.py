@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Hashable
+
+from trilogy.constants import CONFIG, ResultCacheConfig, logger
+from trilogy.core.enums import PurposeLineage
+from trilogy.core.models import (
+    Address,
+    DataType,
+    Environment,
+    ProcessedQuery,
+    SelectStatement,
+)
+from trilogy.core.processing.node_generators.group_node import (
+    derivable_from,
+    rollup_lineage,
+)
+from trilogy.core.query_cache import CacheStats, statement_fingerprint
+from trilogy.parsing.render import Renderer
+
+LOGGER_PREFIX = "[RESULT_CACHE]"
+
+COLUMN_TYPES = {
+    DataType.STRING: "VARCHAR",
+    DataType.BOOL: "BOOLEAN",
+    DataType.INTEGER: "BIGINT",
+    DataType.BIGINT: "BIGINT",
+    DataType.UNIX_SECONDS: "BIGINT",
+    DataType.FLOAT: "DOUBLE",
+    DataType.NUMBER: "DOUBLE",
+    DataType.NUMERIC: "DOUBLE",
+    DataType.DATE: "DATE",
+    DataType.DATETIME: "TIMESTAMP",
+    DataType.TIMESTAMP: "TIMESTAMP",
+}
+
+
+@dataclass
+class CachedResult:
+    table: str
+    statement: SelectStatement
+    revision: Hashable
+    created: float
+
+
+class ResultCache:
+    """LRU cache of select results, held in a local duckdb database.
+
+    Exact repeats of a cached select read its rows back. A select at a
+    coarser grain is planned against the cached rows alone, so it is
+    answered locally if its aggregates are sums, counts, minimums or
+    maximums that can be recombined from them, and misses otherwise. Entries are only valid for the environment revision
+    they were cached under."""
+
+    def __init__(self, config: ResultCacheConfig | None = None):
+        import duckdb
+
+        from trilogy.dialect.duckdb import DuckDBDialect
+
+        config = config or CONFIG.result_cache
+        self.max_size = config.max_size
+        self.max_rows = config.max_rows
+        self.ttl = config.ttl
+        self.stats = CacheStats()
+        self.connection = duckdb.connect(config.path or ":memory:")
+        self.generator = DuckDBDialect()
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._count = 0
+        # id of processed query -> query and the select it came from
+        self._statements: OrderedDict[int, tuple[ProcessedQuery, SelectStatement]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def track(self, processed: ProcessedQuery, statement: SelectStatement):
+        """Record the select a processed query was planned from."""
+        self._statements[id(processed)] = (processed, statement)
+        self._statements.move_to_end(id(processed))
+        while len(self._statements) > self.max_size:
+            self._statements.popitem(last=False)
+
+    def statement(self, processed: ProcessedQuery) -> SelectStatement | None:
+        found = self._statements.get(id(processed))
+        if found is None or found[0] is not processed:
+            return None
+        return found[1]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.connection.execute(f"DROP TABLE IF EXISTS {entry.table}")
+
+    def _expire(self, revision: Hashable):
+        for key, entry in list(self._entries.items()):
+            if entry.revision != revision:
+                self._remove(key)
+            elif self.ttl is not None and monotonic() - entry.created > self.ttl:
+                self._remove(key)
+                self.stats.expirations += 1
+
+    def get(
+        self, environment: Environment, statement: SelectStatement
+    ) -> tuple[list[str], list[Any]] | None:
+        """Column names and rows answering a select, if the cache can."""
+        revision = environment.revision
+        if revision is None:
+            return None
+        self._expire(revision)
+        key = statement_fingerprint(statement)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return self._fetch(f"SELECT * FROM {entry.table}")
+        for key, entry in reversed(self._entries.items()):
+            sql = self.rollup_sql(environment, entry, statement)
+            if sql is None:
+                continue
+            logger.info(f"{LOGGER_PREFIX} answering from {entry.table}")
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return self._fetch(sql)
+        self.stats.misses += 1
+        return None
+
+    def _fetch(self, sql: str) -> tuple[list[str], list[Any]]:
+        cursor = self.connection.execute(sql)
+        columns = [column[0] for column in cursor.description or []]
+        return columns, cursor.fetchall()
+
+    def rollup_sql(
+        self,
+        environment: Environment,
+        entry: CachedResult,
+        statement: SelectStatement,
+    ) -> str | None:
+        """SQL computing a select from a cached result, or None if the
+        cached rows cannot answer it."""
+        cached = entry.statement
+        if cached.limit is not None or statement.hidden_components:
+            return None
+        if not any(
+            c.derivation == PurposeLineage.AGGREGATE
+            for c in statement.output_components
+        ):
+            return None
+        if not statement.grain.issubset(cached.grain):
+            return None
+        # skip planning selects that need anything the rows don't hold
+        available = {c.address for c in cached.output_components}
+        required = [*statement.output_components]
+        if statement.where_clause:
+            required += statement.where_clause.concept_arguments
+        for concept in required:
+            if concept.derivation == PurposeLineage.AGGREGATE:
+                if concept.address not in available:
+                    return None
+                # only additive aggregates recombine at a coarser grain
+                if statement.grain != cached.grain and rollup_lineage(concept) is None:
+                    return None
+            elif derivable_from(concept, available) is None:
+                return None
+        if cached.where_clause:
+            # rows already filtered the same way can answer without the filter
+            renderer = Renderer()
+            if not statement.where_clause or renderer.to_string(
+                statement.where_clause
+            ) != renderer.to_string(cached.where_clause):
+                return None
+            statement = statement.model_copy(update={"where_clause": None})
+        datasource = cached.to_datasource(
+            namespace=environment.namespace,
+            identifier=entry.table,
+            address=Address(location=entry.table),
+            grain=cached.grain,
+        )
+        for column in datasource.columns:
+            column.modifiers = []
+        local = Environment(
+            working_path=environment.working_path, namespace=environment.namespace
+        )
+        local.concepts.update(environment.concepts)
+        local.add_datasource(datasource)
+        try:
+            queries = self.generator.generate_queries(local, [statement])
+            return self.generator.compile_statement(queries[-1])
+        except Exception as e:
+            logger.debug(f"{LOGGER_PREFIX} cannot answer from {entry.table}: {e}")
+            return None
+
+    def put(
+        self,
+        environment: Environment,
+        statement: SelectStatement,
+        columns: list[str],
+        rows: list[Any],
+    ):
+        revision = environment.revision
+        if revision is None or self.max_size <= 0 or len(rows) > self.max_rows:
+            return
+        types = [
+            COLUMN_TYPES.get(c.datatype) if isinstance(c.datatype, DataType) else None
+            for c in statement.output_components
+        ]
+        if statement.hidden_components or None in types or len(types) != len(columns):
+            return
+        key = statement_fingerprint(statement)
+        if key in self._entries:
+            self._remove(key)
+        self._count += 1
+        table = f"cached_result_{self._count}"
+        schema = ", ".join(f'"{name}" {type}' for name, type in zip(columns, types))
+        self.connection.execute(f"CREATE OR REPLACE TABLE {table} ({schema})")
+        if rows:
+            placeholders = ", ".join("?" for _ in columns)
+            self.connection.executemany(
+                f"INSERT INTO {table} VALUES ({placeholders})",
+                [tuple(row) for row in rows],
+            )
+        self._entries[key] = CachedResult(
+            table=table, statement=statement, revision=revision, created=monotonic()
+        )
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def clear(self):
+        for key in list(self._entries):
+            self._remove(key)
+        self._statements.clear()
@@ -0,0 +1,198 @@
+from typing import Any, Callable, Iterator, List, Optional
+
+from trilogy.core.models import Concept, DataType, ListType
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def has_arrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def arrow_type(datatype) -> Any:
+    """Arrow type for a trilogy datatype, or None to infer from the data."""
+    import pyarrow as pa
+
+    if isinstance(datatype, ListType):
+        inner = arrow_type(datatype.type)
+        return pa.list_(inner) if inner is not None else None
+    if not isinstance(datatype, DataType):
+        return None
+    return {
+        DataType.STRING: pa.string(),
+        DataType.BOOL: pa.bool_(),
+        DataType.INTEGER: pa.int64(),
+        DataType.BIGINT: pa.int64(),
+        DataType.UNIX_SECONDS: pa.int64(),
+        DataType.FLOAT: pa.float64(),
+        DataType.NUMBER: pa.float64(),
+        DataType.NUMERIC: pa.float64(),
+        DataType.DATE: pa.date32(),
+        DataType.DATETIME: pa.timestamp("us"),
+        DataType.TIMESTAMP: pa.timestamp("us"),
+        DataType.DATE_PART: pa.string(),
+    }.get(datatype)
+
+
+def result_schema(names: List[str], columns: List[Concept]) -> Any:
+    """Arrow schema for a result, typed from the output concepts where
+    they line up with the result columns."""
+    import pyarrow as pa
+
+    types = [arrow_type(c.datatype) for c in columns]
+    if len(types) != len(names):
+        types = [None] * len(names)
+    return pa.schema(
+        [pa.field(name, dtype or pa.null()) for name, dtype in zip(names, types)]
+    )
+
+
+def rows_to_batch(rows: List[tuple], schema: Any) -> Any:
+    import pyarrow as pa
+
+    arrays = []
+    for field, values in zip(schema, zip(*rows) if rows else [[]] * len(schema)):
+        if pa.types.is_null(field.type):
+            arrays.append(pa.array(values))
+            continue
+        try:
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # declared types are advisory; fall back to what the engine sent
+            arrays.append(pa.array(values))
+    return pa.RecordBatch.from_arrays(arrays, names=schema.names)
+
+
+class StreamingResult:
+    """A query result read in fixed size batches.
+
+    Batches are arrow RecordBatches when pyarrow is installed and lists of
+    tuples otherwise. Results are single pass; rows are fetched from the
+    underlying cursor as batches are consumed."""
+
+    def __init__(
+        self,
+        columns: List[str],
+        batches: Iterator[Any],
+        schema: Any = None,
+        arrow: bool = False,
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        self.columns = columns
+        self.schema = schema
+        self.arrow = arrow
+        self._batches = batches
+        self._on_close = on_close
+        self._consumed = False
+
+    def keys(self) -> List[str]:
+        return self.columns
+
+    def iter_batches(self) -> Iterator[Any]:
+        if self._consumed:
+            raise ValueError("Streaming results can only be read once")
+        self._consumed = True
+        try:
+            while True:
+                # read through the attribute, as buffer() may swap it
+                batch = next(self._batches, None)
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            self.close()
+
+    def buffer(self):
+        """Read the remaining batches into memory, releasing the cursor
+        for other statements."""
+        self._batches = iter(list(self._batches))
+
+    def __iter__(self) -> Iterator[tuple]:
+        for batch in self.iter_batches():
+            if self.arrow:
+                yield from zip(*(column.to_pylist() for column in batch.columns))
+            else:
+                yield from batch
+
+    def fetchall(self) -> List[tuple]:
+        return list(self)
+
+    def close(self):
+        if self._on_close:
+            self._on_close()
+            self._on_close = None
+
+    def to_arrow(self) -> Any:
+        import pyarrow as pa
+
+        batches = list(self.iter_batches())
+        if not batches:
+            return pa.Table.from_batches([], schema=self.schema)
+        return pa.Table.from_batches(batches)
+
+    def to_pandas(self) -> Any:
+        return self.to_arrow().to_pandas()
+
+    def to_polars(self) -> Any:
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("to_polars requires polars to be installed")
+        return polars.from_arrow(self.to_arrow())
+
+
+def stream_cursor(
+    result: Any,
+    output_columns: List[Concept],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_close: Optional[Callable[[], None]] = None,
+) -> StreamingResult:
+    """Stream a DBAPI or SQLAlchemy cursor in batches of rows."""
+    names = list(result.keys())
+    arrow = has_arrow()
+    schema = result_schema(names, output_columns) if arrow else None
+
+    def batches() -> Iterator[Any]:
+        while True:
+            rows = [tuple(row) for row in result.fetchmany(batch_size)]
+            if not rows:
+                return
+            yield rows_to_batch(rows, schema) if arrow else rows
+
+    return StreamingResult(
+        names, batches(), schema=schema, arrow=arrow, on_close=on_close
+    )
+
+
+def stream_duckdb(
+    connection: Any,
+    sql: str,
+    output_columns: List[Concept],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_close: Optional[Callable[[], None]] = None,
+) -> StreamingResult:
+    """Stream a query on a native duckdb connection, reading arrow batches
+    directly rather than building python rows. DuckDB's own result types
+    are kept, as they are exact."""
+    # duckdb connections double as their own cursor
+    connection.execute(sql)
+    cursor = connection
+    names = [column[0] for column in cursor.description]
+    if not has_arrow():
+
+        def rows() -> Iterator[Any]:
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield batch
+
+        return StreamingResult(names, rows(), on_close=on_close)
+    reader = cursor.fetch_record_batch(batch_size)
+    return StreamingResult(
+        names, iter(reader), schema=reader.schema, arrow=True, on_close=on_close
+    )
@@ -1,16 +1,26 @@
 from click import Path, argument, option, group, pass_context, UNPROCESSED
 from trilogy import Executor, Environment, parse
+from trilogy.core.models import Datasource, ProcessedQuery, ProcessedQueryPersist
+from trilogy.results import StreamingResult
+from sqlalchemy.engine import CursorResult
 from trilogy.dialect.enums import Dialects
 from datetime import datetime
 from pathlib import Path as PathlibPath
 from trilogy.hooks.query_debugger import DebuggingHook
 from trilogy.parsing.render import Renderer
+from trilogy.parsing.parse_engine import PARSER
+from trilogy.parser import parse_text
 from trilogy.constants import DEFAULT_NAMESPACE
 
 
 def print_tabulate(q, tabulate):
-    result = q.fetchall()
-    print(tabulate(result, headers=q.keys(), tablefmt="psql"))
+    if not isinstance(q, StreamingResult):
+        print(tabulate(q.fetchall(), headers=q.keys(), tablefmt="psql"))
+        return
+    # print a batch at a time, rather than holding the full result
+    for idx, batch in enumerate(q.iter_batches()):
+        rows = zip(*(c.to_pylist() for c in batch.columns)) if q.arrow else batch
+        print(tabulate(rows, headers=q.keys() if idx == 0 else (), tablefmt="psql"))
 
 
 def pairwise(t):
@@ -27,6 +37,53 @@ def extra_to_kwargs(arg_list: list[str]) -> dict[str, str | int]:
     return final
 
 
+def get_executor(
+    dialect: str, directory: PathlibPath, namespace: str, conn_args, debug: bool
+) -> Executor:
+    edialect = Dialects(dialect)
+    conn_dict = extra_to_kwargs((conn_args))
+    if edialect == Dialects.DUCK_DB:
+        from trilogy.dialect.config import DuckDBConfig
+
+        conf = DuckDBConfig(**conn_dict)  # type: ignore
+    elif edialect == Dialects.SNOWFLAKE:
+        from trilogy.dialect.config import SnowflakeConfig
+
+        conf = SnowflakeConfig(**conn_dict)  # type: ignore
+    elif edialect == Dialects.SQL_SERVER:
+        from trilogy.dialect.config import SQLServerConfig
+
+        conf = SQLServerConfig(**conn_dict)  # type: ignore
+    elif edialect == Dialects.POSTGRES:
+        from trilogy.dialect.config import PostgresConfig
+
+        conf = PostgresConfig(**conn_dict)  # type: ignore
+    else:
+        conf = None
+    exec = Executor(
+        dialect=edialect,
+        engine=edialect.default_engine(conf=conf),
+        environment=Environment(working_path=str(directory), namespace=namespace),
+        hooks=[DebuggingHook()] if debug else [],
+    )
+    return exec
+
+
+def write_statistics(script: str, datasources: dict[str, Datasource]) -> str:
+    """Replace each datasource declaration in a script with its
+    rendered form, leaving all other text untouched"""
+    r = Renderer()
+    spans = []
+    for node in PARSER.parse(script).find_data("datasource"):
+        name = str(node.children[0])
+        if name in datasources:
+            spans.append((node.meta.start_pos, node.meta.end_pos, datasources[name]))
+    for start, end, datasource in sorted(spans, key=lambda x: x[0], reverse=True):
+        rendered = r.to_string(datasource).rstrip(";")
+        script = script[:start] + rendered + script[end:]
+    return script
+
+
 @group()
 @option("--debug", default=False)
 @pass_context
@@ -71,41 +128,20 @@ def run(ctx, input, dialect: str, conn_args):
         script = input
         namespace = DEFAULT_NAMESPACE
         directory = PathlibPath.cwd()
-    edialect = Dialects(dialect)
-
-    debug = ctx.obj["DEBUG"]
-    conn_dict = extra_to_kwargs((conn_args))
-    if edialect == Dialects.DUCK_DB:
-        from trilogy.dialect.config import DuckDBConfig
-
-        conf = DuckDBConfig(**conn_dict)  # type: ignore
-    elif edialect == Dialects.SNOWFLAKE:
-        from trilogy.dialect.config import SnowflakeConfig
-
-        conf = SnowflakeConfig(**conn_dict)  # type: ignore
-    elif edialect == Dialects.SQL_SERVER:
-        from trilogy.dialect.config import SQLServerConfig
-
-        conf = SQLServerConfig(**conn_dict)  # type: ignore
-    elif edialect == Dialects.POSTGRES:
-        from trilogy.dialect.config import PostgresConfig
-
-        conf = PostgresConfig(**conn_dict)  # type: ignore
-    else:
-        conf = None
-    exec = Executor(
-        dialect=edialect,
-        engine=edialect.default_engine(conf=conf),
-        environment=Environment(working_path=str(directory), namespace=namespace),
-        hooks=[DebuggingHook()] if debug else [],
-    )
+    exec = get_executor(dialect, directory, namespace, conn_args, ctx.obj["DEBUG"])
 
     queries = exec.parse_text(script)
     start = datetime.now()
     print(f"Executing {len(queries)} statements...")
     for idx, query in enumerate(queries):
         lstart = datetime.now()
-        results = exec.execute_statement(query)
+        results: StreamingResult | CursorResult | None
+        if isinstance(query, ProcessedQuery) and not isinstance(
+            query, ProcessedQueryPersist
+        ):
+            results = exec.execute_stream(query)
+        else:
+            results = exec.execute_statement(query)
         end = datetime.now()
         print(f"Statement {idx+1} of {len(queries)} done, duration: {end-lstart}.")
         if not results:
@@ -123,5 +159,37 @@ def run(ctx, input, dialect: str, conn_args):
     print(f"Completed all in {(datetime.now()-start)}")
 
 
+@cli.command(
+    "analyze",
+    context_settings=dict(
+        ignore_unknown_options=True,
+    ),
+)
+@argument("input", type=Path(exists=True))
+@argument("dialect", type=str)
+@argument("conn_args", nargs=-1, type=UNPROCESSED)
+@pass_context
+def analyze(ctx, input, dialect: str, conn_args):
+    """Collect table statistics for each datasource declared in a file
+    and write them back into it, for cost based source selection."""
+    start = datetime.now()
+    inputp = PathlibPath(input)
+    with open(input, "r") as f:
+        script = f.read()
+    exec = get_executor(
+        dialect, inputp.parent, DEFAULT_NAMESPACE, conn_args, ctx.obj["DEBUG"]
+    )
+    _, statements = parse_text(script, exec.environment)
+    datasources = {x.name: x for x in statements if isinstance(x, Datasource)}
+    for datasource in datasources.values():
+        datasource.metadata.statistics = exec.analyze_datasource(datasource)
+        print(
+            f"Analyzed {datasource.name}, {datasource.metadata.statistics.row_count} rows."
+        )
+    with open(input, "w") as f:
+        f.write(write_statistics(script, datasources))
+    print(f"Completed all in {(datetime.now()-start)}")
+
+
 if __name__ == "__main__":
     cli()